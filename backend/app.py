@@ -6,139 +6,36 @@ Production-Ready Version with TensorFlow/Keras Compatibility
 import os
 import sys
 import io
-import json
-import h5py
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from PIL import Image
 from dotenv import load_dotenv
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 
-# ================================
-# TENSORFLOW/KERAS SETUP (CRITICAL)
-# ================================
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress TF warnings
-
-import tensorflow as tf
-from tensorflow.keras.layers import Dense, InputLayer
-
-# Suppress GPU warnings
-physical_devices = tf.config.list_physical_devices('GPU')
-if physical_devices:
-    tf.config.experimental.set_memory_growth(physical_devices[0], True)
-
-# ================================
-# CUSTOM KERAS COMPATIBILITY LAYERS
-# ================================
-class SafeDense(Dense):
-    """Dense layer that handles outdated Keras configs"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("quantization_config", None)
-        super().__init__(*args, **kwargs)
-
-class SafeInputLayer(InputLayer):
-    """InputLayer that handles Keras 2.x ↔ 3.x compatibility"""
-    def __init__(self, *args, **kwargs):
-        if "batch_shape" in kwargs:
-            batch_shape = kwargs.pop("batch_shape")
-            if "batch_input_shape" not in kwargs:
-                kwargs["batch_input_shape"] = batch_shape
-        
-        kwargs.pop("optional", None)
-        kwargs.pop("sparse", None)
-        kwargs.pop("ragged", None)
-        
-        super().__init__(*args, **kwargs)
-
-class SafeConv2D(tf.keras.layers.Conv2D):
-    """Conv2D layer that strips DTypePolicy from Keras 3.x models"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)  # Remove problematic dtype objects
-        super().__init__(*args, **kwargs)
-
-class SafeBatchNormalization(tf.keras.layers.BatchNormalization):
-    """BatchNormalization layer that handles Keras 2.x ↔ 3.x compatibility"""
-    def __init__(self, *args, **kwargs):
-        # Remove problematic config keys
-        kwargs.pop("dtype", None)
-        kwargs.pop("virtual_batch_size", None)
-        kwargs.pop("adjustment", None)
-        super().__init__(*args, **kwargs)
-
-class SafeReLU(tf.keras.layers.ReLU):
-    """ReLU activation that handles Keras 2.x ↔ 3.x compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeActivation(tf.keras.layers.Activation):
-    """Activation layer that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeDepthwiseConv2D(tf.keras.layers.DepthwiseConv2D):
-    """DepthwiseConv2D layer that handles Keras 2.x ↔ 3.x compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeGlobalAveragePooling2D(tf.keras.layers.GlobalAveragePooling2D):
-    """GlobalAveragePooling2D that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeZeroPadding2D(tf.keras.layers.ZeroPadding2D):
-    """ZeroPadding2D that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeMaxPooling2D(tf.keras.layers.MaxPooling2D):
-    """MaxPooling2D that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeFlatten(tf.keras.layers.Flatten):
-    """Flatten that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeDropout(tf.keras.layers.Dropout):
-    """Dropout that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeAdd(tf.keras.layers.Add):
-    """Add layer that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeMultiply(tf.keras.layers.Multiply):
-    """Multiply layer that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
-class SafeReshape(tf.keras.layers.Reshape):
-    """Reshape layer that handles compatibility"""
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("dtype", None)
-        super().__init__(*args, **kwargs)
-
 # Load environment variables
 load_dotenv()
 
+# Queued, request-tagged logging (configured before the routes log anything)
+from utils import logging_setup
+logging_setup.configure_logging()
+
 # Import blueprints
 from routes.disease_report import disease_report_bp
 from routes.download_report import download_report_bp
 from routes.chat import chat_bp
+from routes.bulk_export import bulk_export_bp
+from utils import metrics, request_timing
+from utils.batching import MicroBatcher, BATCHING_ENABLED
+from utils.preprocessing import preprocess_image
+from utils.class_names import CLASS_NAMES
+from utils.cache import create_cache
+from utils.inference_client import InferenceClient, InferenceUnavailableError, INFERENCE_SOCKET
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -148,180 +45,76 @@ CORS(app)
 app.register_blueprint(disease_report_bp)
 app.register_blueprint(download_report_bp)
 app.register_blueprint(chat_bp)
+app.register_blueprint(bulk_export_bp)
 
-# ================================
-# ROBUST MODEL LOADING WITH KERAS COMPATIBILITY
-# ================================
+# Request IDs for log lines (X-Request-ID)
+logging_setup.init_app(app)
 
-def clean_dtype_policy_recursive(obj):
-    """Aggressively clean Keras 3.x config to load with Keras 2.x"""
-    if isinstance(obj, dict):
-        # Replace DTypePolicy objects
-        if obj.get('class_name') == 'DTypePolicy':
-            return {'class_name': 'str', 'config': {'name': 'float32'}}
-        
-        # Clean problematic config keys from layer configs
-        if 'config' in obj and isinstance(obj['config'], dict):
-            config = obj['config']
-            # Aggressive removal of Keras 3.x specific keys
-            problematic_keys = [
-                'dtype', 'quantization_config', 'backend', 'optional', 'sparse', 
-                'ragged', 'virtual_batch_size', 'adjustment', 'autocast', 
-                'tf_data_experimental_ops_enabled', 'experimental_enable_dispatch'
-            ]
-            for key in problematic_keys:
-                config.pop(key, None)
-            
-            # Remove dtype from nested trainable/non_trainable lists
-            for subkey in list(config.keys()):
-                if isinstance(config[subkey], dict):
-                    config[subkey].pop('dtype', None)
-        
-        # Clean all nested objects
-        for key in list(obj.keys()):
-            obj[key] = clean_dtype_policy_recursive(obj[key])
-    elif isinstance(obj, list):
-        return [clean_dtype_policy_recursive(item) for item in obj]
-    
-    return obj
-
-def load_model_with_fallback():
-    """
-    Load Keras model with multiple fallback strategies
-    """
-    model_path = "models/MobileNetV2_best.h5"
-    
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found at {model_path}")
-    
-    custom_objects = {
-        "Dense": SafeDense,
-        "InputLayer": SafeInputLayer,
-        "Conv2D": SafeConv2D,
-        "BatchNormalization": SafeBatchNormalization,
-        "ReLU": SafeReLU,
-        "Activation": SafeActivation,
-        "DepthwiseConv2D": SafeDepthwiseConv2D,
-        "GlobalAveragePooling2D": SafeGlobalAveragePooling2D,
-        "ZeroPadding2D": SafeZeroPadding2D,
-        "MaxPooling2D": SafeMaxPooling2D,
-        "Flatten": SafeFlatten,
-        "Dropout": SafeDropout,
-        "Add": SafeAdd,
-        "Multiply": SafeMultiply,
-        "Reshape": SafeReshape,
-    }
-    
-    errors = []
-    
-    # Try 1: Direct load
-    try:
-        print("  [1] Attempting direct Keras load...")
-        model = tf.keras.models.load_model(model_path, compile=False, custom_objects=custom_objects)
-        print("      SUCCESS")
-        return model
-    except Exception as e:
-        errors.append(str(e)[:80])
-        print(f"      FAILED: {errors[-1]}")
-    
-    # Try 2: H5py config patch
-    try:
-        print("  [2] Attempting H5py + config patch...")
-        with h5py.File(model_path, 'r') as f:
-            config_str = f.attrs['model_config']
-            if isinstance(config_str, bytes):
-                config_str = config_str.decode('utf-8')
-            config = json.loads(config_str)
-            config = clean_dtype_policy_recursive(config)
-            model = tf.keras.Model.from_config(config, custom_objects=custom_objects)
-            try:
-                model.load_weights(model_path)
-            except:
-                pass
-        print("      SUCCESS")
-        return model
-    except Exception as e:
-        errors.append(str(e)[:80])
-        print(f"      FAILED: {errors[-1]}")
-    
-    # Try 3: Retry without custom objects
-    try:
-        print("  [3] Attempting load without custom objects...")
-        model = tf.keras.models.load_model(model_path, compile=False)
-        print("      SUCCESS")
-        return model
-    except Exception as e:
-        errors.append(str(e)[:80])
-        print(f"      FAILED: {errors[-1]}")
-    
-    raise RuntimeError(f"All load attempts failed: {errors}")
+# Optional Server-Timing header and sampled profiling (off by default)
+request_timing.init_app(app)
+
+log = logging.getLogger(__name__)
 
 # ================================
-# INITIALIZE MODEL AT STARTUP
+# MODEL INITIALIZATION
 # ================================
-print("\n" + "="*60)
-print("Initializing FasalRakshak Backend...")
-print("="*60)
+# MODEL_LOADING controls when TensorFlow and the model are loaded:
+#   eager    - at import (inference workers)
+#   lazy     - on the first prediction request (default)
+#   disabled - never; prediction routes return 503 (LLM/PDF-only workers)
+MODEL_LOADING = os.environ.get("MODEL_LOADING", "lazy").lower()
 
 model = None
-try:
-    print("Loading TensorFlow model...")
-    model = load_model_with_fallback()
-    print("SUCCESS! Model loaded.")
-except Exception as e:
-    print(f"\nERROR loading model: {e}")
-    print("\nBackend will run but predictions will fail.")
-    print("Please check:")
-    print("  * Model file exists at backend/models/MobileNetV2_best.h5")
-    print("  * File is not corrupted")
-    print("  * TensorFlow/Keras versions are compatible")
-    model = None
-
-print("="*60 + "\n")
+infer = None
+batcher = None
+inference_client = None
+startup_timings = {}
+
+_inference_lock = threading.Lock()
+_inference_ready = False
+
+
+def _init_inference():
+    """Connect to the shared inference server or load the model locally"""
+    global model, infer, batcher, inference_client, startup_timings
+
+    log.info("Initializing FasalRakshak model...")
+
+    if INFERENCE_SOCKET:
+        # Shared inference server owns the model (and does the batching)
+        inference_client = InferenceClient(INFERENCE_SOCKET)
+        infer = inference_client.predict
+        log.info("Using shared inference server at %s", INFERENCE_SOCKET)
+    else:
+        # Imports TensorFlow - deferred so non-ML workers never pay for it
+        from model_loader import load_inference, STARTUP_TIMINGS
+        startup_timings = STARTUP_TIMINGS
+        model, infer = load_inference()
+
+        if infer is not None and BATCHING_ENABLED:
+            batcher = MicroBatcher(infer)
+            log.info("Micro-batching enabled (max batch %d, max wait %.0fms)",
+                     batcher.max_batch_size, batcher.max_wait * 1000)
+
+
+def get_inference():
+    """Return the inference function, initializing it on first use (None if unavailable)"""
+    global _inference_ready
+    if not _inference_ready:
+        with _inference_lock:
+            if not _inference_ready:
+                _init_inference()
+                _inference_ready = True
+    return infer
+
+
+if MODEL_LOADING == "eager":
+    get_inference()
 
 # ================================
 # CLASS NAMES
 # ================================
-class_names = [
-    "Apple___Apple_scab",
-    "Apple___Black_rot",
-    "Apple___Cedar_apple_rust",
-    "Apple___healthy",
-    "Blueberry___healthy",
-    "Cherry_(including_sour)___Powdery_mildew",
-    "Cherry_(including_sour)___healthy",
-    "Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot",
-    "Corn_(maize)___Common_rust_",
-    "Corn_(maize)___Northern_Leaf_Blight",
-    "Corn_(maize)___healthy",
-    "Grape___Black_rot",
-    "Grape___Esca_(Black_Measles)",
-    "Grape___Leaf_blight_(Isariopsis_Leaf_Spot)",
-    "Grape___healthy",
-    "Orange___Haunglongbing_(Citrus_greening)",
-    "Peach___Bacterial_spot",
-    "Peach___healthy",
-    "Pepper,_bell___Bacterial_spot",
-    "Pepper,_bell___healthy",
-    "Potato___Early_blight",
-    "Potato___Late_blight",
-    "Potato___healthy",
-    "Raspberry___healthy",
-    "Soybean___healthy",
-    "Squash___Powdery_mildew",
-    "Strawberry___Leaf_scorch",
-    "Strawberry___healthy",
-    "Tomato___Bacterial_spot",
-    "Tomato___Early_blight",
-    "Tomato___Late_blight",
-    "Tomato___Leaf_Mold",
-    "Tomato___Septoria_leaf_spot",
-    "Tomato___Spider_mites Two-spotted_spider_mite",
-    "Tomato___Target_Spot",
-    "Tomato___Tomato_Yellow_Leaf_Curl_Virus",
-    "Tomato___Tomato_mosaic_virus",
-    "Tomato___healthy"
-]
+class_names = CLASS_NAMES
 
 # ================================
 # ROUTES
@@ -333,60 +126,284 @@ def home():
         "status": "OK"
     })
 
+# ================================
+# SHARED PREPROCESSING & POSTPROCESSING
+# ================================
+BATCH_PREDICT_MAX_IMAGES = int(os.environ.get("BATCH_PREDICT_MAX_IMAGES", 64))
+PREPROCESS_WORKERS = int(os.environ.get("PREPROCESS_WORKERS", min(8, (os.cpu_count() or 1) + 2)))
+
+# PIL releases the GIL while decoding/resizing, so threads decode in parallel
+preprocess_pool = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS, thread_name_prefix="preprocess")
+
+# ================================
+# PREDICTION CACHE (content-addressed)
+# ================================
+# Repeat uploads of the same photo skip decode + inference. Keys are the
+# version of the model this worker actually serves (recorded when it was
+# loaded, not re-read from the file on disk) plus the SHA-256 of the uploaded
+# bytes, and the whole cache is dropped when the model version changes.
+PREDICTION_CACHE_ENABLED = os.environ.get("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+PREDICTION_CACHE_BACKEND = os.environ.get("PREDICTION_CACHE_BACKEND", "memory").lower()
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 1024))
+PREDICTION_CACHE_TTL = int(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+PREDICTION_CACHE_PATH = os.environ.get("PREDICTION_CACHE_PATH", "/tmp/fasalrakshak-predictions.sqlite3")
+
+prediction_cache = create_cache(
+    PREDICTION_CACHE_BACKEND,
+    max_entries=PREDICTION_CACHE_SIZE,
+    ttl_seconds=PREDICTION_CACHE_TTL,
+    path=PREDICTION_CACHE_PATH,
+    table="predictions",
+    name="prediction",
+) if PREDICTION_CACHE_ENABLED else None
+
+_cache_model_version = None
+
+
+def served_model_version():
+    """
+    Version of the model answering this worker's predictions (None until known)
+
+    Taken from the artifact loaded at startup, or from the shared inference
+    server's replies - not from the file on disk, which may have been
+    replaced since.
+    """
+    if inference_client is not None:
+        return inference_client.model_version
+    return startup_timings.get("model_version")
+
+
+def prediction_cache_key(image_bytes):
+    """Cache key for an upload (None while the model version is unknown), invalidating the cache if the model changed"""
+    global _cache_model_version
+    version = served_model_version()
+    if version is None:
+        return None
+    if version != _cache_model_version:
+        if _cache_model_version is not None:
+            log.info("Model version changed (%s -> %s), clearing prediction cache", _cache_model_version, version)
+            prediction_cache.clear()
+        _cache_model_version = version
+    return f"{version}:{hashlib.sha256(image_bytes).hexdigest()}"
+
+PREDICTION_DISABLED_ERROR = {"error": "Predictions are not served by this worker (MODEL_LOADING=disabled)"}
+
+DEMO_PREDICTION = {
+    "disease": "Apple___healthy",
+    "confidence": 0.85,
+    "all_predictions": {
+        "Apple___healthy": 0.85,
+        "Tomato___Early_blight": 0.10,
+        "Potato___Late_blight": 0.05
+    }
+}
+
+
+def run_model(img_batch):
+    """Run an (N, 224, 224, 3) uint8 batch through the model"""
+    get_inference()
+    with metrics.timer("inference"):
+        if batcher is not None:
+            return batcher.submit(img_batch)
+        return infer(img_batch)
+
+
+def format_prediction(probabilities):
+    """Map one row of model output to the /predict response payload"""
+    predicted_index = int(np.argmax(probabilities))
+    return {
+        "disease": class_names[predicted_index],
+        "confidence": float(np.max(probabilities)),
+        "all_predictions": {
+            class_names[i]: float(probabilities[i])
+            for i in range(min(5, len(class_names)))
+        }
+    }
+
+
 @app.route("/predict", methods=["POST"])
 def predict():
     """Predict plant disease from image"""
     try:
+        upload_start = time.perf_counter()
         image_file = request.files.get("image")
         if not image_file:
             return jsonify({"error": "No image provided"}), 400
+        image_bytes = image_file.read()
+        metrics.observe("upload_read", time.perf_counter() - upload_start)
+
+        if MODEL_LOADING == "disabled":
+            return jsonify(PREDICTION_DISABLED_ERROR), 503
 
         # Check if model loaded successfully
-        if model is None:
+        if get_inference() is None:
             # Fallback: return a demo disease based on image analysis
-            print("WARNING: Model not loaded, using fallback demo mode")
-            image = Image.open(io.BytesIO(image_file.read())).convert("RGB")
+            log.warning("Model not loaded, using fallback demo mode")
+            image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
             # Return a dummy prediction for demo
-            return jsonify({
-                "disease": "Apple___healthy",
-                "confidence": 0.85,
-                "all_predictions": {
-                    "Apple___healthy": 0.85,
-                    "Tomato___Early_blight": 0.10,
-                    "Potato___Late_blight": 0.05
-                }
-            }), 200
-        
+            return jsonify(DEMO_PREDICTION), 200
+
+        # Repeat upload of the same photo
+        cache_key = prediction_cache_key(image_bytes) if prediction_cache is not None else None
+        if cache_key is not None:
+            cached = prediction_cache.get(cache_key)
+            if cached is not None:
+                return jsonify(cached), 200
+
         # Image preprocessing
-        image = Image.open(io.BytesIO(image_file.read())).convert("RGB")
-        image = image.resize((224, 224))
-        img_array = np.array(image) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
+        img_array = np.expand_dims(preprocess_image(image_bytes), axis=0)
+
+        # Prediction (batched with concurrent requests when enabled)
+        predictions = run_model(img_array)
+        payload = format_prediction(predictions[0])
+
+        if prediction_cache is not None:
+            # The shared inference server reports its version with the first result
+            cache_key = cache_key or prediction_cache_key(image_bytes)
+            if cache_key is not None:
+                prediction_cache.set(cache_key, payload)
+
+        return jsonify(payload), 200
+
+    except InferenceUnavailableError as e:
+        log.error("Prediction error: %s", e)
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        log.exception("Prediction error: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Predict plant diseases for many images in one request
+
+    Request:
+        multipart/form-data with one or more "images" files
+
+    Response JSON:
+        {
+            "count": 2,
+            "results": [
+                {"index": 0, "filename": "leaf1.jpg", "disease": ..., "confidence": ..., "all_predictions": {...}},
+                {"index": 1, "filename": "leaf2.jpg", "error": "cannot identify image file"}
+            ]
+        }
+    """
+    try:
+        if MODEL_LOADING == "disabled":
+            return jsonify(PREDICTION_DISABLED_ERROR), 503
 
-        # Prediction
-        predictions = model.predict(img_array, verbose=0)
-        predicted_index = int(np.argmax(predictions))
-        confidence = float(np.max(predictions))
+        upload_start = time.perf_counter()
+        image_files = request.files.getlist("images") or request.files.getlist("image")
+        if not image_files:
+            return jsonify({"error": "No images provided"}), 400
+
+        if len(image_files) > BATCH_PREDICT_MAX_IMAGES:
+            return jsonify({
+                "error": f"Too many images (max {BATCH_PREDICT_MAX_IMAGES})"
+            }), 400
+
+        uploads = [image_file.read() for image_file in image_files]
+        metrics.observe("upload_read", time.perf_counter() - upload_start)
+
+        results = [
+            {"index": i, "filename": image_file.filename}
+            for i, image_file in enumerate(image_files)
+        ]
+
+        use_cache = prediction_cache is not None and get_inference() is not None
+
+        # Serve repeat uploads from the cache, decode + resize the rest in parallel
+        cache_keys = {}
+        futures = {}
+        for i, image_bytes in enumerate(uploads):
+            if use_cache:
+                cache_keys[i] = prediction_cache_key(image_bytes)
+                cached = prediction_cache.get(cache_keys[i]) if cache_keys[i] is not None else None
+                if cached is not None:
+                    results[i].update(cached)
+                    continue
+            futures[i] = preprocess_pool.submit(preprocess_image, image_bytes)
+
+        arrays = []
+        valid_indices = []
+        for i, future in futures.items():
+            try:
+                arrays.append(future.result())
+                valid_indices.append(i)
+            except Exception as e:
+                results[i]["error"] = f"Invalid image: {e}"
+
+        if valid_indices:
+            if get_inference() is None:
+                log.warning("Model not loaded, using fallback demo mode")
+                for i in valid_indices:
+                    results[i].update(DEMO_PREDICTION)
+            else:
+                predictions = run_model(np.stack(arrays))
+                for row, i in enumerate(valid_indices):
+                    payload = format_prediction(predictions[row])
+                    results[i].update(payload)
+                    if use_cache:
+                        cache_keys[i] = cache_keys[i] or prediction_cache_key(uploads[i])
+                        if cache_keys[i] is not None:
+                            prediction_cache.set(cache_keys[i], payload)
 
         return jsonify({
-            "disease": class_names[predicted_index],
-            "confidence": confidence,
-            "all_predictions": {
-                class_names[i]: float(predictions[0][i]) 
-                for i in range(min(5, len(class_names)))
-            }
+            "count": len(results),
+            "results": results
         }), 200
 
+    except InferenceUnavailableError as e:
+        log.error("Batch prediction error: %s", e)
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
-        print(f"Prediction error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Batch prediction error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/predict/stats", methods=["GET"])
+def predict_stats():
+    """Report batching, startup and prediction cache stats for tuning"""
+    if MODEL_LOADING == "disabled":
+        return jsonify({"enabled": False, "model_loading": MODEL_LOADING}), 200
+
+    get_inference()
+    if inference_client is not None:
+        try:
+            stats = inference_client.stats()
+        except InferenceUnavailableError as e:
+            return jsonify({"error": str(e)}), 503
+    else:
+        stats = batcher.stats() if batcher is not None else {"enabled": False}
+        stats["startup"] = startup_timings
+
+    stats["prediction_cache"] = prediction_cache.stats() if prediction_cache is not None else {"enabled": False}
+    return jsonify(stats), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint
+
+    Per-stage latency histograms (upload_read, decode, resize, inference,
+    pdf_render, and one per LLM provider such as gemini) and cache hit/miss
+    counters, summed over every worker process (see utils/metrics.py).
+    """
+    return Response(metrics.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ================================
 # ENTRY POINT (LOCAL ONLY)
 # ================================
 if __name__ == "__main__":
+    # Spawned processes (the bulk-export render pool) re-import the main
+    # module; give them the render-only module instead of this whole app
+    import importlib.util
+    sys.modules["__main__"].__spec__ = importlib.util.find_spec("utils.pdf_render_worker")
+    metrics.clear_snapshots()
+
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk PDF export throughput against the number of render processes
+
+Renders the same batch of distinct reports with 1, 2, 4, ... processes (up
+to the CPU count) through routes.bulk_export.render_items, with the PDF
+cache disabled, and reports reports/second and speedup over one process.
+
+Usage:
+    python benchmark_bulk_export.py [--reports 200] [--max-workers 8]
+"""
+import os
+os.environ["PDF_CACHE_ENABLED"] = "false"  # measure rendering, not cache hits
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmark_pdf import SHORT_REPORT
+import routes.bulk_export as bulk_export
+
+
+def make_items(count):
+    items = []
+    for i in range(count):
+        ai_report = dict(SHORT_REPORT["ai_report"], symptoms=[f"Field survey plot {i}", "Dark lesions", "Wilting"])
+        items.append({"disease": SHORT_REPORT["disease"], "language": "hi" if i % 2 else "en", "ai_report": ai_report})
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk PDF export scaling")
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    items = make_items(args.reports)
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != args.max_workers:
+        worker_counts.append(args.max_workers)
+
+    print("\n" + "=" * 70)
+    print(f"{args.reports} reports, {os.cpu_count()} CPUs")
+    print("=" * 70)
+    print(f"{'processes':>10}{'seconds':>10}{'reports/s':>12}{'speedup':>10}")
+
+    baseline = None
+    for workers in worker_counts:
+        bulk_export.BULK_EXPORT_WORKERS = workers
+        bulk_export._pool = None
+        pool = bulk_export.get_pool()
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_export.render_items(items[:workers * 2])  # start the processes
+
+            start = time.perf_counter()
+            results, pdfs = bulk_export.render_items(items)
+            elapsed = time.perf_counter() - start
+        pool.shutdown()
+
+        failed = sum(1 for r in results if r["status"] != "done")
+        rate = len(pdfs) / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>10}{elapsed:>10.2f}{rate:>12.1f}{rate / baseline:>9.2f}x"
+              + (f"  ({failed} failed)" if failed else ""))
+
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request inference latency on CPU
+
+Compares model.predict(), a direct model __call__, and the compiled
+tf.function path (with and without XLA) that app.py uses.
+
+Usage:
+    python benchmark_inference.py [--model models/MobileNetV2_best.h5] [--runs 100] [--batch 1]
+
+If the model file is missing, an untrained MobileNetV2 with the same
+input/output shape is used so the overheads can still be compared.
+"""
+import os
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')  # CPU only
+
+import argparse
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from model_loader import load_model_with_fallback
+from utils.inference import build_inference_fn
+from utils.model_version import MODEL_PATH
+
+NUM_CLASSES = 38
+
+
+def load_model(path):
+    if os.path.exists(path):
+        print(f"[*] Loading model from {path}")
+        # The shipped H5 needs the loader's dtype-policy cleanup
+        return load_model_with_fallback(path)
+
+    print(f"[!] {path} not found - using untrained MobileNetV2 stand-in")
+    return tf.keras.applications.MobileNetV2(
+        input_shape=(224, 224, 3), weights=None, classes=NUM_CLASSES
+    )
+
+
+def time_fn(fn, batch, runs, warmup=5):
+    for _ in range(warmup):
+        fn(batch)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference latency")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--no-xla", action="store_true", help="skip the XLA variant")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    batch = np.random.randint(0, 256, (args.batch, *model.input_shape[1:]), dtype=np.uint8)
+
+    # predict / __call__ include the numpy rescaling the request path used to do
+    candidates = {
+        "model.predict": lambda x: model.predict(x / 255.0, verbose=0),
+        "model.__call__": lambda x: model(x / 255.0, training=False).numpy(),
+        "compiled": build_inference_fn(model, "compiled"),
+    }
+    if not args.no_xla:
+        try:
+            candidates["compiled+xla"] = build_inference_fn(model, "xla")
+        except Exception as e:
+            print(f"[!] XLA variant unavailable: {e}")
+
+    reference = candidates["model.predict"](batch)
+
+    print("\n" + "=" * 70)
+    print(f"Batch size {args.batch}, {args.runs} runs, TensorFlow {tf.__version__}")
+    print("=" * 70)
+    print(f"{'path':<16}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max |diff|':>14}")
+
+    for name, fn in candidates.items():
+        timings = time_fn(fn, batch, args.runs)
+        diff = float(np.max(np.abs(np.asarray(fn(batch)) - reference)))
+        print(f"{name:<16}{timings.mean():>10.2f}{np.percentile(timings, 50):>10.2f}"
+              f"{np.percentile(timings, 95):>10.2f}{diff:>14.2e}")
+
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
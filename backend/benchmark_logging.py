@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark: request latency under concurrency with print() vs queued logging
+
+Runs a simulated request handler on several threads for each mode and
+reports requests/s and per-request latency. The handler does a little CPU
+work and I/O wait (like a route serving a cached report), then logs the
+way the disease-report route does:
+
+    print          the route's old print() lines (13 per request)
+    logging_sync   the new log calls through a plain StreamHandler
+    logging_queue  the new log calls through utils.logging_setup
+                   (bounded queue + background writer)
+
+Each mode runs in a child process whose stdout is a pipe that the
+benchmark drains at a limited rate, like a log collector that can't keep
+up (--sink-kbps, 0 = drain as fast as possible). With a slow sink, print()
+and synchronous handlers block the request thread once the pipe buffer
+fills. The queue handler drops records instead and counts them.
+
+Usage:
+    python benchmark_logging.py [--threads 8] [--duration 5] [--sink-kbps 256]
+                                [--modes print,logging_sync,logging_queue] [--sampling]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+MODES = ("print", "logging_sync", "logging_queue")
+
+REPORT = {
+    "crop_name": "Tomato",
+    "disease_name": "Late blight",
+    "severity": "High",
+    "symptoms": ["Dark water-soaked lesions", "White mould on leaf undersides", "Brown stem lesions"],
+    "treatment": ["Remove infected plants", "Apply a copper fungicide"],
+}
+DISEASE = "Tomato___Late_blight"
+
+
+# ================================
+# SIMULATED REQUEST (child process)
+# ================================
+def log_with_print(elapsed):
+    """What the disease-report route printed per request before"""
+    print(f"\n{'='*60}")
+    print(f"📋 REQUEST: Generating report for: {DISEASE}")
+    print(f"{'='*60}")
+    print(f"   ├─ Crop: {REPORT['crop_name']}")
+    print(f"   └─ Disease: {REPORT['disease_name']}")
+    print(f"✅ Gemini responded in {elapsed:.2f}s")
+    print(f"\n✅ REPORT VALIDATED & READY")
+    print(f"   ├─ Crop: {REPORT.get('crop_name')}")
+    print(f"   ├─ Disease: {REPORT.get('disease_name')}")
+    print(f"   ├─ Severity: {REPORT.get('severity')}")
+    print(f"   ├─ Symptoms: {len(REPORT.get('symptoms', []))} items")
+    print(f"   ├─ Treatment: {len(REPORT.get('treatment', []))} items")
+    print(f"   └─ Total response time: {elapsed:.2f}s")
+
+
+def log_with_logger(log, elapsed):
+    """What the route logs per request now"""
+    log.info("Report requested for %s (crop: %s, disease: %s, language: %s)",
+             DISEASE, REPORT["crop_name"], REPORT["disease_name"], "en")
+    log.info("Disease report generated (%s)", "gemini")
+    log.info("Report ready in %.2fs (severity: %s, %d symptoms, %d treatments)",
+             elapsed, REPORT["severity"], len(REPORT["symptoms"]), len(REPORT["treatment"]))
+
+
+def run_child(mode, threads, duration, work_ms, wait_ms, result_path):
+    import logging
+
+    if mode == "logging_queue":
+        from utils import logging_setup
+        logging_setup.configure_logging()
+    elif mode == "logging_sync":
+        from utils.logging_setup import TextFormatter
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(TextFormatter())
+        logging.getLogger().addHandler(handler)
+        logging.getLogger().setLevel(logging.INFO)
+    log = logging.getLogger("routes.disease_report")
+
+    latencies = [[] for _ in range(threads)]
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            spin_until = start + work_ms / 1000
+            while time.perf_counter() < spin_until:
+                pass
+            time.sleep(wait_ms / 1000)
+            elapsed = time.perf_counter() - start
+            if mode == "print":
+                log_with_print(elapsed)
+            else:
+                log_with_logger(log, elapsed)
+            latencies[index].append((time.perf_counter() - start) * 1000)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    dropped = 0
+    if mode == "logging_queue":
+        dropped = logging_setup.logging_stats()["dropped"]
+    all_latencies = np.array([ms for per_thread in latencies for ms in per_thread])
+    with open(result_path, "w") as f:
+        json.dump({
+            "mode": mode,
+            "requests": int(len(all_latencies)),
+            "rps": round(len(all_latencies) / wall, 1),
+            "p50_ms": round(float(np.percentile(all_latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(all_latencies, 99)), 3),
+            "max_ms": round(float(all_latencies.max()), 3),
+            "dropped": dropped,
+        }, f)
+    sys.stdout.flush()
+
+
+# ================================
+# DRIVER (parent process)
+# ================================
+def drain(pipe, kbps, counter):
+    """Read the child's stdout at most `kbps` KB/s, like a slow log collector"""
+    chunk = 4096
+    delay = chunk / (kbps * 1024) if kbps > 0 else 0
+    while True:
+        data = pipe.read1(chunk) if hasattr(pipe, "read1") else pipe.read(chunk)
+        if not data:
+            return
+        counter[0] += len(data)
+        if delay:
+            time.sleep(delay)
+
+
+def run_mode(mode, args):
+    env = dict(os.environ, METRICS_ENABLED="false")
+    if not args.sampling:
+        env["LOG_SAMPLE_BURST"] = "0"
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    try:
+        child = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--child", mode,
+             "--threads", str(args.threads), "--duration", str(args.duration),
+             "--work-ms", str(args.work_ms), "--wait-ms", str(args.wait_ms), "--result", result_path],
+            stdout=subprocess.PIPE, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        written = [0]
+        reader = threading.Thread(target=drain, args=(child.stdout, args.sink_kbps, written))
+        reader.start()
+        child.wait()
+        reader.join()
+        with open(result_path) as f:
+            result = json.load(f)
+    finally:
+        os.remove(result_path)
+    result["log_kb"] = round(written[0] / 1024, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request latency with print() vs queued logging")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per mode")
+    parser.add_argument("--work-ms", type=float, default=0.2, help="CPU work per simulated request")
+    parser.add_argument("--wait-ms", type=float, default=2.0, help="I/O wait per simulated request")
+    parser.add_argument("--sink-kbps", type=float, default=256, help="log drain rate in KB/s (0 = unlimited)")
+    parser.add_argument("--sampling", action="store_true", help="keep LOG_SAMPLE_BURST sampling on in logging_queue")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.threads, args.duration, args.work_ms, args.wait_ms, args.result)
+        return
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    sink = f"{args.sink_kbps:.0f} KB/s" if args.sink_kbps > 0 else "unlimited"
+    print(f"\n[*] {args.threads} threads, {args.duration:.0f}s per mode, log sink {sink}")
+    print("=" * 70)
+    print(f"{'mode':<16}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'log KB':>9}{'dropped':>9}")
+    print("=" * 70)
+    for mode in modes:
+        r = run_mode(mode, args)
+        print(f"{mode:<16}{r['rps']:>9.1f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['max_ms']:>9.1f}{r['log_kb']:>9.1f}{r['dropped']:>9}")
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF report rendering: reports per second and output size
+
+Renders a typical report and a long multi-page report in each
+language, entirely in memory.
+
+Usage:
+    python benchmark_pdf.py [--seconds 3]
+"""
+import argparse
+import io
+import time
+
+from utils.pdf_generator import generate_pdf_report
+
+SHORT_REPORT = {
+    "disease": "Tomato___Late_blight",
+    "ai_report": {
+        "crop_name": "Tomato",
+        "disease_name": "Late blight",
+        "severity": "High",
+        "affected_area": "Leaves and stems",
+        "recovery_timeline": "2-3 weeks",
+        "disease_description": "Late blight is caused by the water mould Phytophthora infestans. " * 3,
+        "symptoms": ["Dark water-soaked lesions", "White mould on leaf undersides", "Brown stem lesions"],
+        "treatment": ["Remove infected plants", "Apply copper fungicide", "Improve air circulation"],
+        "organic_treatment": ["Neem oil spray", "Trichoderma application", "Compost tea"],
+        "prevention": ["Crop rotation", "Resistant varieties", "Avoid overhead irrigation"],
+    },
+}
+
+LONG_REPORT = {
+    "disease": SHORT_REPORT["disease"],
+    "ai_report": dict(
+        SHORT_REPORT["ai_report"],
+        symptoms=[f"Symptom observation number {i}" for i in range(60)],
+        treatment=[f"Treatment step number {i}" for i in range(60)],
+    ),
+}
+
+
+def render(report, language):
+    buffer = io.BytesIO()
+    generate_pdf_report(report, buffer, language=language)
+    return buffer.getvalue()
+
+
+def measure(report, language, seconds):
+    """Return (reports per second, bytes, pages) over roughly `seconds`"""
+    render(report, language)  # warm up font/image caches
+
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        pdf = render(report, language)
+        count += 1
+    elapsed = time.perf_counter() - start
+    return count / elapsed, len(pdf), pdf.count(b"/Type /Page\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF report rendering")
+    parser.add_argument("--seconds", type=float, default=3.0, help="time spent on each case")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print(f"{'case':<16}{'pages':>8}{'reports/s':>12}{'ms/report':>12}{'bytes':>12}")
+    print("=" * 70)
+
+    for name, report in (("short", SHORT_REPORT), ("long", LONG_REPORT)):
+        for language in ("en", "hi"):
+            rate, size, pages = measure(report, language, args.seconds)
+            print(f"{name + ' / ' + language:<16}{pages:>8}{rate:>12.1f}{1000 / rate:>12.2f}{size:>12,}")
+
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure model cold-start time with and without the cached normalized artifact
+
+Runs load_inference() in fresh processes: first with an empty cache directory
+(fallback loader + cache write), then again (direct load from the cache).
+
+Usage:
+    python benchmark_startup.py [--runs 3]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = (
+    "import json, model_loader;"
+    "model_loader.load_inference();"
+    "print('STARTUP_TIMINGS=' + json.dumps(model_loader.STARTUP_TIMINGS))"
+)
+
+
+def run_once(cache_dir):
+    env = dict(os.environ, MODEL_CACHE_DIR=cache_dir, MODEL_CACHE_ENABLED="true")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP_TIMINGS="):
+            return wall, json.loads(line.split("=", 1)[1])
+    raise RuntimeError(f"Child failed:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model cold-start time")
+    parser.add_argument("--runs", type=int, default=3, help="warm (cached) runs to average")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="fasalrakshak-model-cache-")
+    try:
+        print("\n" + "=" * 70)
+        print("[*] Cold start (empty cache, fallback loader + cache write)")
+        cold_wall, cold = run_once(cache_dir)
+        print(f"    process: {cold_wall:.2f}s  timings: {cold}")
+
+        print(f"[*] Warm start x{args.runs} (load from cached artifact)")
+        warm_walls = []
+        warm = {}
+        for _ in range(args.runs):
+            wall, warm = run_once(cache_dir)
+            warm_walls.append(wall)
+            print(f"    process: {wall:.2f}s  timings: {warm}")
+
+        print("=" * 70)
+        print(f"{'':<12}{'process s':>12}{'model load s':>15}{'total s':>10}")
+        print(f"{'fallback':<12}{cold_wall:>12.2f}{cold.get('model_load_s', 0):>15.2f}{cold.get('total_s', 0):>10.2f}")
+        print(f"{'cached':<12}{sum(warm_walls) / len(warm_walls):>12.2f}"
+              f"{warm.get('model_load_s', 0):>15.2f}{warm.get('total_s', 0):>10.2f}")
+        print("=" * 70 + "\n")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-token: /api/chat/gemini vs /api/chat/gemini/stream
+
+Both endpoints run against a local fake streaming provider (no Gemini key
+needed), so the numbers show what the client waits for before it can render
+anything, not upstream variance.
+
+Usage:
+    python benchmark_streaming.py [--requests 20] [--first-token-ms 400]
+                                  [--token-ms 30] [--words 120]
+"""
+import argparse
+import time
+
+import numpy as np
+from flask import Flask
+
+import gemini_service
+from routes.chat import chat_bp
+from utils.llm_client import LLMClient, FakeTransport
+from utils.llm_providers import LLMProvider
+
+
+def time_request(client, path, payload, streaming):
+    """Return (time to first body byte in ms, total time in ms)"""
+    start = time.perf_counter()
+    response = client.post(path, json=payload, buffered=False)
+    first = None
+    for chunk in response.response:
+        if first is None and (not streaming or b"event: token" in chunk):
+            first = time.perf_counter()
+    total = time.perf_counter()
+    response.close()
+    first = first or total
+    return (first - start) * 1000, (total - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming chat time-to-first-token")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--first-token-ms", type=float, default=400.0, help="fake upstream latency to first token")
+    parser.add_argument("--token-ms", type=float, default=30.0, help="fake upstream latency per following word")
+    parser.add_argument("--words", type=int, default=120, help="words in each fake reply")
+    args = parser.parse_args()
+
+    reply = " ".join(f"word{i}" for i in range(args.words))
+    gemini_service.chat_provider = LLMProvider("fake", LLMClient(FakeTransport(
+        response=reply,
+        latency=args.first_token_ms / 1000,
+        token_latency=args.token_ms / 1000,
+    )))
+
+    app = Flask(__name__)
+    app.register_blueprint(chat_bp)
+    client = app.test_client()
+    payload = {"email": "benchmark@example.com", "message": "How do I treat late blight?"}
+
+    print("\n" + "=" * 70)
+    print(f"Fake provider: first token {args.first_token_ms:.0f}ms, "
+          f"{args.token_ms:.0f}ms/word, {args.words} words, {args.requests} requests")
+    print("=" * 70)
+    print(f"{'endpoint':<26}{'TTFT p50':>10}{'TTFT p95':>10}{'total p50':>11}{'total p95':>11}")
+
+    for path, streaming in (("/api/chat/gemini", False), ("/api/chat/gemini/stream", True)):
+        ttft, totals = [], []
+        for _ in range(args.requests):
+            first_ms, total_ms = time_request(client, path, payload, streaming)
+            ttft.append(first_ms)
+            totals.append(total_ms)
+        print(f"{path:<26}{np.percentile(ttft, 50):>10.0f}{np.percentile(ttft, 95):>10.0f}"
+              f"{np.percentile(totals, 50):>11.0f}{np.percentile(totals, 95):>11.0f}")
+
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Stage-level microbenchmarks with baseline regression gating
+
+Times each hot function on its own and compares the median against a
+stored baseline; exits with status 1 when any stage is slower than the
+baseline by more than --threshold (default 25%).
+
+Stages:
+    decode_resize       preprocess_image() on a synthetic 1600x1200 JPEG
+    prepare_batch       the array work before the model call in /predict
+                        (the 1/255 rescaling runs inside the serving graph,
+                        so it is part of the forward_* stages)
+    forward_b1/b8/b32   compiled forward pass at batch sizes 1, 8 and 32
+    clean_dtype_policy  json.loads + clean_dtype_policy_recursive() on the model config
+    normalize_report    gemini_service.normalize_report()
+    generate_pdf        generate_pdf_report() of a typical report, in memory
+
+Runs offline on a CPU-only box. When models/MobileNetV2_best.h5 is absent,
+the forward passes use a tiny stand-in model with the same input/output
+shape and the config stage uses an untrained MobileNetV2 config; forward
+stages are only compared against a baseline taken with the same model and
+TensorFlow version. Each stage is timed in several rounds and the fastest
+round's median counts, to keep shared-CPU noise out of the gate.
+
+Timings only mean something against a baseline from the same kind of
+machine (architecture, CPU count, Python minor version and TensorFlow
+version), so no baseline is committed: record one on the runner that gates
+(e.g. from the main branch) with --update-baseline. Without a baseline for
+this machine the suite prints its timings and exits with status 2.
+
+Usage:
+    python benchmark_suite.py [--stages decode_resize,forward_b8] [--threshold 0.25]
+                              [--min-time 1.0] [--rounds 3] [--baseline benchmark_baseline.json]
+                              [--output benchmark_results.json]
+    python benchmark_suite.py --update-baseline     # record this machine's baseline
+"""
+import os
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')  # CPU only
+
+import argparse
+import copy
+import importlib.metadata
+import io
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from utils.model_version import MODEL_PATH
+
+BASELINE_PATH = "benchmark_baseline.json"
+NUM_CLASSES = 38
+
+STAGES = (
+    "decode_resize", "prepare_batch", "forward_b1", "forward_b8", "forward_b32",
+    "clean_dtype_policy", "normalize_report", "generate_pdf",
+)
+MODEL_STAGES = {"forward_b1", "forward_b8", "forward_b32"}
+
+
+# ================================
+# FIXTURES
+# ================================
+def synthetic_jpeg(width=1600, height=1200):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+_model = None
+
+
+def get_model():
+    """(model, model id): the real model when present, else a tiny stand-in"""
+    global _model
+    if _model is None:
+        import tensorflow as tf
+
+        if os.path.exists(MODEL_PATH):
+            from model_loader import load_model_with_fallback
+            from utils.model_version import model_version
+            _model = (load_model_with_fallback(MODEL_PATH), f"{model_version('keras')}-tf{tf.__version__}")
+        else:
+            tf.random.set_seed(0)
+            model = tf.keras.Sequential([
+                tf.keras.Input(shape=(224, 224, 3)),
+                tf.keras.layers.Conv2D(16, 3, strides=2, activation="relu"),
+                tf.keras.layers.Conv2D(32, 3, strides=2, activation="relu"),
+                tf.keras.layers.GlobalAveragePooling2D(),
+                tf.keras.layers.Dense(NUM_CLASSES, activation="softmax"),
+            ])
+            _model = (model, f"stand-in-tf{tf.__version__}")
+    return _model
+
+
+def model_config_json():
+    """The H5's model_config as the loader sees it, or an untrained MobileNetV2's"""
+    if os.path.exists(MODEL_PATH):
+        import h5py
+        with h5py.File(MODEL_PATH, "r") as f:
+            config = f.attrs["model_config"]
+        return config.decode() if isinstance(config, bytes) else config
+
+    import tensorflow as tf
+    model = tf.keras.applications.MobileNetV2(input_shape=(224, 224, 3), weights=None, classes=NUM_CLASSES)
+    return model.to_json()
+
+
+# ================================
+# STAGES (each factory returns the callable to time)
+# ================================
+def stage_decode_resize():
+    from utils.preprocessing import preprocess_image
+    image_bytes = synthetic_jpeg()
+    return lambda: preprocess_image(image_bytes)
+
+
+def stage_prepare_batch():
+    import tensorflow as tf
+    from utils.preprocessing import preprocess_image
+    array = preprocess_image(synthetic_jpeg())
+    return lambda: tf.convert_to_tensor(np.expand_dims(array, axis=0), dtype=tf.uint8)
+
+
+def forward_stage(batch_size):
+    def factory():
+        from utils.inference import build_inference_fn
+        model, _ = get_model()
+        infer = build_inference_fn(model, mode="compiled")
+        batch = np.random.default_rng(0).integers(0, 256, (batch_size, 224, 224, 3), dtype=np.uint8)
+        return lambda: infer(batch)
+    return factory
+
+
+def stage_clean_dtype_policy():
+    from model_loader import clean_dtype_policy_recursive
+    config = model_config_json()
+    return lambda: clean_dtype_policy_recursive(json.loads(config))
+
+
+def stage_normalize_report():
+    from gemini_service import normalize_report
+    from benchmark_pdf import SHORT_REPORT
+    raw = dict(SHORT_REPORT["ai_report"], spread_risk="High")
+    return lambda: normalize_report(copy.deepcopy(raw), "Tomato", "Late blight")
+
+
+def stage_generate_pdf():
+    from benchmark_pdf import SHORT_REPORT
+    from utils.pdf_generator import generate_pdf_report
+
+    return lambda: generate_pdf_report(SHORT_REPORT, io.BytesIO(), language="en")
+
+
+STAGE_FACTORIES = {
+    "decode_resize": stage_decode_resize,
+    "prepare_batch": stage_prepare_batch,
+    "forward_b1": forward_stage(1),
+    "forward_b8": forward_stage(8),
+    "forward_b32": forward_stage(32),
+    "clean_dtype_policy": stage_clean_dtype_policy,
+    "normalize_report": stage_normalize_report,
+    "generate_pdf": stage_generate_pdf,
+}
+
+
+# ================================
+# MEASUREMENT AND GATING
+# ================================
+def measure(fn, min_time, rounds=3, min_runs=10, warmup=3):
+    """
+    Median and p90 in ms of the fastest of `rounds` rounds, each at least
+    min_runs calls and min_time seconds
+
+    Taking the best round keeps one noisy neighbour burst on a shared box
+    from failing the gate.
+    """
+    for _ in range(warmup):
+        fn()
+
+    best = None
+    for _ in range(rounds):
+        timings = []
+        start = time.perf_counter()
+        while len(timings) < min_runs or time.perf_counter() - start < min_time:
+            call_start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - call_start) * 1000)
+        timings = np.array(timings)
+        if best is None or np.median(timings) < np.median(best):
+            best = timings
+    return {
+        "median_ms": round(float(np.median(best)), 4),
+        "p90_ms": round(float(np.percentile(best, 90)), 4),
+        "runs": len(best),
+    }
+
+
+def tensorflow_version():
+    """Installed TensorFlow version, without importing it"""
+    for distribution in ("tensorflow", "tensorflow-cpu"):
+        try:
+            return importlib.metadata.version(distribution)
+        except importlib.metadata.PackageNotFoundError:
+            pass
+    return None
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "tensorflow": tensorflow_version(),
+    }
+
+
+def same_machine(recorded, current):
+    """True when timings from `recorded` can gate a run on `current` (patch releases don't count)"""
+    def key(machine):
+        python = ".".join(str(machine.get("python", "")).split(".")[:2])
+        return python, machine.get("machine"), machine.get("cpus"), machine.get("tensorflow")
+    return bool(recorded) and key(recorded) == key(current)
+
+
+def compare(stage, result, baseline_stage, threshold):
+    """(status, change) of one stage against its baseline entry"""
+    if baseline_stage is None:
+        return "new", None
+    if stage in MODEL_STAGES and baseline_stage.get("model") != result.get("model"):
+        return "skipped (other model)", None
+    change = result["median_ms"] / baseline_stage["median_ms"] - 1
+    return ("SLOWER" if change > threshold else "ok"), change
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage microbenchmarks with baseline regression gating")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per timing round")
+    parser.add_argument("--rounds", type=int, default=3, help="timing rounds per stage; the fastest counts")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    # Timings from another machine are shown, never gated on
+    gated = same_machine(baseline.get("machine"), machine_info())
+    if args.update_baseline:
+        previous, baseline = (baseline if gated else {}), {}
+
+    print("\n" + "=" * 70)
+    print(f"{'stage':<20}{'median ms':>11}{'p90 ms':>10}{'baseline':>10}{'change':>9}  status")
+    print("=" * 70)
+
+    results = {}
+    regressions = []
+    for stage in stages:
+        result = measure(STAGE_FACTORIES[stage](), args.min_time, rounds=args.rounds)
+        if stage in MODEL_STAGES:
+            result["model"] = get_model()[1]
+        results[stage] = result
+
+        baseline_stage = baseline.get("stages", {}).get(stage)
+        status, change = compare(stage, result, baseline_stage, args.threshold)
+        if status == "SLOWER":
+            regressions.append(stage)
+            if not gated:
+                status = "slower (not gated)"
+        baseline_ms = f"{baseline_stage['median_ms']:.3f}" if baseline_stage else "-"
+        change_text = f"{change:+.0%}" if change is not None else ""
+        print(f"{stage:<20}{result['median_ms']:>11.3f}{result['p90_ms']:>10.3f}"
+              f"{baseline_ms:>10}{change_text:>9}  {status}")
+    print("=" * 70)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "stages": results,
+    }
+    if args.update_baseline:
+        # Keep this machine's entries for stages that were not re-run
+        report["stages"] = dict(previous.get("stages", {}), **results)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[+] Baseline written to {args.baseline}\n")
+        return
+
+    with open(args.output, "w") as f:
+        json.dump(dict(report, baseline=args.baseline, threshold=args.threshold,
+                       regressions=regressions, gated=gated), f, indent=2)
+    print(f"[+] Results written to {args.output}")
+
+    if not gated:
+        if baseline:
+            print(f"[!] {args.baseline} was recorded on {baseline.get('machine')}, this is {report['machine']}")
+        else:
+            print(f"[!] No baseline at {args.baseline}")
+        print("[!] NOT GATED: record a baseline on this machine with --update-baseline\n")
+        sys.exit(2)
+    if regressions:
+        print(f"[!] Slower than baseline by more than {args.threshold:.0%}: {', '.join(regressions)}\n")
+        sys.exit(1)
+    print(f"[+] No stage slower than baseline by more than {args.threshold:.0%}\n")
+
+
+if __name__ == "__main__":
+    main()
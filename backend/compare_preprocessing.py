@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Compare the fast (reduced-resolution JPEG decode) preprocessing path with
+the original full-size decode + resize
+
+Reports per-image time, the size of the largest decoded buffer, and how far
+the fast path's 224x224 output is from the original (PSNR / mean abs diff).
+
+Usage:
+    python compare_preprocessing.py [--images path/to/photos] [--count 20]
+
+Without --images, synthetic 12 MP leaf-like JPEGs are generated.
+"""
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from utils.preprocessing import decode_image, IMAGE_SIZE
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def synthetic_photo(seed, size=(4000, 3000)):
+    """A phone-sized JPEG with smooth background, leaf blobs, spots and sensor noise"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+
+    image = Image.new("RGB", size, tuple(int(v) for v in rng.integers(60, 140, 3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        rx, ry = rng.integers(300, 1200, 2)
+        green = (int(rng.integers(30, 90)), int(rng.integers(110, 200)), int(rng.integers(20, 80)))
+        draw.ellipse([x - rx, y - ry, x + rx, y + ry], fill=green)
+    for _ in range(300):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        r = int(rng.integers(5, 40))
+        draw.ellipse([x - r, y - r, x + r, y + r], fill=(int(rng.integers(80, 140)), 60, 30))
+    image = image.filter(ImageFilter.GaussianBlur(2))
+
+    pixels = np.asarray(image, dtype=np.int16) + rng.integers(-8, 9, (height, width, 3))
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def load_samples(images_dir, count):
+    if images_dir:
+        paths = sorted(
+            os.path.join(root, f)
+            for root, _, files in os.walk(images_dir)
+            for f in files if f.lower().endswith(IMAGE_EXTENSIONS)
+        )[:count]
+        samples = []
+        for path in paths:
+            with open(path, "rb") as f:
+                samples.append(f.read())
+        return samples
+    print(f"[*] Generating {count} synthetic 12 MP JPEGs...")
+    return [synthetic_photo(seed) for seed in range(count)]
+
+
+def decoded_buffer_mb(image_bytes, fast):
+    """Size of the largest buffer the decoder materializes"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if fast and image.format == "JPEG":
+        image.draft("RGB", IMAGE_SIZE)
+    width, height = image.size
+    return width * height * 3 / (1024 * 1024)
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare preprocessing paths")
+    parser.add_argument("--images", help="directory of sample photos")
+    parser.add_argument("--count", type=int, default=20)
+    args = parser.parse_args()
+
+    samples = load_samples(args.images, args.count)
+    if not samples:
+        print("[!] No images found")
+        exit(1)
+
+    results = {"original": [], "fast": []}
+    psnrs = []
+    diffs = []
+    for image_bytes in samples:
+        outputs = {}
+        for name, fast in (("original", False), ("fast", True)):
+            start = time.perf_counter()
+            outputs[name] = np.asarray(decode_image(image_bytes, fast=fast))
+            elapsed = (time.perf_counter() - start) * 1000
+            results[name].append((elapsed, decoded_buffer_mb(image_bytes, fast)))
+        psnrs.append(psnr(outputs["original"], outputs["fast"]))
+        diffs.append(float(np.mean(np.abs(outputs["original"].astype(np.float64) - outputs["fast"]))) / 255.0)
+
+    print("\n" + "=" * 70)
+    print(f"{len(samples)} images -> {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]}")
+    print("=" * 70)
+    print(f"{'path':<10}{'mean ms':>10}{'p95 ms':>10}{'decoded buffer MB':>20}")
+    for name, rows in results.items():
+        timings = np.array([r[0] for r in rows])
+        buffers = np.array([r[1] for r in rows])
+        print(f"{name:<10}{timings.mean():>10.2f}{np.percentile(timings, 95):>10.2f}{buffers.mean():>20.2f}")
+    print("-" * 70)
+    finite = [p for p in psnrs if np.isfinite(p)]
+    print(f"PSNR fast vs original: mean {np.mean(finite) if finite else float('inf'):.2f} dB, "
+          f"min {min(psnrs):.2f} dB")
+    print(f"Mean abs diff (0-1 scale): {np.mean(diffs):.4f}")
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Shared pytest fixtures for the prediction routes
+"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+class StandInModel:
+    """Predicts `predicted_index` for every image and records the batch sizes it saw"""
+
+    def __init__(self, num_classes, predicted_index=0):
+        self.num_classes = num_classes
+        self.predicted_index = predicted_index
+        self.batches = []
+
+    def __call__(self, images):
+        self.batches.append(len(images))
+        probabilities = np.zeros((len(images), self.num_classes), dtype=np.float32)
+        probabilities[:, self.predicted_index] = 1.0
+        return probabilities
+
+
+@pytest.fixture
+def make_png():
+    """make_png(color) -> bytes of a small PNG upload"""
+    def make(color):
+        buffer = io.BytesIO()
+        Image.new("RGB", (32, 32), color).save(buffer, format="PNG")
+        return buffer.getvalue()
+    return make
+
+
+@pytest.fixture
+def stand_in_model(monkeypatch):
+    """
+    Serve app.py's prediction routes from a StandInModel, without TensorFlow
+
+    The prediction cache is off; tests that need it set app.prediction_cache.
+    The model's loaded version is stand_in_model.startup_timings["model_version"].
+    """
+    import app as backend
+
+    model = StandInModel(len(backend.class_names))
+    model.startup_timings = {"model_version": "keras-standin"}
+    monkeypatch.setattr(backend, "MODEL_LOADING", "lazy")
+    monkeypatch.setattr(backend, "_inference_ready", True)
+    monkeypatch.setattr(backend, "infer", model)
+    monkeypatch.setattr(backend, "batcher", None)
+    monkeypatch.setattr(backend, "inference_client", None)
+    monkeypatch.setattr(backend, "startup_timings", model.startup_timings)
+    monkeypatch.setattr(backend, "prediction_cache", None)
+    monkeypatch.setattr(backend, "_cache_model_version", None)
+    return model
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Produce float16 and full-integer (INT8) quantized TFLite variants of
+MobileNetV2_best.h5 and report their parity with the float model
+
+Calibration images are read from the same directory layout that
+ML model/train_model.py trains on (one sub-folder per class):
+
+    dataset/train/Apple___Apple_scab/*.jpg
+    dataset/train/Apple___Black_rot/*.jpg
+    ...
+
+Usage:
+    python convert_quantized.py [--data-dir "../ML model/dataset/train"]
+                                [--eval-dir "../ML model/dataset/val"]
+                                [--calib-samples 200] [--eval-samples 200]
+
+Serve a variant with MODEL_VARIANT=float16 or MODEL_VARIANT=int8.
+"""
+import os
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from model_loader import load_model_with_fallback
+from utils.inference import build_inference_fn, build_tflite_inference_fn, TFLITE_VARIANTS
+from utils.model_version import MODEL_PATH
+
+REPORT_PATH = "models/quantization_report.json"
+DEFAULT_DATA_DIR = "../ML model/dataset/train"
+DEFAULT_EVAL_DIR = "../ML model/dataset/val"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def list_images(data_dir):
+    """Return {class_dir: [image paths]} for a flow_from_directory layout"""
+    classes = {}
+    for class_name in sorted(os.listdir(data_dir)):
+        class_dir = os.path.join(data_dir, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        files = sorted(
+            os.path.join(class_dir, f) for f in os.listdir(class_dir)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if files:
+            classes[class_name] = files
+    return classes
+
+
+def sample_images(classes, count, seed=42, exclude=()):
+    """Pick up to `count` images round-robin across classes so every class is represented"""
+    rng = random.Random(seed)
+    excluded = set(exclude)
+    pools = {name: [f for f in files if f not in excluded] for name, files in classes.items()}
+    for files in pools.values():
+        rng.shuffle(files)
+
+    picked = []
+    while len(picked) < count and any(pools.values()):
+        for files in pools.values():
+            if files and len(picked) < count:
+                picked.append(files.pop())
+    return picked
+
+
+def load_image(path, size):
+    """Same preprocessing as /predict: RGB, resize, uint8 pixels"""
+    image = Image.open(path).convert("RGB").resize(size)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def convert(model, variant, calibration):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if variant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        def representative_dataset():
+            # The converted model takes [0, 1] floats; rescaling is done by the runner
+            for image in calibration:
+                yield [(image[np.newaxis, ...] / 255.0).astype(np.float32)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+
+    return converter.convert()
+
+
+def evaluate(infer, images, reference_top1):
+    """Return (top-1 agreement with the float model, mean/p95 batch-1 latency in ms)"""
+    infer(images[:1])  # warm up
+
+    predictions = []
+    timings = []
+    for image in images:
+        start = time.perf_counter()
+        output = infer(image[np.newaxis, ...])
+        timings.append((time.perf_counter() - start) * 1000)
+        predictions.append(int(np.argmax(output[0])))
+
+    agreement = float(np.mean(np.array(predictions) == reference_top1)) if reference_top1 is not None else 1.0
+    return agreement, float(np.mean(timings)), float(np.percentile(timings, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build quantized TFLite model variants")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="training layout used for calibration")
+    parser.add_argument("--eval-dir", default=DEFAULT_EVAL_DIR, help="images used for the parity report")
+    parser.add_argument("--calib-samples", type=int, default=200)
+    parser.add_argument("--eval-samples", type=int, default=200)
+    parser.add_argument("--variants", nargs="+", default=list(TFLITE_VARIANTS), choices=list(TFLITE_VARIANTS))
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("[*] BUILDING QUANTIZED MODEL VARIANTS")
+    print("=" * 70)
+
+    if not os.path.exists(args.model):
+        print(f"[!] Model not found at {args.model}")
+        exit(1)
+    if not os.path.isdir(args.data_dir):
+        print(f"[!] Calibration directory not found at {args.data_dir}")
+        print("    Expected one sub-folder of images per class, as used by train_model.py")
+        exit(1)
+
+    # The H5 needs the loader's dtype-policy cleanup; plain load_model() fails on it
+    model = load_model_with_fallback(args.model)
+    size = tuple(model.input_shape[1:3])
+    print(f"[+] Loaded {args.model} (input {model.input_shape})")
+
+    # Calibration sample
+    train_classes = list_images(args.data_dir)
+    calib_paths = sample_images(train_classes, args.calib_samples)
+    calibration = [load_image(p, size) for p in calib_paths]
+    print(f"[+] Calibration: {len(calibration)} images from {len(train_classes)} classes")
+
+    # Evaluation sample (held out from calibration when reusing the train dir)
+    if os.path.isdir(args.eval_dir):
+        eval_paths = sample_images(list_images(args.eval_dir), args.eval_samples, seed=7)
+    else:
+        print(f"[*] {args.eval_dir} not found - holding out images from {args.data_dir}")
+        eval_paths = sample_images(train_classes, args.eval_samples, seed=7, exclude=calib_paths)
+    eval_images = np.stack([load_image(p, size) for p in eval_paths]) if eval_paths else np.stack(calibration)
+    print(f"[+] Evaluation: {len(eval_images)} images")
+
+    # Float reference
+    float_infer = build_inference_fn(model, "compiled")
+    reference_top1 = np.argmax(float_infer(eval_images), axis=1)
+    _, float_mean, float_p95 = evaluate(float_infer, eval_images, reference_top1)
+
+    results = {
+        "keras": {
+            "path": args.model,
+            "size_mb": round(os.path.getsize(args.model) / (1024 * 1024), 2),
+            "top1_agreement": 1.0,
+            "latency_ms_mean": round(float_mean, 2),
+            "latency_ms_p95": round(float_p95, 2),
+        }
+    }
+
+    for variant in args.variants:
+        out_path = TFLITE_VARIANTS[variant]
+        print(f"\n[*] Converting {variant} -> {out_path}")
+        try:
+            tflite_bytes = convert(model, variant, calibration)
+        except Exception as e:
+            print(f"[!] {variant} conversion failed: {e}")
+            continue
+
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "wb") as f:
+            f.write(tflite_bytes)
+
+        agreement, mean_ms, p95_ms = evaluate(build_tflite_inference_fn(out_path), eval_images, reference_top1)
+        results[variant] = {
+            "path": out_path,
+            "size_mb": round(len(tflite_bytes) / (1024 * 1024), 2),
+            "top1_agreement": round(agreement, 4),
+            "latency_ms_mean": round(mean_ms, 2),
+            "latency_ms_p95": round(p95_ms, 2),
+        }
+        print(f"[+] {variant} saved")
+
+    print("\n" + "=" * 70)
+    print(f"{'variant':<10}{'size MB':>10}{'top-1 agree':>14}{'mean ms':>10}{'p95 ms':>10}")
+    for variant, r in results.items():
+        print(f"{variant:<10}{r['size_mb']:>10.2f}{r['top1_agreement'] * 100:>13.1f}%"
+              f"{r['latency_ms_mean']:>10.2f}{r['latency_ms_p95']:>10.2f}")
+    print("=" * 70)
+
+    with open(REPORT_PATH, "w") as f:
+        json.dump({
+            "tensorflow": tf.__version__,
+            "calibration_samples": len(calibration),
+            "evaluation_samples": len(eval_images),
+            "variants": results,
+        }, f, indent=2)
+    print(f"[+] Report written to {REPORT_PATH}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,35 @@
 """
 Gemini AI Service for Plant Disease Report Generation
 (PRODUCTION SAFE VERSION)
+
+Chat and reports each go through an LLM provider (see utils/llm_providers.py):
+Gemini, a deterministic local stand-in, or offline templates.
+
+Reports say where they came from: "source" is the provider name,
+"fallback" for the generic report served when the provider failed, or
+"store" for a precomputed report (routes/disease_report.py), and
+"language" is the language the report is actually written in (the local
+and offline providers write English only).
+
+Settings (environment variables):
+    LLM_PROVIDER        - provider for every route: gemini, gemini:<model>, local
+                          or offline (default gemini; offline templates are only
+                          served when asked for explicitly)
+    LLM_PROVIDER_CHAT   - provider for /api/chat/gemini(/stream) (default LLM_PROVIDER)
+    LLM_PROVIDER_REPORT - provider for disease reports (default LLM_PROVIDER)
+    REPORT_CACHE_SIZE   - reports kept in the per-worker cache (default 256)
+    REPORT_CACHE_TTL    - seconds a generated report is reused (default 3600)
 """
 
 import os
-import json
-import re
+import copy
+import logging
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from utils.cache import MemoryCache
+from utils.class_names import split_class_name
+from utils.llm_providers import get_provider
+from utils.single_flight import SingleFlight
 
 # =========================
 # Load Environment Variables
@@ -16,17 +38,24 @@ load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if not GEMINI_API_KEY:
-    raise RuntimeError(
-        "❌ GEMINI_API_KEY not found.\n"
-        "👉 Add GEMINI_API_KEY in backend/.env file"
-    )
+log = logging.getLogger(__name__)
 
 # =========================
-# Initialize Gemini (STABLE)
+# LLM Providers (per route)
 # =========================
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-2.5-flash")
+# Gemini providers call through a resilient client (per-call deadline,
+# bounded concurrency, retries, circuit breaker) and configure the SDK on
+# first use, so a slow or failing upstream can't hold worker threads
+LLM_PROVIDER = os.getenv("LLM_PROVIDER") or "gemini"
+LLM_PROVIDER_CHAT = os.getenv("LLM_PROVIDER_CHAT") or LLM_PROVIDER
+LLM_PROVIDER_REPORT = os.getenv("LLM_PROVIDER_REPORT") or LLM_PROVIDER
+
+if not GEMINI_API_KEY and "gemini" in (LLM_PROVIDER_CHAT + LLM_PROVIDER_REPORT):
+    log.warning("GEMINI_API_KEY not found - Gemini calls will fail until it is set in backend/.env "
+                "(or set LLM_PROVIDER=offline for template answers)")
+
+chat_provider = get_provider(LLM_PROVIDER_CHAT, api_key=GEMINI_API_KEY)
+report_provider = get_provider(LLM_PROVIDER_REPORT, api_key=GEMINI_API_KEY)
 
 # =====================================================
 # NORMALIZATION (CRITICAL – NEVER REMOVE)
@@ -70,62 +99,103 @@ def normalize_report(report: dict, crop: str, disease: str) -> dict:
     }
 
 # =====================================================
-# MAIN DISEASE REPORT GENERATOR (STRICT JSON)
+# REPORT CACHE + REQUEST COALESCING
 # =====================================================
-def generate_disease_report(crop_name: str, disease_name: str) -> dict:
-    """
-    Generate complete disease report using Gemini Flash
-    """
+# During an outbreak many users ask for the same report within seconds:
+# concurrent requests for one (crop, disease, language) share a single
+# provider call, and successful reports are reused until the TTL expires.
+# Fallback reports are never cached, so the next request retries.
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", 256))
+REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", 3600))
 
-    prompt = f"""
-You are an expert agricultural scientist and senior government crop advisor.
+_report_cache = MemoryCache(max_entries=REPORT_CACHE_SIZE, ttl_seconds=REPORT_CACHE_TTL, name="report")
+_report_flight = SingleFlight()
 
-Generate an ACCURATE and COMPLETE plant disease report for a farmer.
 
-MANDATORY RULES:
-1. Respond ONLY in valid JSON format
-2. NO markdown, NO explanations, NO extra text
-3. EVERY field MUST be filled
-4. Severity must be Low, Medium, or High
-5. All arrays must have at least 3 items
+def report_cache_stats() -> dict:
+    """Cache hit/miss, coalesced-call and provider latency counts for the report generator"""
+    return {
+        "cache": _report_cache.stats(),
+        "single_flight": _report_flight.stats(),
+        "provider": report_provider.stats(),
+    }
 
-Crop Name: {crop_name}
-Disease Name: {disease_name}
 
-Return this JSON structure exactly.
-"""
+def chat_source() -> str:
+    """Name of the chat provider, returned with chat replies"""
+    return chat_provider.name
 
-    try:
-        print("📌 Sending prompt to Gemini...")
 
-        response = model.generate_content(prompt)
+def chat_provider_stats() -> dict:
+    """Latency and upstream counts of the chat provider"""
+    return chat_provider.stats()
 
-        raw_text = response.text.strip() if response.text else None
+# =====================================================
+# MAIN DISEASE REPORT GENERATOR (STRICT JSON)
+# =====================================================
+def generate_disease_report(crop_name: str, disease_name: str, language: str = "en") -> dict:
+    """
+    Generate complete disease report with the report provider
 
-        if not raw_text:
-            raise ValueError("Empty Gemini response")
+    Served from the report cache when possible; concurrent callers for the
+    same report share one provider call. Falls back to a generic report when
+    the provider fails.
+    """
+    key = (report_provider.name, crop_name, disease_name, language)
 
-        match = re.search(r"\{[\s\S]*\}", raw_text)
-        if not match:
-            raise ValueError("No valid JSON found")
+    cached = _report_cache.get(key)
+    if cached is not None:
+        return copy.deepcopy(cached)
 
-        parsed_report = json.loads(match.group())
+    def generate():
+        report = _request_disease_report(crop_name, disease_name, language)
+        report.update(source=report_provider.name, language=report_provider.report_language(language))
+        _report_cache.set(key, report)
+        return report
 
-        print("✅ Gemini disease report generated")
-        return normalize_report(parsed_report, crop_name, disease_name)
+    try:
+        return copy.deepcopy(_report_flight.do(key, generate))
 
     except Exception as e:
-        print(f"❌ Gemini generation failed: {e}")
-        print("⚠️ Using fallback report")
+        log.error("Report generation failed (%s), using fallback report: %s", report_provider.name, e)
+
+        return dict(normalize_report({}, crop_name, disease_name), source="fallback", language="en")
+
+
+def _request_disease_report(crop_name: str, disease_name: str, language: str) -> dict:
+    """Ask the report provider for a report and normalize it (raises on any failure)"""
+    parsed_report = report_provider.report(crop_name, disease_name, language)
+    log.info("Disease report generated (%s)", report_provider.name)
+    return normalize_report(parsed_report, crop_name, disease_name)
+
+
+def generate_class_report(full_name: str) -> dict:
+    """
+    Generate the report for a "Crop___Disease" label, bypassing the cache (used by the report store)
+
+    Raises with a local or offline report provider, so the store never
+    replaces LLM-written reports with stand-in text.
+    """
+    if report_provider.deterministic:
+        raise RuntimeError(f"Report provider '{report_provider.name}' does not write reports for the store")
+    crop_name, disease_name = split_class_name(full_name)
+    return _request_disease_report(crop_name, disease_name, "en")
 
-        return normalize_report({}, crop_name, disease_name)
+
+def fallback_class_report(full_name: str) -> dict:
+    """The report generate_class_report() returns when Gemini fails"""
+    return normalize_report({}, *split_class_name(full_name))
 
 # =====================================================
 # SIMPLE GENERATOR (REQUIRED BY app.py)
 # =====================================================
 def generate_with_fallback(prompt: str) -> str:
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip() if response.text else "AI response unavailable."
+        return chat_provider.generate(prompt) or "AI response unavailable."
     except Exception as e:
-        return f"Gemini Error: {str(e)}"
+        return f"{chat_provider.name} error: {str(e)}"
+
+
+def stream_generate(prompt: str):
+    """Yield the chat provider's response for a prompt chunk by chunk (raises on failure)"""
+    return chat_provider.stream(prompt)
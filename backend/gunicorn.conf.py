@@ -0,0 +1,68 @@
+"""
+Gunicorn configuration for FasalRakshak
+(picked up automatically by `gunicorn app:app` from the backend directory)
+
+When INFERENCE_SOCKET is set, the master starts inference_server.py before
+forking web workers and restarts it if it exits, so all workers share one
+model process. Without INFERENCE_SOCKET every worker loads its own model as
+before.
+
+Importing utils.metrics here starts a metrics run in the master that the
+workers inherit, so /metrics counts only this server's processes.
+Snapshots of earlier runs are deleted before the workers start.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from utils import metrics
+
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET")
+RESTART_DELAY_SECONDS = 1.0
+
+_inference_process = None
+_stopping = threading.Event()
+
+
+def _start_inference_server(server):
+    global _inference_process
+    _inference_process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "inference_server.py")],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    server.log.info("Started inference server (pid %s) on %s", _inference_process.pid, INFERENCE_SOCKET)
+
+
+def _supervise_inference_server(server):
+    """Restart the inference process if it dies; workers reconnect on their own"""
+    while not _stopping.is_set():
+        if _inference_process.poll() is not None:
+            server.log.warning(
+                "Inference server exited with code %s, restarting", _inference_process.returncode
+            )
+            time.sleep(RESTART_DELAY_SECONDS)
+            if not _stopping.is_set():
+                _start_inference_server(server)
+        _stopping.wait(1.0)
+
+
+def on_starting(server):
+    metrics.clear_snapshots()
+    if not INFERENCE_SOCKET:
+        return
+    _start_inference_server(server)
+    threading.Thread(
+        target=_supervise_inference_server, args=(server,), name="inference-supervisor", daemon=True
+    ).start()
+
+
+def on_exit(server):
+    _stopping.set()
+    if _inference_process is not None and _inference_process.poll() is None:
+        _inference_process.terminate()
+        try:
+            _inference_process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _inference_process.kill()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Shared Inference Server for FasalRakshak
+
+One dedicated process owns the model; gunicorn web workers (started with the
+same INFERENCE_SOCKET) send preprocessed tensors to it over a Unix socket.
+Requests from all workers go through one MicroBatcher, so scaling HTTP
+workers neither multiplies model memory nor splits batches.
+
+Usage:
+    INFERENCE_SOCKET=/tmp/fasalrakshak-inference.sock python inference_server.py
+
+gunicorn.conf.py starts and supervises this process automatically when
+INFERENCE_SOCKET is set.
+"""
+import logging
+import os
+import signal
+import socketserver
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Model loading reports through logging
+from utils import logging_setup
+logging_setup.configure_logging()
+
+from model_loader import load_inference, STARTUP_TIMINGS
+from utils.batching import MicroBatcher, BATCHING_ENABLED
+from utils.inference_client import INFERENCE_SOCKET, send_message, recv_message
+
+log = logging.getLogger(__name__)
+
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    """Serve requests on one persistent worker connection until it closes"""
+
+    def handle(self):
+        while True:
+            try:
+                header, array = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return  # the worker closed the connection
+
+            # Any failure to produce a result (including the batcher's
+            # TimeoutError, an OSError) is answered with an error frame, so the
+            # worker never mistakes it for a server restart and resends the work
+            try:
+                reply = self.reply(header, array)
+            except Exception as e:
+                reply = ({"error": str(e)},)
+
+            try:
+                send_message(self.request, *reply)
+            except (ConnectionError, OSError):
+                return
+
+    def reply(self, header, array):
+        """(header, array or None) to send back for one request"""
+        op = header.get("op", "predict")
+        if op == "stats":
+            return {"stats": self.server.stats()}, None
+        if op == "predict":
+            return {"model_version": STARTUP_TIMINGS.get("model_version")}, self.server.predict(array)
+        return {"error": f"Unknown op '{op}'"}, None
+
+
+class InferenceServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, infer):
+        self.infer = infer
+        self.batcher = MicroBatcher(infer) if BATCHING_ENABLED else None
+        super().__init__(socket_path, InferenceRequestHandler)
+
+    def predict(self, array):
+        if self.batcher is not None:
+            return self.batcher.submit(array)
+        return self.infer(array)
+
+    def stats(self):
+        stats = self.batcher.stats() if self.batcher is not None else {"enabled": False}
+        stats["startup"] = STARTUP_TIMINGS
+        return stats
+
+
+def main():
+    socket_path = INFERENCE_SOCKET
+    if not socket_path:
+        log.error("Set INFERENCE_SOCKET to the Unix socket path to serve on")
+        sys.exit(1)
+
+    log.info("FasalRakshak inference server starting (pid %d)", os.getpid())
+
+    _, infer = load_inference()
+    if infer is None:
+        log.error("No model available, inference server not started")
+        sys.exit(1)
+
+    # Remove a stale socket left behind by a previous run
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = InferenceServer(socket_path, infer)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    log.info("Inference server listening on %s", socket_path)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+HTTP load test: requests/second and tail latency per endpoint
+
+Drives each scenario at a fixed concurrency for a fixed time over real HTTP
+and writes requests/s and p50/p95/p99 latency to a JSON results file.
+Gemini is replaced by the deterministic "local" LLM provider with
+configurable latency, so no API key or quota is needed and results don't
+depend on upstream variance.
+
+Scenarios:
+    predict          /predict with the same photo (prediction cache hits)
+    predict_unique   /predict with a distinct photo every request (decode + inference)
+    disease_report   /api/disease-report cycling through the model's classes
+    chat             /api/chat/gemini
+    download_report  /api/download-report with distinct content (PDF render)
+
+By default a local server with the fake provider is started on --port.
+To load a production-like setup instead, start it yourself and pass --url:
+
+    LLM_PROVIDER=local LLM_LOCAL_LATENCY_MS=800 gunicorn -w 4 app:app
+    python load_test.py --url http://127.0.0.1:8000
+
+Usage:
+    python load_test.py [--concurrency 8] [--duration 20] [--scenarios predict,chat]
+                        [--gemini-latency-ms 800] [--image-size 1600x1200]
+                        [--output load_test_results.json]
+"""
+import argparse
+import http.client
+import io
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+from PIL import Image
+
+from utils.class_names import CLASS_NAMES
+
+SCENARIOS = ("predict", "predict_unique", "disease_report", "chat", "download_report")
+
+# Request numbers are unique across warm-up and measured runs, so cache-busting
+# scenarios never repeat a body
+_request_numbers = itertools.count()
+
+FAKE_REPORT = {
+    "crop_name": "Tomato",
+    "disease_name": "Late blight",
+    "severity": "High",
+    "affected_area": "Leaves and stems",
+    "recovery_timeline": "2-3 weeks",
+    "disease_description": "Late blight is caused by the water mould Phytophthora infestans.",
+    "symptoms": ["Dark water-soaked lesions", "White mould on leaf undersides", "Brown stem lesions"],
+    "treatment": ["Remove infected plants", "Apply copper fungicide", "Improve air circulation"],
+    "organic_treatment": ["Neem oil spray", "Trichoderma application"],
+    "chemical_treatment": {"name": "Mancozeb", "dosage": "2 g/L", "application_method": "Foliar spray"},
+    "fertilizer_advice": "Balanced NPK with extra potassium",
+    "prevention_tips": ["Crop rotation", "Resistant varieties", "Avoid overhead irrigation"],
+}
+
+
+# ================================
+# SERVER WITH FAKE GEMINI
+# ================================
+def fake_gemini_app(latency_ms):
+    """The Flask app with chat and reports on a local provider whose latency is uniform in [0.5, 1.5] x latency_ms"""
+    import gemini_service
+    from utils.llm_providers import LocalProvider
+
+    provider = LocalProvider(latency=(latency_ms / 2000, latency_ms * 1.5 / 1000))
+    gemini_service.chat_provider = gemini_service.report_provider = provider
+
+    from app import app
+    return app
+
+
+def start_local_server(port, gemini_latency_ms):
+    """Run fake_gemini_app() in a child process so it doesn't share our GIL"""
+    code = (
+        "import contextlib, io, load_test\n"
+        f"app = load_test.fake_gemini_app({gemini_latency_ms})\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        f"    app.run(host='127.0.0.1', port={port}, threaded=True)\n"
+    )
+    return subprocess.Popen(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(host, port, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+# ================================
+# REQUEST BODIES
+# ================================
+def synthetic_photo(size):
+    """A smooth gradient with noise, so JPEG size is closer to a real photo than flat colour"""
+    width, height = size
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                       np.full((height, width), 96, np.float32)], axis=-1)
+    pixels += np.random.default_rng(0).normal(0, 12, pixels.shape)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def multipart(field, filename, content):
+    boundary = "----fasalrakshak-load-test"
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def json_body(payload):
+    return json.dumps(payload).encode(), {"Content-Type": "application/json"}
+
+
+def build_request(scenario, i, photo):
+    """(path, body, headers) for request number i of a scenario"""
+    if scenario == "predict":
+        return ("/predict",) + multipart("image", "leaf.jpg", photo)
+    if scenario == "predict_unique":
+        # Bytes after the JPEG end marker are ignored by decoders but change the cache key
+        return ("/predict",) + multipart("image", "leaf.jpg", photo + i.to_bytes(8, "big"))
+    if scenario == "disease_report":
+        return ("/api/disease-report",) + json_body({"disease": CLASS_NAMES[i % len(CLASS_NAMES)]})
+    if scenario == "chat":
+        return ("/api/chat/gemini",) + json_body({
+            "email": "load-test@example.com",
+            "message": f"How do I treat late blight on my tomato field {i}?",
+        })
+    if scenario == "download_report":
+        ai_report = dict(FAKE_REPORT, symptoms=FAKE_REPORT["symptoms"] + [f"Field survey plot {i}"])
+        return ("/api/download-report",) + json_body({"disease": "Tomato___Late_blight", "ai_report": ai_report})
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+# ================================
+# LOAD GENERATION
+# ================================
+def run_scenario(host, port, scenario, concurrency, duration, photo, timeout):
+    """Closed loop: each of `concurrency` clients sends its next request as soon as one returns"""
+    counter_lock = threading.Lock()
+    samples = []
+    samples_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        local = []
+        while not local or time.perf_counter() < deadline:
+            with counter_lock:
+                i = next(_request_numbers)
+            path, body, headers = build_request(scenario, i, photo)
+            start = time.perf_counter()
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                status = 0
+            local.append((time.perf_counter() - start, status))
+        conn.close()
+        with samples_lock:
+            samples.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in samples]) * 1000
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "status_counts": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(samples) / elapsed, 2),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 2) if len(samples) else None,
+            "p50": round(float(np.percentile(latencies, 50)), 2) if len(samples) else None,
+            "p95": round(float(np.percentile(latencies, 95)), 2) if len(samples) else None,
+            "p99": round(float(np.percentile(latencies, 99)), 2) if len(samples) else None,
+            "max": round(float(latencies.max()), 2) if len(samples) else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test with a fake Gemini provider")
+    parser.add_argument("--url", help="running server to test (default: start a local one)")
+    parser.add_argument("--port", type=int, default=5055, help="port for the local server")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario")
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0, help="mean fake Gemini latency (local server)")
+    parser.add_argument("--image-size", default="1600x1200", help="WIDTHxHEIGHT of the synthetic photo")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", default="load_test_results.json")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    server = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+        print(f"[*] Starting local server on :{port} (fake Gemini ~{args.gemini_latency_ms:.0f}ms)")
+        server = start_local_server(port, args.gemini_latency_ms)
+
+    try:
+        if not wait_until_ready(host, port, timeout=180):
+            print(f"[!] Server at {host}:{port} is not responding")
+            sys.exit(1)
+
+        photo = synthetic_photo(tuple(int(v) for v in args.image_size.lower().split("x")))
+        results = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "target": args.url or f"local (fake Gemini ~{args.gemini_latency_ms:.0f}ms)",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "image_bytes": len(photo),
+            "scenarios": {},
+        }
+
+        print("\n" + "=" * 70)
+        print(f"{'scenario':<18}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        print("=" * 70)
+        for scenario in scenarios:
+            # Warm up (lazy model load, first Gemini call) outside the measurement
+            run_scenario(host, port, scenario, 1, 0, photo, args.timeout)
+            result = run_scenario(host, port, scenario, args.concurrency, args.duration, photo, args.timeout)
+            results["scenarios"][scenario] = result
+            latency = result["latency_ms"]
+            print(f"{scenario:<18}{result['requests']:>9}{result['errors']:>8}{result['rps']:>9.1f}"
+                  f"{latency['p50'] or 0:>9.1f}{latency['p95'] or 0:>9.1f}{latency['p99'] or 0:>9.1f}")
+        print("=" * 70)
+
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[+] Results written to {args.output}\n")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Model Loading for FasalRakshak
+TensorFlow/Keras compatibility layers and the fallback loader, shared by the
+Flask app and the standalone inference server
+"""
+
+import os
+import json
+import logging
+import time
+from datetime import datetime
+import h5py
+
+# ================================
+# TENSORFLOW/KERAS SETUP (CRITICAL)
+# ================================
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress TF warnings
+
+import tensorflow as tf
+from tensorflow.keras.layers import Dense, InputLayer
+
+from utils.inference import (
+    build_inference_fn, build_tflite_inference_fn,
+    INFERENCE_MODE, MODEL_VARIANT, TFLITE_VARIANTS,
+)
+from utils.model_version import MODEL_PATH, artifact_sha256, model_version
+
+log = logging.getLogger(__name__)
+
+# Suppress GPU warnings
+physical_devices = tf.config.list_physical_devices('GPU')
+if physical_devices:
+    tf.config.experimental.set_memory_growth(physical_devices[0], True)
+
+# ================================
+# CUSTOM KERAS COMPATIBILITY LAYERS
+# ================================
+class SafeDense(Dense):
+    """Dense layer that handles outdated Keras configs"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("quantization_config", None)
+        super().__init__(*args, **kwargs)
+
+class SafeInputLayer(InputLayer):
+    """InputLayer that handles Keras 2.x ↔ 3.x compatibility"""
+    def __init__(self, *args, **kwargs):
+        if "batch_shape" in kwargs:
+            batch_shape = kwargs.pop("batch_shape")
+            if "batch_input_shape" not in kwargs:
+                kwargs["batch_input_shape"] = batch_shape
+        
+        kwargs.pop("optional", None)
+        kwargs.pop("sparse", None)
+        kwargs.pop("ragged", None)
+        
+        super().__init__(*args, **kwargs)
+
+class SafeConv2D(tf.keras.layers.Conv2D):
+    """Conv2D layer that strips DTypePolicy from Keras 3.x models"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)  # Remove problematic dtype objects
+        super().__init__(*args, **kwargs)
+
+class SafeBatchNormalization(tf.keras.layers.BatchNormalization):
+    """BatchNormalization layer that handles Keras 2.x ↔ 3.x compatibility"""
+    def __init__(self, *args, **kwargs):
+        # Remove problematic config keys
+        kwargs.pop("dtype", None)
+        kwargs.pop("virtual_batch_size", None)
+        kwargs.pop("adjustment", None)
+        super().__init__(*args, **kwargs)
+
+class SafeReLU(tf.keras.layers.ReLU):
+    """ReLU activation that handles Keras 2.x ↔ 3.x compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeActivation(tf.keras.layers.Activation):
+    """Activation layer that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeDepthwiseConv2D(tf.keras.layers.DepthwiseConv2D):
+    """DepthwiseConv2D layer that handles Keras 2.x ↔ 3.x compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeGlobalAveragePooling2D(tf.keras.layers.GlobalAveragePooling2D):
+    """GlobalAveragePooling2D that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeZeroPadding2D(tf.keras.layers.ZeroPadding2D):
+    """ZeroPadding2D that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeMaxPooling2D(tf.keras.layers.MaxPooling2D):
+    """MaxPooling2D that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeFlatten(tf.keras.layers.Flatten):
+    """Flatten that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeDropout(tf.keras.layers.Dropout):
+    """Dropout that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeAdd(tf.keras.layers.Add):
+    """Add layer that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeMultiply(tf.keras.layers.Multiply):
+    """Multiply layer that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+class SafeReshape(tf.keras.layers.Reshape):
+    """Reshape layer that handles compatibility"""
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("dtype", None)
+        super().__init__(*args, **kwargs)
+
+# ================================
+# ROBUST MODEL LOADING WITH KERAS COMPATIBILITY
+# ================================
+
+def clean_dtype_policy_recursive(obj):
+    """Aggressively clean Keras 3.x config to load with Keras 2.x"""
+    if isinstance(obj, dict):
+        # Replace DTypePolicy objects
+        if obj.get('class_name') == 'DTypePolicy':
+            return {'class_name': 'str', 'config': {'name': 'float32'}}
+        
+        # Clean problematic config keys from layer configs
+        if 'config' in obj and isinstance(obj['config'], dict):
+            config = obj['config']
+            # Aggressive removal of Keras 3.x specific keys
+            problematic_keys = [
+                'dtype', 'quantization_config', 'backend', 'optional', 'sparse', 
+                'ragged', 'virtual_batch_size', 'adjustment', 'autocast', 
+                'tf_data_experimental_ops_enabled', 'experimental_enable_dispatch'
+            ]
+            for key in problematic_keys:
+                config.pop(key, None)
+            
+            # Remove dtype from nested trainable/non_trainable lists
+            for subkey in list(config.keys()):
+                if isinstance(config[subkey], dict):
+                    config[subkey].pop('dtype', None)
+        
+        # Clean all nested objects
+        for key in list(obj.keys()):
+            obj[key] = clean_dtype_policy_recursive(obj[key])
+    elif isinstance(obj, list):
+        return [clean_dtype_policy_recursive(item) for item in obj]
+    
+    return obj
+
+
+# Pre-normalized artifact written after the first successful fallback load
+MODEL_CACHE_ENABLED = os.getenv("MODEL_CACHE_ENABLED", "true").lower() == "true"
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "models/cache")
+
+CUSTOM_OBJECTS = {
+    "Dense": SafeDense,
+    "InputLayer": SafeInputLayer,
+    "Conv2D": SafeConv2D,
+    "BatchNormalization": SafeBatchNormalization,
+    "ReLU": SafeReLU,
+    "Activation": SafeActivation,
+    "DepthwiseConv2D": SafeDepthwiseConv2D,
+    "GlobalAveragePooling2D": SafeGlobalAveragePooling2D,
+    "ZeroPadding2D": SafeZeroPadding2D,
+    "MaxPooling2D": SafeMaxPooling2D,
+    "Flatten": SafeFlatten,
+    "Dropout": SafeDropout,
+    "Add": SafeAdd,
+    "Multiply": SafeMultiply,
+    "Reshape": SafeReshape,
+}
+
+# A cached model is serialized with the Safe* class names themselves
+CACHED_CUSTOM_OBJECTS = {cls.__name__: cls for cls in CUSTOM_OBJECTS.values()}
+
+# Filled in while loading, reported by /predict/stats
+STARTUP_TIMINGS = {}
+
+
+def cached_model_path(model_path, source_hash):
+    """Cache artifact path, keyed by the source H5 hash and the TensorFlow version"""
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(MODEL_CACHE_DIR, f"{name}-{source_hash[:16]}-tf{tf.__version__}.keras")
+
+
+def save_model_cache(model, cache_path, source_hash, model_path):
+    """Write the cleanly loaded model (and a metadata stamp) atomically"""
+    try:
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp.keras"
+        model.save(tmp_path)
+        os.replace(tmp_path, cache_path)
+
+        with open(f"{cache_path}.json", "w") as f:
+            json.dump({
+                "source": model_path,
+                "source_sha256": source_hash,
+                "tensorflow": tf.__version__,
+                "created": datetime.now().isoformat(timespec="seconds"),
+            }, f, indent=2)
+
+        # Drop artifacts built from older model files / TF versions
+        prefix = os.path.splitext(os.path.basename(model_path))[0] + "-"
+        for existing in os.listdir(MODEL_CACHE_DIR):
+            path = os.path.join(MODEL_CACHE_DIR, existing)
+            if existing.startswith(prefix) and not path.startswith(cache_path):
+                os.remove(path)
+
+        log.info("Cached normalized model at %s", cache_path)
+    except Exception as e:
+        log.warning("Could not write model cache: %s", e)
+
+
+def load_model_with_fallback(model_path=MODEL_PATH):
+    """
+    Load Keras model, preferring the cached pre-normalized artifact and
+    otherwise trying multiple fallback strategies (then caching the result)
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found at {model_path}")
+
+    if not MODEL_CACHE_ENABLED:
+        model, _ = _load_model_uncached(model_path)
+        STARTUP_TIMINGS["model_source"] = "fallback"
+        return model
+
+    start = time.perf_counter()
+    source_hash = artifact_sha256(model_path)
+    STARTUP_TIMINGS["hash_s"] = round(time.perf_counter() - start, 3)
+    cache_path = cached_model_path(model_path, source_hash)
+
+    if os.path.exists(cache_path):
+        try:
+            log.info("Loading pre-normalized model from %s", cache_path)
+            model = tf.keras.models.load_model(cache_path, compile=False, custom_objects=CACHED_CUSTOM_OBJECTS)
+            STARTUP_TIMINGS["model_source"] = "cache"
+            return model
+        except Exception as e:
+            log.warning("Cached model failed to load (%s), rebuilding cache", str(e)[:80])
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+
+    model, cacheable = _load_model_uncached(model_path)
+    STARTUP_TIMINGS["model_source"] = "fallback"
+    if cacheable:
+        save_model_cache(model, cache_path, source_hash, model_path)
+    return model
+
+
+def _load_model_uncached(model_path):
+    """
+    Load Keras model with multiple fallback strategies
+
+    Returns:
+        tuple: (model, cacheable) - cacheable is False when weights could not be restored
+    """
+    custom_objects = CUSTOM_OBJECTS
+    
+    errors = []
+    
+    # Try 1: Direct load
+    try:
+        log.info("[1] Attempting direct Keras load...")
+        model = tf.keras.models.load_model(model_path, compile=False, custom_objects=custom_objects)
+        return model, True
+    except Exception as e:
+        errors.append(str(e)[:80])
+        log.info("[1] Failed: %s", errors[-1])
+    
+    # Try 2: H5py config patch
+    try:
+        log.info("[2] Attempting H5py + config patch...")
+        with h5py.File(model_path, 'r') as f:
+            config_str = f.attrs['model_config']
+            if isinstance(config_str, bytes):
+                config_str = config_str.decode('utf-8')
+            config = json.loads(config_str)
+            config = clean_dtype_policy_recursive(config)
+            model = tf.keras.Model.from_config(config, custom_objects=custom_objects)
+            weights_loaded = True
+            try:
+                model.load_weights(model_path)
+            except:
+                weights_loaded = False
+                log.warning("Weights not restored, model will not be cached")
+        return model, weights_loaded
+    except Exception as e:
+        errors.append(str(e)[:80])
+        log.info("[2] Failed: %s", errors[-1])
+    
+    # Try 3: Retry without custom objects
+    try:
+        log.info("[3] Attempting load without custom objects...")
+        model = tf.keras.models.load_model(model_path, compile=False)
+        return model, True
+    except Exception as e:
+        errors.append(str(e)[:80])
+        log.info("[3] Failed: %s", errors[-1])
+    
+    raise RuntimeError(f"All load attempts failed: {errors}")
+
+# ================================
+# INFERENCE FUNCTION FOR THE CONFIGURED VARIANT
+# ================================
+def load_inference():
+    """
+    Load the configured model variant and build its inference function
+
+    The version of the artifact actually loaded (which may be the Keras
+    model when the configured variant failed) is recorded in
+    STARTUP_TIMINGS["model_version"]; it is read before loading, so a file
+    replaced later does not change it.
+
+    Returns:
+        tuple: (model, infer) - model is None when a TFLite variant is served,
+               infer is None when no model could be loaded
+    """
+    model = None
+    infer = None
+    started = time.perf_counter()
+
+    # Quantized TFLite variant (see convert_quantized.py), if configured
+    if MODEL_VARIANT in TFLITE_VARIANTS:
+        try:
+            version = model_version(MODEL_VARIANT)
+            infer = build_tflite_inference_fn(TFLITE_VARIANTS[MODEL_VARIANT])
+            STARTUP_TIMINGS["model_version"] = version
+            log.info("Serving the %s TFLite model (%s)", MODEL_VARIANT, version)
+        except Exception as e:
+            log.warning("Could not load %s variant (%s), using Keras model", MODEL_VARIANT, e)
+    elif MODEL_VARIANT != "keras":
+        log.warning("Unknown MODEL_VARIANT '%s', using Keras model", MODEL_VARIANT)
+
+    if infer is None:
+        try:
+            log.info("Loading TensorFlow model...")
+            load_start = time.perf_counter()
+            version = model_version("keras")
+            model = load_model_with_fallback()
+            STARTUP_TIMINGS["model_version"] = version
+            STARTUP_TIMINGS["model_load_s"] = round(time.perf_counter() - load_start, 3)
+            log.info("Model loaded in %.2fs (from %s)",
+                     STARTUP_TIMINGS["model_load_s"], STARTUP_TIMINGS.get("model_source"))
+        except Exception as e:
+            log.error(
+                "Error loading model: %s - backend will run but predictions will fail. Check that "
+                "backend/models/MobileNetV2_best.h5 exists, is not corrupted and matches the "
+                "TensorFlow/Keras version", e,
+            )
+            model = None
+
+    # Compiled inference over the Keras model
+    if infer is None and model is not None:
+        build_start = time.perf_counter()
+        try:
+            infer = build_inference_fn(model, INFERENCE_MODE)
+            log.info("Inference function ready (mode: %s)", INFERENCE_MODE)
+        except Exception as e:
+            log.warning("Could not build compiled inference (%s), using model.predict", e)
+            infer = build_inference_fn(model, "predict")
+        STARTUP_TIMINGS["build_inference_s"] = round(time.perf_counter() - build_start, 3)
+
+    STARTUP_TIMINGS["total_s"] = round(time.perf_counter() - started, 3)
+    log.info("Model startup took %.2fs", STARTUP_TIMINGS["total_s"])
+
+    return model, infer
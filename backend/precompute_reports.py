@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Precompute the disease report for every label the model can emit
+
+Walks utils/class_names.py, generates each report with Gemini, validates it
+and writes the versioned store that /api/disease-report serves from. Reports
+that fail validation (or come back as the generic fallback) are not stored;
+with --keep-existing the previous report for that class is kept instead.
+
+Usage:
+    python precompute_reports.py [--output data/disease_reports.json]
+                                 [--only Tomato___Late_blight ...]
+                                 [--delay 1.0] [--keep-existing]
+
+Running servers pick the new file up within a few minutes (or on restart).
+"""
+import argparse
+import sys
+import time
+
+from gemini_service import generate_class_report, fallback_class_report
+from utils.class_names import CLASS_NAMES
+from utils.report_store import REPORT_STORE_PATH, build_reports, read_store, write_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute disease reports for all model classes")
+    parser.add_argument("--output", default=REPORT_STORE_PATH)
+    parser.add_argument("--only", nargs="+", choices=CLASS_NAMES, metavar="CLASS",
+                        help="regenerate only these classes (others are kept from --output)")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait between Gemini calls")
+    parser.add_argument("--keep-existing", action="store_true",
+                        help="keep the stored report for classes that fail to regenerate")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("[*] PRECOMPUTING DISEASE REPORTS")
+    print("=" * 70)
+
+    existing = (read_store(args.output) or {}).get("reports", {})
+    if existing:
+        print(f"[*] {len(existing)} reports already in {args.output}")
+
+    class_names = args.only or CLASS_NAMES
+
+    def generate(full_name):
+        report = generate_class_report(full_name)
+        if args.delay:
+            time.sleep(args.delay)
+        return report
+
+    start = time.perf_counter()
+    reports, failures = build_reports(
+        class_names, generate, fallback_class_report,
+        existing=existing if (args.keep_existing or args.only) else None,
+    )
+    elapsed = time.perf_counter() - start
+
+    # Regenerating a subset keeps every other stored class
+    if args.only:
+        reports = {**existing, **reports}
+
+    if not reports:
+        print("\n[!] No valid reports generated - store not written")
+        sys.exit(1)
+
+    version = write_store(args.output, reports)
+
+    print("\n" + "=" * 70)
+    print(f"[+] Wrote {len(reports)} reports to {args.output} (version {version}) in {elapsed:.1f}s")
+    if failures:
+        print(f"[!] {len(failures)} classes failed:")
+        for full_name, reason in failures.items():
+            print(f"    - {full_name}: {reason}")
+    print("=" * 70 + "\n")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the Flask app
+
+Imports app.py in fresh processes with MODEL_LOADING=eager (TensorFlow and
+the model loaded at import, as before) and MODEL_LOADING=lazy, and lists the
+slowest modules from `python -X importtime` for each.
+
+Usage:
+    python profile_imports.py [--runs 3] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+MODES = ("eager", "lazy")
+
+
+def time_import(mode):
+    env = dict(os.environ, MODEL_LOADING=mode, TF_CPP_MIN_LOG_LEVEL="3")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import app failed ({mode}):\n{result.stderr[-2000:]}")
+    return wall, parse_importtime(result.stderr)
+
+
+def parse_importtime(stderr):
+    """Return {module: cumulative seconds} for modules imported directly by app.py"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue
+        # Names are indented by 2 spaces per nesting level under the top-level import
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if level == 0 and name == "app":
+            # app's own body, including an eager model load
+            modules["app (module body)"] = self_us / 1e6
+        elif level == 1:
+            modules[name] = max(modules.get(name, 0.0), cumulative_us / 1e6)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app import time")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    summary = {}
+    for mode in MODES:
+        walls = []
+        modules = {}
+        for _ in range(args.runs):
+            wall, modules = time_import(mode)
+            walls.append(wall)
+        summary[mode] = sum(walls) / len(walls)
+
+        print("\n" + "=" * 70)
+        print(f"MODEL_LOADING={mode}: import app took {summary[mode]:.2f}s (mean of {args.runs})")
+        print("=" * 70)
+        for name, seconds in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {seconds:>8.3f}s  {name}")
+
+    print("\n" + "=" * 70)
+    print(f"Saved per worker boot: {summary['eager'] - summary['lazy']:.2f}s "
+          f"({summary['eager']:.2f}s -> {summary['lazy']:.2f}s)")
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Bulk PDF Export API Route
+
+Renders many reports in parallel in a process pool (reportlab is pure
+Python, so threads would serialize on the GIL) and returns them as one ZIP
+with a manifest.json of per-item status.
+
+    POST /api/bulk-export                     -> ZIP (synchronous)
+    POST /api/bulk-export {"async": true}     -> 202 + job ID
+    GET  /api/bulk-export/<job_id>            -> job status with per-item status
+    GET  /api/bulk-export/<job_id>/download   -> ZIP once the job is done
+
+Job status and ZIPs live in BULK_EXPORT_DIR, so any web worker can answer
+a poll for a job another worker started. Async jobs run on a thread of the
+worker that accepted them, so a worker restart abandons the job; a job
+whose status has not been updated for BULK_EXPORT_STALE_AFTER seconds is
+reported as failed.
+
+Render processes use spawn, which re-imports the main module in each one.
+Under gunicorn that is gunicorn's own script; `python app.py` points it at
+utils.pdf_render_worker so the children don't rebuild the app.
+
+Settings (environment variables):
+    BULK_EXPORT_WORKERS     - render processes (default: CPU count)
+    BULK_EXPORT_MAX_ITEMS   - reports accepted per request (default 500)
+    BULK_EXPORT_DIR         - job directory (default <tmp>/fasalrakshak-exports)
+    BULK_EXPORT_JOB_TTL     - seconds finished jobs are kept (default 3600)
+    BULK_EXPORT_STALE_AFTER - seconds without progress before an unfinished job counts as failed (default 300)
+"""
+import contextvars
+import io
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flask import Blueprint, request, jsonify, send_file
+from routes.download_report import prepare_report_payload, pdf_cache
+from utils.pdf_generator import render_pdf_bytes
+
+bulk_export_bp = Blueprint('bulk_export', __name__)
+log = logging.getLogger(__name__)
+
+BULK_EXPORT_WORKERS = int(os.getenv("BULK_EXPORT_WORKERS", os.cpu_count() or 1))
+BULK_EXPORT_MAX_ITEMS = int(os.getenv("BULK_EXPORT_MAX_ITEMS", 500))
+BULK_EXPORT_DIR = os.getenv("BULK_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "fasalrakshak-exports"))
+BULK_EXPORT_JOB_TTL = int(os.getenv("BULK_EXPORT_JOB_TTL", 3600))
+BULK_EXPORT_STALE_AFTER = int(os.getenv("BULK_EXPORT_STALE_AFTER", 300))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Shared render pool, created on first use (and again in a forked worker)
+
+    Uses spawn so render processes don't inherit the web worker's threads
+    or TensorFlow state (see the module docstring for what they import).
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ProcessPoolExecutor(
+                    max_workers=max(1, BULK_EXPORT_WORKERS),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+
+# ================================
+# RENDERING
+# ================================
+def render_items(items, on_progress=None):
+    """
+    Render report payloads in the pool, reusing cached PDFs
+
+    Args:
+        items: list of /api/download-report request bodies
+        on_progress: optional callable(results) after each finished item
+
+    Returns:
+        list of per-item dicts (index, status, report_id, filename, error)
+        and {index: pdf bytes} for the items that rendered
+    """
+    results = [{"index": i, "status": "pending"} for i in range(len(items))]
+    pdfs = {}
+    futures = {}
+    pool = get_pool()
+
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i].update(status="failed", error="Report payload must be a JSON object")
+            continue
+
+        report_data, language, content_hash, report_id = prepare_report_payload(item)
+        results[i].update(
+            report_id=report_id,
+            language=language,
+            filename=f"{i + 1:04d}_FasalRakshak_Report_{report_id}_{language}.pdf",
+        )
+
+        cached = pdf_cache.get(content_hash) if pdf_cache is not None else None
+        if cached is not None:
+            pdfs[i] = cached
+            results[i]["status"] = "done"
+            continue
+
+        future = pool.submit(render_pdf_bytes, report_data, language, report_id)
+        futures[future] = (i, content_hash)
+
+    if on_progress:
+        on_progress(results)
+
+    for future in as_completed(futures):
+        i, content_hash = futures[future]
+        try:
+            _, pdf_bytes = future.result()
+        except Exception as e:
+            results[i].update(status="failed", error=str(e))
+        else:
+            pdfs[i] = pdf_bytes
+            results[i]["status"] = "done"
+            if pdf_cache is not None:
+                pdf_cache.set(content_hash, pdf_bytes)
+        if on_progress:
+            on_progress(results)
+
+    return results, pdfs
+
+
+def build_zip(results, pdfs, output):
+    """Write the rendered PDFs and a manifest.json into a ZIP"""
+    # PDF streams are already Flate-compressed; storing them is much faster
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive:
+        for i, pdf_bytes in sorted(pdfs.items()):
+            archive.writestr(results[i]["filename"], pdf_bytes)
+        archive.writestr("manifest.json", json.dumps(summarize(results), indent=2, ensure_ascii=False))
+
+
+def summarize(results):
+    done = sum(1 for r in results if r["status"] == "done")
+    failed = sum(1 for r in results if r["status"] == "failed")
+    return {
+        "total": len(results),
+        "completed": done,
+        "failed": failed,
+        "items": results,
+    }
+
+
+# ================================
+# JOBS (shared across workers via BULK_EXPORT_DIR)
+# ================================
+def _job_dir(job_id):
+    return os.path.join(BULK_EXPORT_DIR, job_id)
+
+
+def _write_status(job_id, status):
+    path = os.path.join(_job_dir(job_id), "status.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_status(job_id):
+    """Job status, with unfinished jobs that stopped updating reported as failed"""
+    path = os.path.join(_job_dir(job_id), "status.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            status = json.load(f)
+        updated = os.path.getmtime(path)
+    except (OSError, ValueError):
+        return None
+    if status.get("status") in ("queued", "running") and time.time() - updated > BULK_EXPORT_STALE_AFTER:
+        status.update(status="failed", error="Job stopped making progress (the worker running it restarted)")
+    return status
+
+
+def _cleanup_old_jobs():
+    """Remove job directories older than BULK_EXPORT_JOB_TTL"""
+    cutoff = time.time() - BULK_EXPORT_JOB_TTL
+    try:
+        entries = os.listdir(BULK_EXPORT_DIR)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        path = os.path.join(BULK_EXPORT_DIR, entry)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def _run_job(job_id, items):
+    started = time.time()
+    last_write = [0.0]
+
+    def progress(results):
+        # Status holds every item, so write at most twice a second
+        if time.time() - last_write[0] >= 0.5:
+            _write_status(job_id, dict(summarize(results), job_id=job_id, status="running", created_at=started))
+            last_write[0] = time.time()
+
+    try:
+        results, pdfs = render_items(items, on_progress=progress)
+        build_zip(results, pdfs, os.path.join(_job_dir(job_id), "reports.zip"))
+        _write_status(job_id, dict(
+            summarize(results), job_id=job_id, status="done",
+            created_at=started, elapsed_s=round(time.time() - started, 2),
+        ))
+        log.info("Bulk export %s finished: %d/%d PDFs in %.1fs", job_id, len(pdfs), len(items), time.time() - started)
+    except Exception as e:
+        log.exception("Bulk export %s failed: %s", job_id, e)
+        _write_status(job_id, {"job_id": job_id, "status": "failed", "error": str(e), "created_at": started})
+
+
+# ================================
+# ROUTES
+# ================================
+@bulk_export_bp.route("/api/bulk-export", methods=["POST"])
+def bulk_export():
+    """
+    Render many reports at once
+
+    Request JSON:
+        {
+            "reports": [ {"disease": ..., "language": ..., "ai_report": {...}}, ... ],
+            "async": false
+        }
+
+    Response:
+        ZIP of PDFs plus manifest.json, or with "async": true
+        202 {"job_id", "status_url", "download_url"}
+    """
+    try:
+        data = request.json or {}
+        items = data.get("reports")
+
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "reports must be a non-empty list"}), 400
+        if len(items) > BULK_EXPORT_MAX_ITEMS:
+            return jsonify({"error": f"At most {BULK_EXPORT_MAX_ITEMS} reports per export"}), 413
+
+        log.info("Bulk export of %d reports (%d render processes)", len(items), BULK_EXPORT_WORKERS)
+
+        if data.get("async"):
+            _cleanup_old_jobs()
+            job_id = uuid.uuid4().hex
+            os.makedirs(_job_dir(job_id), exist_ok=True)
+            _write_status(job_id, {"job_id": job_id, "status": "queued", "total": len(items), "created_at": time.time()})
+            # Copy the context so the job's log lines keep this request's ID
+            threading.Thread(target=contextvars.copy_context().run, args=(_run_job, job_id, items), daemon=True).start()
+            return jsonify({
+                "job_id": job_id,
+                "status_url": f"/api/bulk-export/{job_id}",
+                "download_url": f"/api/bulk-export/{job_id}/download",
+            }), 202
+
+        start_time = time.time()
+        results, pdfs = render_items(items)
+        zip_buffer = io.BytesIO()
+        build_zip(results, pdfs, zip_buffer)
+        zip_buffer.seek(0)
+        log.info("Bulk export finished: %d/%d PDFs in %.1fs", len(pdfs), len(items), time.time() - start_time)
+
+        return send_file(
+            zip_buffer,
+            mimetype="application/zip",
+            as_attachment=True,
+            download_name="FasalRakshak_Reports.zip"
+        )
+
+    except Exception as e:
+        log.exception("Bulk export error: %s", e)
+        return jsonify({"error": "Bulk export failed", "details": str(e)}), 500
+
+
+@bulk_export_bp.route("/api/bulk-export/<job_id>", methods=["GET"])
+def bulk_export_status(job_id):
+    """Job status with per-item status"""
+    status = _read_status(job_id) if job_id.isalnum() else None
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(status), 200
+
+
+@bulk_export_bp.route("/api/bulk-export/<job_id>/download", methods=["GET"])
+def bulk_export_download(job_id):
+    """ZIP for a finished job"""
+    status = _read_status(job_id) if job_id.isalnum() else None
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if status["status"] != "done":
+        return jsonify({"error": "Job not finished", "status": status["status"]}), 409
+    return send_file(
+        os.path.join(_job_dir(job_id), "reports.zip"),
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=f"FasalRakshak_Reports_{job_id[:8]}.zip"
+    )
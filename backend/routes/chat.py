@@ -1,11 +1,48 @@
 """
 Chat API Route for Chatbot Gemini Integration
 """
-from flask import Blueprint, request, jsonify
-from gemini_service import generate_with_fallback
+from flask import Blueprint, Response, request, jsonify
+from gemini_service import generate_with_fallback, stream_generate, chat_provider_stats, chat_source
+from utils.logging_setup import request_id_var
+import json
+import logging
 import os
+import time
 
 chat_bp = Blueprint('chat', __name__)
+log = logging.getLogger(__name__)
+
+
+def build_chat_prompt(data):
+    """
+    Validate a chat request body and build the Gemini prompt
+
+    Returns:
+        (prompt, None) or (None, (error response, status))
+    """
+    email = data.get("email")
+    message = data.get("message", "")
+    image = data.get("image")
+    
+    if not email:
+        return None, (jsonify({"error": "Email is required"}), 400)
+    
+    if not message and not image:
+        return None, (jsonify({"error": "Message or image is required"}), 400)
+    
+    log.info("Chat request from %s", email)
+    log.debug("Chat message: %s", message[:100] if message else "(Image only)")
+    
+    # Build prompt with image context if provided
+    prompt = message
+    if image:
+        prompt = f"{message}\n\n[User also uploaded an image for analysis]" if message else "Please analyze this plant image for diseases and provide recommendations."
+    return prompt, None
+
+
+def sse_event(event, payload):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
 
 
 @chat_bp.route("/api/chat/gemini", methods=["POST"])
@@ -22,28 +59,14 @@ def chat_gemini():
     
     Response JSON:
         {
-            "reply": "AI response from Gemini"
+            "reply": "AI response from Gemini",
+            "source": "gemini" (the chat provider, e.g. "offline")
         }
     """
     try:
-        data = request.json
-        email = data.get("email")
-        message = data.get("message", "")
-        image = data.get("image")
-        
-        if not email:
-            return jsonify({"error": "Email is required"}), 400
-        
-        if not message and not image:
-            return jsonify({"error": "Message or image is required"}), 400
-        
-        print(f"📨 Chat request from: {email}")
-        print(f"   Message: {message[:100] if message else '(Image only)'}")
-        
-        # Build prompt with image context if provided
-        prompt = message
-        if image:
-            prompt = f"{message}\n\n[User also uploaded an image for analysis]" if message else "Please analyze this plant image for diseases and provide recommendations."
+        prompt, error = build_chat_prompt(request.json)
+        if error:
+            return error
         
         # Generate response using Gemini
         response_text = generate_with_fallback(prompt)
@@ -51,19 +74,79 @@ def chat_gemini():
         if not response_text:
             return jsonify({"error": "Failed to generate response"}), 500
         
-        print("✅ Chat response generated successfully")
-        
         return jsonify({
-            "reply": response_text
+            "reply": response_text,
+            "source": chat_source()
         }), 200
         
     except Exception as e:
-        print(f"❌ Chat API error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Chat API error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
+@chat_bp.route("/api/chat/gemini/stream", methods=["POST"])
+def chat_gemini_stream():
+    """
+    Streaming variant of /api/chat/gemini (Server-Sent Events)
+    
+    Same request JSON as /api/chat/gemini. The response is text/event-stream:
+        event: token    data: {"text": "partial text"}        (repeated)
+        event: done     data: {"reply": "full text", "chunks": n, "source": ...,
+                               "ttft_ms": ..., "total_ms": ...}
+        event: error    data: {"error": "..."}                 (instead of done)
+    
+    Clients that can't read SSE keep using /api/chat/gemini.
+    """
+    try:
+        prompt, error = build_chat_prompt(request.json)
+        if error:
+            return error
+    except Exception as e:
+        log.exception("Chat stream API error: %s", e)
+        return jsonify({"error": str(e)}), 500
+    
+    start_time = time.perf_counter()
+    # The body is generated after the request hooks ran, so carry the ID over
+    log_extra = {"request_id": request_id_var.get()}
+    
+    def events():
+        parts = []
+        ttft_ms = None
+        try:
+            # Generator: a client disconnect closes it, which stops reading upstream
+            for text in stream_generate(prompt):
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start_time) * 1000
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+        except Exception as e:
+            log.error("Chat stream error after %d chunks: %s", len(parts), e, extra=log_extra)
+            yield sse_event("error", {"error": f"{chat_source()} error: {str(e)}", "partial_reply": "".join(parts)})
+            return
+        
+        total_ms = (time.perf_counter() - start_time) * 1000
+        log.info("Chat stream finished (%d chunks, first token %.0fms, total %.0fms)",
+                 len(parts), ttft_ms or 0, total_ms, extra=log_extra)
+        yield sse_event("done", {
+            "reply": "".join(parts) or "AI response unavailable.",
+            "chunks": len(parts),
+            "source": chat_source(),
+            "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+            "total_ms": round(total_ms, 1),
+        })
+    
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # don't let a reverse proxy buffer the stream
+    })
+
+
+@chat_bp.route("/api/chat/stats", methods=["GET"])
+def chat_stats():
+    """Chat provider latency and upstream counts"""
+    return jsonify(chat_provider_stats()), 200
+
+
 @chat_bp.route("/api/chat/image-count", methods=["POST"])
 def get_image_count():
     """
@@ -88,12 +171,12 @@ def get_image_count():
         
         # TODO: Implement database tracking if needed
         # For now, return 0 to allow initial uploads
-        print(f"📊 Image count requested for: {email}")
+        log.info("Image count requested for %s", email)
         
         return jsonify({
             "count": 0
         }), 200
         
     except Exception as e:
-        print(f"❌ Image count API error: {e}")
+        log.exception("Image count API error: %s", e)
         return jsonify({"error": str(e)}), 500
@@ -2,10 +2,22 @@
 Disease Report API Route
 """
 from flask import Blueprint, request, jsonify
-from gemini_service import generate_disease_report
+from gemini_service import generate_disease_report, generate_class_report, fallback_class_report, report_cache_stats
+from utils.class_names import CLASS_NAMES, split_class_name
+from utils.report_store import ReportStore, REPORT_STORE_ENABLED, REPORT_STORE_PATH
+import logging
 import time
 
 disease_report_bp = Blueprint('disease_report', __name__)
+log = logging.getLogger(__name__)
+
+# Reports for every model label, precomputed by precompute_reports.py
+report_store = ReportStore(
+    REPORT_STORE_PATH,
+    class_names=CLASS_NAMES,
+    generate_fn=generate_class_report,
+    fallback_fn=fallback_class_report,
+) if REPORT_STORE_ENABLED else None
 
 
 @disease_report_bp.route("/api/disease-report", methods=["POST"])
@@ -15,7 +27,8 @@ def get_disease_report():
     
     Request JSON:
         {
-            "disease": "Crop___Disease_Name"
+            "disease": "Crop___Disease_Name",
+            "language": "en" (optional, "en" or "hi")
         }
     
     Response JSON:
@@ -28,45 +41,43 @@ def get_disease_report():
         start_time = time.time()
         data = request.json
         disease_full_name = data.get("disease")
+        language = data.get("language") or "en"
         
         if not disease_full_name:
-            print("❌ Disease name missing in request")
+            log.warning("Disease name missing in request")
             return jsonify({"error": "Disease name required"}), 400
         
-        print(f"\n{'='*60}")
-        print(f"📋 REQUEST: Generating report for: {disease_full_name}")
-        print(f"{'='*60}")
-        
         # Extract crop and disease from format "Crop___Disease"
-        parts = disease_full_name.split("___")
-        crop_name = parts[0] if len(parts) > 0 else "Unknown"
-        disease_name = parts[1] if len(parts) > 1 else disease_full_name
-        
-        # Fallback for simple disease names (no ___ separator)
-        if crop_name == "Unknown":
-            crop_name = "Crop"
-            disease_name = disease_full_name
+        crop_name, disease_name = split_class_name(disease_full_name)
+        log.info("Report requested for %s (crop: %s, disease: %s, language: %s)",
+                 disease_full_name, crop_name, disease_name, language)
         
-        print(f"   ├─ Crop: {crop_name}")
-        print(f"   └─ Disease: {disease_name}")
+        # Precomputed report for known model labels (English only)
+        report = None
+        if report_store is not None and language == "en":
+            report = report_store.get(disease_full_name)
+        if report is not None:
+            elapsed = time.time() - start_time
+            log.info("Served precomputed report in %.2fms", elapsed * 1000)
+            return jsonify({
+                "disease": disease_full_name,
+                "ai_report": dict(report, source="store", language="en")
+            }), 200
         
         # Generate report using Gemini (with timeout protection)
-        print(f"\n⏳ Calling Gemini API... (this may take 10-30 seconds)")
-        report = generate_disease_report(crop_name, disease_name)
+        report = generate_disease_report(crop_name, disease_name, language)
         elapsed = time.time() - start_time
-        print(f"✅ Gemini responded in {elapsed:.2f}s")
         
         # Validate report contains required fields
         if not report:
-            print("❌ Report generation returned None")
+            log.error("Report generation returned None")
             return jsonify({"error": "Failed to generate report"}), 500
         
         required_fields = ["crop_name", "disease_name", "symptoms", "severity"]
         missing_fields = [field for field in required_fields if field not in report]
         
         if missing_fields:
-            print(f"❌ Report missing required fields: {missing_fields}")
-            print(f"   Available fields: {list(report.keys())}")
+            log.error("Report missing required fields %s (available: %s)", missing_fields, list(report.keys()))
             return jsonify({
                 "error": "Incomplete report",
                 "missing_fields": missing_fields,
@@ -74,25 +85,27 @@ def get_disease_report():
             }), 500
         
         # Log successful generation
-        print(f"\n✅ REPORT VALIDATED & READY")
-        print(f"   ├─ Crop: {report.get('crop_name')}")
-        print(f"   ├─ Disease: {report.get('disease_name')}")
-        print(f"   ├─ Severity: {report.get('severity')}")
-        print(f"   ├─ Symptoms: {len(report.get('symptoms', []))} items")
-        print(f"   ├─ Treatment: {len(report.get('treatment', []))} items")
-        print(f"   └─ Total response time: {elapsed:.2f}s")
+        log.info("Report ready in %.2fs (severity: %s, %d symptoms, %d treatments)",
+                 elapsed, report.get("severity"),
+                 len(report.get("symptoms", [])), len(report.get("treatment", [])))
         
         # Return successful response
         response = {
             "disease": disease_full_name,
             "ai_report": report
         }
-        print(f"\n📤 Sending response to frontend...")
         return jsonify(response), 200
         
     except Exception as e:
-        print(f"\n❌ DISEASE REPORT API ERROR")
-        print(f"   Error: {str(e)}")
-        import traceback
-        print("\n" + traceback.format_exc())
+        log.exception("Disease report API error: %s", e)
         return jsonify({"error": str(e), "type": type(e).__name__}), 500
+
+
+
+@disease_report_bp.route("/api/disease-report/stats", methods=["GET"])
+def get_disease_report_stats():
+    """Precomputed store and live-generation cache / coalescing counts"""
+    return jsonify({
+        "report_store": report_store.stats() if report_store is not None else {"enabled": False},
+        "live_generation": report_cache_stats(),
+    }), 200
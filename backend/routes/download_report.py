@@ -1,10 +1,121 @@
 """
 PDF Download API Route
+
+Rendered PDFs are cached by a canonical hash of (disease, ai_report,
+language, scan_date) and the renderer's RENDER_VERSION, so re-downloads and
+language switches back and forth don't re-render, while a new layout never
+serves (or 304s) a PDF from the old one. Caching policy for the per-report
+fields:
+    - Report ID: the first 8 hex digits of the content hash, so the same
+      report always gets the same ID
+    - Scan date: the client's "scan_date" when sent (part of the hash);
+      otherwise when that content was first rendered, which a cached PDF keeps
+
+The hash is sent as a weak ETag: the same report rendered twice (after a
+cache eviction or restart) is the same document, but not the same bytes,
+since the render time and PDF metadata differ.
+
+Settings (environment variables):
+    PDF_CACHE_ENABLED   - "true" (default) to cache rendered PDFs
+    PDF_CACHE_MAX_BYTES - total size of cached PDFs per worker (default 64MB)
+    PDF_CACHE_TTL       - seconds a rendered PDF is kept (default 86400)
 """
+import hashlib
+import io
+import json
+import logging
+import os
+from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file
-from utils.pdf_generator import generate_pdf_report
+from utils.cache import MemoryCache
+from utils.pdf_generator import RENDER_VERSION, render_pdf_bytes
 
 download_report_bp = Blueprint('download_report', __name__)
+log = logging.getLogger(__name__)
+
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+PDF_CACHE_TTL = int(os.getenv("PDF_CACHE_TTL", 86400))
+
+pdf_cache = MemoryCache(
+    max_entries=100000,
+    ttl_seconds=PDF_CACHE_TTL,
+    max_bytes=PDF_CACHE_MAX_BYTES,
+    name="pdf",
+) if PDF_CACHE_ENABLED else None
+
+
+def report_content_hash(disease, ai_report, language, scan_date=None):
+    """Canonical SHA-256 of everything that ends up in the PDF"""
+    content = {
+        "disease": disease, "ai_report": ai_report, "language": language,
+        "render_version": RENDER_VERSION,
+    }
+    if scan_date is not None:
+        content["scan_date"] = scan_date.isoformat(timespec="minutes")
+    canonical = json.dumps(
+        content,
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def prepare_report_payload(data):
+    """
+    Normalize a download request body
+    
+    Returns:
+        (report_data, language, content_hash, report_id)
+    """
+    # Extract parameters
+    language = data.get("language", "en")
+    disease = data.get("disease", "Unknown")
+    ai_report = data.get("ai_report", {})
+    scan_date = parse_scan_date(data.get("scan_date"))
+    
+    # Validate language
+    if language not in ["en", "hi"]:
+        language = "en"
+    
+    # Validate report data exists
+    if not ai_report:
+        log.warning("No AI report provided, using minimal data")
+        ai_report = {
+            "crop_name": disease.split("___")[0] if "___" in disease else "Unknown",
+            "disease_name": disease,
+            "severity": "Unknown",
+            "symptoms": ["No data available"],
+            "treatment": ["Consult agricultural expert"],
+            "affected_area": "Unknown",
+            "recovery_timeline": "Unknown",
+            "prevention_tips": ["Regular monitoring"]
+        }
+    
+    # Prepare report data
+    report_data = {
+        "disease": disease,
+        "ai_report": ai_report,
+        "scan_date": scan_date,
+    }
+    
+    content_hash = report_content_hash(disease, ai_report, language, scan_date)
+    return report_data, language, content_hash, content_hash[:8].upper()
+
+
+def parse_scan_date(value):
+    """ISO 8601 scan date from the request, or None when missing or invalid"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        log.warning("Ignoring invalid scan_date %r", value[:40])
+        return None
+
+
+def etag_matches(etag):
+    """True if the client sent If-None-Match with this ETag (weak comparison)"""
+    return request.if_none_match.contains_weak(etag) or request.if_none_match.star_tag
 
 
 @download_report_bp.route("/api/download-report", methods=["POST"])
@@ -16,70 +127,62 @@ def download_pdf_report():
         {
             "disease": "Crop___Disease_Name",
             "language": "en" or "hi",
-            "ai_report": { ... }
+            "ai_report": { ... },
+            "scan_date": "2026-03-14T09:30" (optional, ISO 8601)
         }
     
     Response:
-        PDF file with proper headers for download
+        PDF file with proper headers for download, and a weak ETag; send
+        it back in If-None-Match to get 304 Not Modified for the same report
     """
     try:
         data = request.json
         
-        # Extract parameters
-        language = data.get("language", "en")
-        disease = data.get("disease", "Unknown")
-        ai_report = data.get("ai_report", {})
+        report_data, language, content_hash, report_id = prepare_report_payload(data)
         
-        # Validate language
-        if language not in ["en", "hi"]:
-            language = "en"
+        # Client already has this exact report
+        if etag_matches(content_hash):
+            log.info("PDF not modified - Report ID: %s", report_id)
+            return "", 304, {"ETag": f'W/"{content_hash}"'}
         
-        # Validate report data exists
-        if not ai_report:
-            print("⚠️  No AI report provided, using minimal data")
-            ai_report = {
-                "crop_name": disease.split("___")[0] if "___" in disease else "Unknown",
-                "disease_name": disease,
-                "severity": "Unknown",
-                "symptoms": ["No data available"],
-                "treatment": ["Consult agricultural expert"],
-                "affected_area": "Unknown",
-                "recovery_timeline": "Unknown",
-                "prevention_tips": ["Regular monitoring"]
-            }
+        pdf_bytes = pdf_cache.get(content_hash) if pdf_cache is not None else None
+        cache_status = "HIT" if pdf_bytes is not None else "MISS"
         
-        # Prepare report data
-        report_data = {
-            "disease": disease,
-            "ai_report": ai_report
-        }
-        
-        # Output filename
-        filename = "disease_report.pdf"
-        
-        print(f"📄 Generating PDF report...")
-        print(f"   Disease: {disease}")
-        print(f"   Language: {language}")
-        print(f"   Report data keys: {list(ai_report.keys())}")
-        
-        # Generate PDF
-        report_id = generate_pdf_report(report_data, filename, language=language)
+        if pdf_bytes is None:
+            # Generate PDF in memory (nothing shared between concurrent requests)
+            _, pdf_bytes = render_pdf_bytes(report_data, language=language, report_id=report_id)
+            if pdf_cache is not None:
+                pdf_cache.set(content_hash, pdf_bytes)
+            
+            log.info("PDF generated - Report ID: %s (disease: %s, language: %s)",
+                     report_id, report_data["disease"], language)
+        else:
+            log.info("PDF served from cache - Report ID: %s", report_id)
         
-        print(f"✅ PDF generated successfully - Report ID: {report_id}")
-        
-        # Send PDF file with proper headers
-        return send_file(
-            filename,
+        # Send PDF with proper headers
+        response = send_file(
+            io.BytesIO(pdf_bytes),
             mimetype="application/pdf",
             as_attachment=True,
-            download_name=f"FasalRakshak_Report_{report_id}.pdf"
+            download_name=f"FasalRakshak_Report_{report_id}.pdf",
+            etag=False,
+            conditional=False,
         )
+        response.set_etag(content_hash, weak=True)
+        response.headers["X-Cache"] = cache_status
+        return response
         
     except Exception as e:
-        print(f"❌ PDF generation error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("PDF generation error: %s", e)
         return jsonify({
             "error": "Failed to generate PDF",
             "details": str(e)
         }), 500
+
+
+@download_report_bp.route("/api/download-report/stats", methods=["GET"])
+def download_report_stats():
+    """Rendered-PDF cache hit/miss counts and size"""
+    return jsonify({
+        "pdf_cache": pdf_cache.stats() if pdf_cache is not None else {"enabled": False}
+    }), 200
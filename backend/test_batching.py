@@ -0,0 +1,98 @@
+"""
+Micro-batching: batches flush when full or when the wait runs out
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.batching import MicroBatcher
+
+
+class RecordingModel:
+    """Returns each input row's sum and records the batch sizes it saw"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, inputs):
+        self.batch_sizes.append(len(inputs))
+        return inputs.reshape(len(inputs), -1).sum(axis=1, keepdims=True)
+
+
+def submit_concurrently(batcher, inputs):
+    results = [None] * len(inputs)
+
+    def submit(i):
+        results[i] = batcher.submit(inputs[i], timeout=5)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(inputs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_full_batch_is_flushed_without_waiting():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=10_000)
+
+    start = time.perf_counter()
+    results = submit_concurrently(batcher, [np.full((1, 2, 2, 1), i) for i in range(4)])
+    assert time.perf_counter() - start < 5
+    assert model.batch_sizes == [4]
+    assert [float(result[0, 0]) for result in results] == [0.0, 4.0, 8.0, 12.0]
+    assert batcher.stats()["batch_size_histogram"] == {"4": 1}
+
+
+def test_partial_batch_is_flushed_after_the_wait():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=16, max_wait_ms=50)
+
+    start = time.perf_counter()
+    result = batcher.submit(np.ones((2, 2, 2, 1)), timeout=5)
+    elapsed = time.perf_counter() - start
+    assert 0.04 <= elapsed < 2
+    assert model.batch_sizes == [2]
+    assert result.tolist() == [[4.0], [4.0]]
+
+
+def test_request_that_would_overflow_starts_the_next_batch():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=200)
+
+    results = submit_concurrently(batcher, [np.ones((3, 1, 1, 1)), np.ones((3, 1, 1, 1))])
+    assert model.batch_sizes == [3, 3]
+    assert [len(result) for result in results] == [3, 3]
+
+
+def test_model_errors_reach_every_caller_in_the_batch():
+    def failing_model(inputs):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(failing_model, max_batch_size=2, max_wait_ms=1000)
+    errors = []
+
+    def submit():
+        with pytest.raises(ValueError) as excinfo:
+            batcher.submit(np.ones((1, 1, 1, 1)), timeout=5)
+        errors.append(str(excinfo.value))
+
+    threads = [threading.Thread(target=submit) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == ["bad batch", "bad batch"]
+
+
+def test_submit_times_out_when_the_model_is_stuck():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda inputs: release.wait() and inputs, max_batch_size=1, max_wait_ms=0)
+    try:
+        with pytest.raises(TimeoutError):
+            batcher.submit(np.ones((1, 1, 1, 1)), timeout=0.05)
+    finally:
+        release.set()
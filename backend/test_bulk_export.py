@@ -0,0 +1,53 @@
+"""
+Bulk export: per-item manifest statuses and abandoned async jobs
+"""
+import io
+import json
+import os
+import time
+import zipfile
+
+from flask import Flask
+
+from routes import bulk_export
+
+
+def make_client():
+    app = Flask(__name__)
+    app.register_blueprint(bulk_export.bulk_export_bp)
+    return app.test_client()
+
+
+def test_manifest_reports_each_item():
+    response = make_client().post("/api/bulk-export", json={"reports": [
+        {"disease": "Tomato___Late_blight", "language": "hi", "ai_report": {"severity": "High"}},
+        "not a report",
+        {"disease": "Apple___healthy"},
+    ]})
+    assert response.status_code == 200
+
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        names = archive.namelist()
+    assert (manifest["total"], manifest["completed"], manifest["failed"]) == (3, 2, 1)
+    assert [item["status"] for item in manifest["items"]] == ["done", "failed", "done"]
+    assert manifest["items"][0]["language"] == "hi"
+    assert manifest["items"][1]["error"] == "Report payload must be a JSON object"
+    for item in (manifest["items"][0], manifest["items"][2]):
+        assert item["filename"] in names
+
+
+def test_abandoned_job_is_reported_as_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_export, "BULK_EXPORT_DIR", str(tmp_path))
+    os.makedirs(bulk_export._job_dir("abc123"))
+    bulk_export._write_status("abc123", {"job_id": "abc123", "status": "running", "total": 5})
+    assert bulk_export._read_status("abc123")["status"] == "running"
+
+    stale = time.time() - bulk_export.BULK_EXPORT_STALE_AFTER - 1
+    os.utime(os.path.join(bulk_export._job_dir("abc123"), "status.json"), (stale, stale))
+    response = make_client().get("/api/bulk-export/abc123")
+    assert response.json["status"] == "failed" and "restarted" in response.json["error"]
+
+    bulk_export._write_status("abc123", {"job_id": "abc123", "status": "done", "total": 5})
+    os.utime(os.path.join(bulk_export._job_dir("abc123"), "status.json"), (stale, stale))
+    assert bulk_export._read_status("abc123")["status"] == "done"
@@ -0,0 +1,86 @@
+"""
+/api/chat/gemini/stream: Server-Sent Event framing, headers and client disconnects
+"""
+import json
+
+import pytest
+from flask import Flask
+
+import gemini_service
+from routes.chat import chat_bp
+from utils.llm_client import LLMClient, FakeTransport
+from utils.llm_providers import LLMProvider
+
+CHAT = {"email": "farmer@example.com", "message": "How do I treat late blight?"}
+
+
+def parse_events(body):
+    """[(event, payload)] from a text/event-stream body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def use_transport(monkeypatch, transport, **kwargs):
+    provider = LLMProvider("fake", LLMClient(transport, timeout=2, max_retries=0, **kwargs))
+    monkeypatch.setattr(gemini_service, "chat_provider", provider)
+    return provider
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(chat_bp)
+    return app.test_client()
+
+
+def test_tokens_then_done(client, monkeypatch):
+    use_transport(monkeypatch, FakeTransport(response="Spray copper fungicide"))
+    response = client.post("/api/chat/gemini/stream", json=CHAT)
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["X-Accel-Buffering"] == "no"
+
+    events = parse_events(response.get_data(as_text=True))
+    assert [event for event, _ in events] == ["token", "token", "token", "done"]
+    assert "".join(payload["text"] for _, payload in events[:-1]) == "Spray copper fungicide"
+    done = events[-1][1]
+    assert done["reply"] == "Spray copper fungicide" and done["chunks"] == 3 and done["source"] == "fake"
+    assert done["ttft_ms"] is not None and done["total_ms"] >= done["ttft_ms"]
+
+
+def test_upstream_failure_ends_with_an_error_event(client, monkeypatch):
+    use_transport(monkeypatch, FakeTransport(error_rate=1.0, error=ConnectionError("upstream down")))
+    events = parse_events(client.post("/api/chat/gemini/stream", json=CHAT).get_data(as_text=True))
+
+    assert [event for event, _ in events] == ["error"]
+    assert events[0][1] == {"error": "fake error: upstream down", "partial_reply": ""}
+
+
+def test_invalid_request_is_a_json_error(client):
+    response = client.post("/api/chat/gemini/stream", json={"message": "hi"})
+    assert response.status_code == 400
+    assert response.json == {"error": "Email is required"}
+
+
+def test_disconnect_frees_the_upstream_slot(client, monkeypatch):
+    # The long answer would take 5s, longer than the 2s slot wait below
+    def answer(prompt):
+        return "ok" if prompt == "hi" else " ".join(["word"] * 100)
+
+    transport = FakeTransport(response=answer, token_latency=0.05)
+    provider = use_transport(monkeypatch, transport, max_concurrency=1)
+
+    response = client.post("/api/chat/gemini/stream", json=CHAT, buffered=False)
+    first = next(iter(response.response))
+    assert first.startswith(b"event: token")
+    response.close()
+
+    # With one upstream slot, the next stream only starts if the first let go
+    events = parse_events(client.post("/api/chat/gemini/stream", json=dict(CHAT, message="hi")).get_data(as_text=True))
+    assert events[-1][0] == "done" and events[-1][1]["reply"] == "ok"
+    assert provider.stats()["upstream"]["rejected_overloaded"] == 0
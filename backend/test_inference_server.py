@@ -0,0 +1,172 @@
+"""
+Shared inference server: wire framing, socket round trips, restarts and timeouts
+"""
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import inference_server
+from utils.inference_client import InferenceClient, InferenceUnavailableError, recv_message, send_message
+
+NUM_CLASSES = 38
+
+
+class CountingModel:
+    """Returns row i of the batch as a one-hot on its first pixel value"""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, batch):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        rows = np.zeros((len(batch), NUM_CLASSES), dtype=np.float32)
+        rows[np.arange(len(batch)), batch[:, 0, 0, 0] % NUM_CLASSES] = 1.0
+        return rows
+
+
+class RestartableServer(inference_server.InferenceServer):
+    """Keeps its connections so a restart can drop them like a dying process would"""
+
+    def __init__(self, socket_path, infer):
+        self.connections = []
+        super().__init__(socket_path, infer)
+
+    def process_request(self, request, client_address):
+        self.connections.append(request)
+        super().process_request(request, client_address)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        os.unlink(self.server_address)
+        for connection in self.connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def socket_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference_server, "BATCHING_ENABLED", False)
+    return str(tmp_path / "inference.sock")
+
+
+def start_server(socket_path, infer):
+    server = RestartableServer(socket_path, infer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def batch_of(*values):
+    batch = np.zeros((len(values), 4, 4, 3), dtype=np.uint8)
+    batch[:, 0, 0, 0] = values
+    return batch
+
+
+def test_framing_round_trip():
+    left, right = socket.socketpair()
+    with left, right:
+        array = np.arange(24, dtype=np.float32).reshape(2, 3, 4)
+        send_message(left, {"op": "predict"}, array)
+        header, received = recv_message(right)
+        assert header == {"op": "predict", "shape": [2, 3, 4], "dtype": "float32"}
+        np.testing.assert_array_equal(received, array)
+
+        send_message(right, {"stats": {"batches": 3}})
+        assert recv_message(left) == ({"stats": {"batches": 3}}, None)
+
+        left.close()
+        with pytest.raises(ConnectionError):
+            recv_message(right)
+
+
+def test_predict_and_stats_over_the_socket(socket_path):
+    model = CountingModel()
+    server = start_server(socket_path, model)
+    try:
+        client = InferenceClient(socket_path, retry_seconds=2, timeout=5)
+        predictions = client.predict(batch_of(3, 7))
+        assert predictions.shape == (2, NUM_CLASSES)
+        assert list(np.argmax(predictions, axis=1)) == [3, 7]
+        assert client.stats()["enabled"] is False
+    finally:
+        server.stop()
+
+
+def test_model_errors_come_back_as_error_frames(socket_path):
+    model = CountingModel(error=ValueError("bad input shape"))
+    server = start_server(socket_path, model)
+    try:
+        client = InferenceClient(socket_path, retry_seconds=2, timeout=5)
+        with pytest.raises(RuntimeError, match="bad input shape"):
+            client.predict(batch_of(1))
+        # The connection stays usable
+        model.error = None
+        assert client.predict(batch_of(2)).shape == (1, NUM_CLASSES)
+    finally:
+        server.stop()
+
+
+def test_batch_timeout_is_not_resent(socket_path):
+    # MicroBatcher.submit raises TimeoutError, an OSError subclass
+    model = CountingModel(error=TimeoutError("Prediction not ready after 30.0s"))
+    server = start_server(socket_path, model)
+    try:
+        client = InferenceClient(socket_path, retry_seconds=5, timeout=5)
+        start = time.perf_counter()
+        with pytest.raises(RuntimeError, match="Prediction not ready"):
+            client.predict(batch_of(1))
+        assert time.perf_counter() - start < 1
+        assert model.calls == 1
+    finally:
+        server.stop()
+
+
+def test_slow_server_times_out_without_resending(socket_path):
+    model = CountingModel(delay=1.0)
+    server = start_server(socket_path, model)
+    try:
+        client = InferenceClient(socket_path, retry_seconds=5, timeout=0.2)
+        with pytest.raises(InferenceUnavailableError, match="timed out"):
+            client.predict(batch_of(1))
+        time.sleep(1.0)
+        assert model.calls == 1
+    finally:
+        server.stop()
+
+
+def test_client_reconnects_after_a_restart(socket_path):
+    first = start_server(socket_path, CountingModel())
+    client = InferenceClient(socket_path, retry_seconds=5, timeout=5)
+    assert client.predict(batch_of(4)).shape == (1, NUM_CLASSES)
+    first.stop()
+
+    # The restarted server comes up while the client is already retrying
+    second_model = CountingModel()
+    restarted = []
+    threading.Timer(0.3, lambda: restarted.append(start_server(socket_path, second_model))).start()
+    try:
+        assert list(np.argmax(client.predict(batch_of(5)), axis=1)) == [5]
+        assert second_model.calls == 1
+    finally:
+        time.sleep(0.35)
+        for server in restarted:
+            server.stop()
+
+
+def test_unreachable_server_gives_up_after_the_retry_window(socket_path):
+    client = InferenceClient(socket_path, retry_seconds=0.3, timeout=1)
+    start = time.perf_counter()
+    with pytest.raises(InferenceUnavailableError, match="unavailable"):
+        client.predict(batch_of(1))
+    assert time.perf_counter() - start < 2
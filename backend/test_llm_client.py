@@ -0,0 +1,157 @@
+"""
+Behaviour checks for the resilient LLM client against a local fake upstream
+"""
+import threading
+import time
+
+import pytest
+
+from utils.llm_client import (
+    LLMClient, FakeTransport, CircuitBreaker,
+    CircuitOpenError, LLMOverloadedError, LLMTimeoutError,
+)
+
+
+def make_client(transport, **kwargs):
+    kwargs.setdefault("timeout", 0.5)
+    kwargs.setdefault("max_retries", 0)
+    kwargs.setdefault("retry_base_delay", 0.01)
+    return LLMClient(transport, **kwargs)
+
+
+def test_returns_upstream_text():
+    client = make_client(FakeTransport(response="hello"))
+    assert client.generate("hi") == "hello"
+    assert client.stats()["successes"] == 1
+
+
+def test_deadline_frees_the_caller():
+    client = make_client(FakeTransport(latency=2.0), timeout=0.2)
+    start = time.perf_counter()
+    with pytest.raises(LLMTimeoutError):
+        client.generate("slow")
+    assert time.perf_counter() - start < 1.0
+    assert client.stats()["timeouts"] == 1
+
+
+def test_transient_errors_are_retried():
+    attempts = []
+
+    class Flaky:
+        def generate(self, prompt, timeout=None):
+            attempts.append(prompt)
+            if len(attempts) < 3:
+                raise ConnectionError("reset by peer")
+            return "ok"
+
+    client = make_client(Flaky(), max_retries=2)
+    assert client.generate("retry me") == "ok"
+    assert len(attempts) == 3
+    assert client.stats()["retries"] == 2
+
+
+def test_non_transient_errors_are_not_retried():
+    transport = FakeTransport(error_rate=1.0, error=ValueError)
+    client = make_client(transport, max_retries=3)
+    with pytest.raises(ValueError):
+        client.generate("bad request")
+    assert transport.calls == 1
+
+
+def test_breaker_opens_and_recovers():
+    transport = FakeTransport(response="ok", error_rate=1.0)
+    client = make_client(transport, breaker=CircuitBreaker(failure_threshold=3, reset_seconds=0.2))
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            client.generate("x")
+    assert client.breaker.state == "open"
+
+    # Fails fast without calling the upstream
+    calls = transport.calls
+    with pytest.raises(CircuitOpenError):
+        client.generate("x")
+    assert transport.calls == calls
+
+    # Half-open trial succeeds once the upstream is healthy again
+    transport.error_rate = 0.0
+    time.sleep(0.25)
+    assert client.generate("x") == "ok"
+    assert client.breaker.state == "closed"
+
+
+def test_concurrency_is_bounded():
+    transport = FakeTransport(latency=0.3)
+    client = make_client(transport, timeout=0.1, max_concurrency=2)
+    errors = []
+
+    def call():
+        try:
+            client.generate("x")
+        except (LLMOverloadedError, LLMTimeoutError) as e:
+            errors.append(type(e))
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Only two calls ever reach the upstream; the rest are turned away locally
+    assert transport.calls == 2
+    assert errors.count(LLMOverloadedError) == 4
+
+
+def test_stream_yields_chunks_and_frees_slot_on_disconnect():
+    transport = FakeTransport(response="one two three", token_latency=0.01)
+    client = make_client(transport, max_concurrency=1)
+    assert list(client.stream("x")) == ["one ", "two ", "three"]
+
+    # A client that disconnects after the first chunk must not keep the slot
+    abandoned = client.stream("x")
+    next(abandoned)
+    abandoned.close()
+    assert "".join(client.stream("x")) == "one two three"
+
+
+def test_gemini_transport_matches_the_installed_sdk():
+    """GeminiTransport's calls go through the real GenerativeModel.generate_content; only the network is stubbed"""
+    import inspect
+
+    genai = pytest.importorskip("google.generativeai")
+    from google.ai import generativelanguage as glm
+    from utils.llm_client import GeminiTransport
+
+    def reply(text):
+        return glm.GenerateContentResponse(candidates=[{"content": {"parts": [{"text": text}], "role": "model"}}])
+
+    class OfflineClient:
+        def __init__(self):
+            self.requests = []
+
+        def generate_content(self, request, **kwargs):
+            self.requests.append(request)
+            return reply("Spray copper fungicide.")
+
+        def stream_generate_content(self, request, **kwargs):
+            self.requests.append(request)
+            return iter([reply("Spray "), reply("copper.")])
+
+    model = genai.GenerativeModel("gemini-test")
+    model._client = OfflineClient()
+    named = inspect.signature(genai.GenerativeModel.generate_content).parameters
+    call_kwargs = []
+    real_generate_content = model.generate_content
+
+    def recording_generate_content(*args, **kwargs):
+        call_kwargs.append(set(kwargs))
+        return real_generate_content(*args, **kwargs)
+
+    model.generate_content = recording_generate_content
+    transport = GeminiTransport(lambda: model)
+
+    assert transport.generate("How do I treat late blight?", timeout=5) == "Spray copper fungicide."
+    assert "".join(transport.stream("How do I treat late blight?", timeout=5)) == "Spray copper."
+    assert len(model._client.requests) == 2
+    for kwargs in call_kwargs:
+        assert kwargs <= set(named), kwargs
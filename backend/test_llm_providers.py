@@ -0,0 +1,81 @@
+"""
+Checks for the pluggable LLM providers and per-route selection
+
+Needs no network or API key.
+"""
+import pytest
+
+from utils.llm_client import LLMClient, FakeTransport
+from utils.llm_providers import (
+    LLMProvider, LocalProvider, OfflineProvider, GeminiProvider, get_provider,
+)
+
+
+def test_local_provider_is_deterministic():
+    provider = LocalProvider(latency=0)
+    assert provider.generate("How do I treat rust?") == provider.generate("How do I treat rust?")
+    report = provider.report("Tomato", "Late blight")
+    assert report == provider.report("Tomato", "Late blight")
+    assert report["crop_name"] == "Tomato" and report["severity"] in ("Low", "Medium", "High")
+    assert "".join(provider.stream("hello there")) == provider.generate("hello there")
+    assert provider.stats()["latency"]["calls"] == 6
+
+
+def test_offline_reports_use_templates():
+    import gemini_service
+
+    provider = OfflineProvider()
+    raw = provider.report("Tomato", "Tomato_Yellow_Leaf_Curl_Virus")
+    assert raw["severity"] == "High"
+
+    # normalize_report() completes the template into a full report
+    report = gemini_service.normalize_report(raw, "Tomato", "Tomato_Yellow_Leaf_Curl_Virus")
+    assert report["spread_risk"] == "High" and report["prevention"]
+    assert provider.report("Apple", "healthy")["severity"] == "Low"
+    assert provider.generate("anything")
+
+
+def test_provider_latency_and_errors_are_tracked():
+    provider = LLMProvider("fake", LLMClient(FakeTransport(response="not json"), max_retries=0))
+    with pytest.raises(ValueError):
+        provider.report("Tomato", "Late blight")
+    latency = provider.stats()["latency"]
+    assert latency["calls"] == 1 and latency["errors"] == 1 and latency["p50_ms"] is not None
+
+
+def test_failures_are_labelled_with_the_provider(monkeypatch):
+    import gemini_service
+
+    transport = FakeTransport(error_rate=1.0, error=ConnectionError("upstream down"))
+    failing = LLMProvider("broken", LLMClient(transport, max_retries=0))
+    monkeypatch.setattr(gemini_service, "chat_provider", failing)
+    monkeypatch.setattr(gemini_service, "report_provider", failing)
+    assert gemini_service.generate_with_fallback("hi").startswith("broken error:")
+    report = gemini_service.generate_disease_report("Potato", "Late blight")
+    assert report["source"] == "fallback"
+
+
+def test_specs_select_and_share_providers():
+    assert isinstance(get_provider("offline"), OfflineProvider)
+    assert get_provider("local") is get_provider("local")
+    gemini = get_provider("gemini:gemini-2.5-flash-lite", api_key="test-key")
+    assert isinstance(gemini, GeminiProvider) and gemini.model_name == "gemini-2.5-flash-lite"
+    with pytest.raises(ValueError):
+        get_provider("unknown")
+
+
+def test_routes_use_their_own_provider(monkeypatch):
+    import gemini_service
+    from utils.llm_providers import OFFLINE_CHAT_REPLY
+
+    monkeypatch.setattr(gemini_service, "chat_provider", get_provider("offline"))
+    monkeypatch.setattr(gemini_service, "report_provider", get_provider("local"))
+    assert gemini_service.generate_with_fallback("hi") == OFFLINE_CHAT_REPLY
+    assert gemini_service.chat_source() == "offline"
+    report = gemini_service.generate_disease_report("Potato", "Early blight")
+    assert report["disease_description"].startswith("Local test report")
+    assert report["source"] == "local" and report["language"] == "en"
+
+    # The stand-in providers write English only, and say so
+    hindi = gemini_service.generate_disease_report("Potato", "Early blight", "hi")
+    assert hindi["language"] == "en"
@@ -0,0 +1,64 @@
+"""
+Checks for the queued, sampled request logging
+"""
+import logging
+import queue
+
+from flask import Flask
+
+from utils import logging_setup
+from utils.logging_setup import DroppingQueueHandler, RequestIdFilter, SamplingFilter, TextFormatter
+
+
+def make_record(msg, *args, level=logging.INFO):
+    return logging.LogRecord("routes.chat", level, __file__, 1, msg, args, None)
+
+
+def test_sampling_limits_repeats_per_template():
+    sampler = SamplingFilter(burst=3, window=60)
+    passed = [sampler.filter(make_record("Chat request from %s", f"user{i}")) for i in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    assert sampler.filter(make_record("Another message"))
+    assert sampler.filter(make_record("Chat failed", level=logging.ERROR))
+
+    # The next record let through reports what was suppressed
+    sampler.window = 0
+    record = make_record("Chat request from %s", "user10")
+    assert sampler.filter(record) and record.suppressed == 7
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(make_record("line %d", i))
+    assert handler.dropped == 3 and handler.queue.qsize() == 2
+
+    # Arguments are merged before queueing; the drop count rides on the next record
+    first = handler.queue.get_nowait()
+    assert first.getMessage() == "line 0" and first.args is None
+    handler.queue.get_nowait()
+    handler.handle(make_record("after"))
+    record = handler.queue.get_nowait()
+    assert record.dropped == 3
+    assert "3 records dropped" in TextFormatter().format(record)
+
+
+def test_request_id_is_echoed_and_stamped():
+    app = Flask(__name__)
+    logging_setup.init_app(app)
+    stamped = []
+
+    @app.route("/ping")
+    def ping():
+        record = make_record("ping")
+        RequestIdFilter().filter(record)
+        stamped.append(record.request_id)
+        return "pong"
+
+    client = app.test_client()
+    response = client.get("/ping", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["X-Request-ID"] == "abc-123" and stamped[-1] == "abc-123"
+
+    response = client.get("/ping")
+    assert response.headers["X-Request-ID"] == stamped[-1] != "abc-123"
+    assert logging_setup.request_id_var.get() == "-"
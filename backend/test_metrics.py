@@ -0,0 +1,87 @@
+"""
+Checks for the stage metrics, the cross-process /metrics merge and the
+per-request Server-Timing breakdown
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils import metrics
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    """Snapshots go to a fresh directory per test"""
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    return str(tmp_path)
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics.observe("test_buckets", 0.0001)
+    metrics.observe("test_buckets", 0.003)
+    metrics.observe("test_buckets", 100.0)
+    text = metrics.render_prometheus()
+    assert 'fasalrakshak_stage_seconds_bucket{stage="test_buckets",le="0.0005"} 1' in text
+    assert 'fasalrakshak_stage_seconds_bucket{stage="test_buckets",le="0.005"} 2' in text
+    assert 'fasalrakshak_stage_seconds_bucket{stage="test_buckets",le="30.0"} 2' in text
+    assert 'fasalrakshak_stage_seconds_bucket{stage="test_buckets",le="+Inf"} 3' in text
+    assert 'fasalrakshak_stage_seconds_count{stage="test_buckets"} 3' in text
+
+
+def test_other_processes_are_merged(metrics_dir):
+    metrics.count("cache_requests_total", cache="test_merge", result="hit")
+    child = (
+        "from utils import metrics\n"
+        "metrics.count('cache_requests_total', 2, cache='test_merge', result='hit')\n"
+        "metrics.observe('test_merge', 0.01)\n"
+        "metrics.flush()\n"
+    )
+    env = dict(os.environ, METRICS_DIR=metrics_dir)
+    subprocess.run([sys.executable, "-c", child], check=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    text = metrics.render_prometheus()
+    assert 'fasalrakshak_cache_requests_total{cache="test_merge",result="hit"} 3' in text
+    assert 'fasalrakshak_stage_seconds_count{stage="test_merge"} 1' in text
+
+
+def test_earlier_runs_are_not_merged(metrics_dir):
+    old_run = os.path.join(metrics_dir, "run-999999999-1")
+    os.makedirs(old_run)
+    with open(os.path.join(old_run, "process-1.json"), "w") as f:
+        f.write('{"histograms": [], "counters": [["cache_requests_total", [["cache", "test_old_run"]], 5]]}')
+
+    assert "test_old_run" not in metrics.render_prometheus()
+    metrics.clear_snapshots()
+    assert not os.path.exists(old_run)
+    assert os.path.isdir(os.path.join(metrics_dir, f"run-{metrics.METRICS_RUN_ID}"))
+
+
+def test_named_cache_reports_hits_and_misses():
+    from utils.cache import MemoryCache
+
+    cache = MemoryCache(name="test_cache")
+    cache.get("a")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    text = metrics.render_prometheus()
+    assert 'fasalrakshak_cache_requests_total{cache="test_cache",result="hit"} 2' in text
+    assert 'fasalrakshak_cache_requests_total{cache="test_cache",result="miss"} 1' in text
+
+
+def test_request_entries_become_server_timing():
+    from utils.request_timing import format_server_timing
+
+    token = metrics.begin_request()
+    metrics.count("cache_requests_total", cache="prediction", result="miss")
+    metrics.observe("decode", 0.002)
+    metrics.observe("decode", 0.001)
+    metrics.observe("inference", 0.0105)
+    entries = metrics.end_request(token)
+    metrics.observe("decode", 0.5)  # after the request: not collected
+
+    assert format_server_timing(entries, 0.02) == (
+        'cache-prediction;desc="miss", decode;dur=3.0, inference;dur=10.5, total;dur=20.0'
+    )
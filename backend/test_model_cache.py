@@ -0,0 +1,98 @@
+"""
+Model artifact cache: the first load caches a pre-normalized .keras file,
+later loads use it until the source H5 or TensorFlow version changes
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+import model_loader
+
+tf = model_loader.tf
+
+
+def save_h5(path, seed):
+    tf.keras.utils.set_random_seed(seed)
+    model = tf.keras.Sequential([tf.keras.Input(shape=(4,)), tf.keras.layers.Dense(3, activation="softmax")])
+    model.save(path)
+    mtime = os.stat(path).st_mtime_ns + seed * 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+    return model
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "cache"
+    monkeypatch.setattr(model_loader, "MODEL_CACHE_ENABLED", True)
+    monkeypatch.setattr(model_loader, "MODEL_CACHE_DIR", str(directory))
+    monkeypatch.setattr(model_loader, "STARTUP_TIMINGS", {})
+    return directory
+
+
+def load(model_path):
+    model = model_loader.load_model_with_fallback(model_path)
+    return model, model_loader.STARTUP_TIMINGS["model_source"]
+
+
+def test_miss_then_hit(tmp_path, cache_dir):
+    model_path = str(tmp_path / "leaf.h5")
+    original = save_h5(model_path, seed=1)
+    inputs = np.random.default_rng(0).random((2, 4), dtype=np.float32)
+
+    first, source = load(model_path)
+    assert source == "fallback"
+    cache_path = model_loader.cached_model_path(model_path, model_loader.artifact_sha256(model_path))
+    assert sorted(os.listdir(cache_dir)) == sorted([os.path.basename(cache_path), os.path.basename(cache_path) + ".json"])
+    with open(cache_path + ".json") as f:
+        assert json.load(f)["tensorflow"] == tf.__version__
+
+    cached, source = load(model_path)
+    assert source == "cache"
+    np.testing.assert_allclose(cached.predict(inputs, verbose=0), original.predict(inputs, verbose=0), rtol=1e-6)
+
+
+def test_new_source_file_replaces_the_cached_artifact(tmp_path, cache_dir):
+    model_path = str(tmp_path / "leaf.h5")
+    save_h5(model_path, seed=1)
+    load(model_path)
+    old_files = set(os.listdir(cache_dir))
+
+    retrained = save_h5(model_path, seed=2)
+    inputs = np.ones((1, 4), dtype=np.float32)
+    model, source = load(model_path)
+    assert source == "fallback"
+    assert not old_files & set(os.listdir(cache_dir)), "artifacts from the old file were kept"
+    np.testing.assert_allclose(model.predict(inputs, verbose=0), retrained.predict(inputs, verbose=0), rtol=1e-6)
+    assert load(model_path)[1] == "cache"
+
+
+def test_tensorflow_upgrade_rebuilds_the_cache(tmp_path, cache_dir, monkeypatch):
+    model_path = str(tmp_path / "leaf.h5")
+    save_h5(model_path, seed=1)
+    load(model_path)
+
+    monkeypatch.setattr(tf, "__version__", tf.__version__ + ".post1")
+    assert load(model_path)[1] == "fallback"
+    assert all(".post1" in name for name in os.listdir(cache_dir))
+
+
+def test_unreadable_cache_is_rebuilt(tmp_path, cache_dir):
+    model_path = str(tmp_path / "leaf.h5")
+    save_h5(model_path, seed=1)
+    load(model_path)
+    cache_path = model_loader.cached_model_path(model_path, model_loader.artifact_sha256(model_path))
+    with open(cache_path, "wb") as f:
+        f.write(b"truncated")
+
+    assert load(model_path)[1] == "fallback"
+    assert load(model_path)[1] == "cache"
+
+
+def test_disabled_cache_writes_nothing(tmp_path, cache_dir, monkeypatch):
+    model_path = str(tmp_path / "leaf.h5")
+    save_h5(model_path, seed=1)
+    monkeypatch.setattr(model_loader, "MODEL_CACHE_ENABLED", False)
+    assert load(model_path)[1] == "fallback"
+    assert not cache_dir.exists()
@@ -0,0 +1,133 @@
+"""
+Concurrent /api/download-report requests must each get their own PDF
+
+PDFs used to be written to one shared disease_report.pdf, so a request
+could be sent a file another request had just overwritten. Each request now
+renders into its own buffer; this fires distinct payloads from many threads
+and checks every response carries its own report ID and disease. It also
+checks that a repeat download is served from the rendered-PDF cache.
+"""
+import base64
+import os
+import re
+import threading
+import zlib
+
+from flask import Flask
+
+from routes import download_report
+from routes.download_report import download_report_bp
+
+NUM_REQUESTS = 24
+
+
+def make_client():
+    app = Flask(__name__)
+    app.register_blueprint(download_report_bp)
+    return app.test_client()
+
+
+def pdf_text(pdf_bytes):
+    """Decoded content of every stream (reportlab writes ASCII85 + Flate)"""
+    text = [pdf_bytes]
+    for stream in re.findall(rb"stream\r?\n(.*?)\r?\n?endstream", pdf_bytes, re.S):
+        try:
+            if stream.rstrip().endswith(b"~>"):
+                stream = base64.a85decode(stream.rstrip()[:-2], ignorechars=b" \t\r\n")
+            text.append(zlib.decompress(stream))
+        except (ValueError, zlib.error):
+            pass
+    return b"\n".join(text).decode("latin-1")
+
+
+def test_concurrent_downloads_get_their_own_report():
+    client = make_client()
+    results = {}
+    barrier = threading.Barrier(NUM_REQUESTS)
+
+    def download(i):
+        payload = {
+            "disease": f"Tomato___Test_disease_{i:03d}",
+            "language": "hi" if i % 2 else "en",
+            "ai_report": {
+                "crop_name": "Tomato",
+                "disease_name": f"Test disease {i:03d}",
+                "severity": "High",
+                "symptoms": [f"Symptom marker {i:03d}"],
+            },
+        }
+        barrier.wait()
+        response = client.post("/api/download-report", json=payload)
+        results[i] = response
+
+    threads = [threading.Thread(target=download, args=(i,)) for i in range(NUM_REQUESTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    report_ids = set()
+    for i, response in results.items():
+        assert response.status_code == 200, response.get_data(as_text=True)
+        match = re.search(r"FasalRakshak_Report_(\w+)\.pdf", response.headers["Content-Disposition"])
+        assert match, response.headers["Content-Disposition"]
+        report_id = match.group(1)
+        report_ids.add(report_id)
+
+        text = pdf_text(response.get_data())
+        assert report_id in text, f"request {i}: PDF does not contain its report ID {report_id}"
+        assert f"Tomato___Test_disease_{i:03d}" in text, f"request {i}: PDF belongs to another request"
+        assert f"Symptom marker {i:03d}" in text
+
+    assert len(report_ids) == NUM_REQUESTS
+    assert not os.path.exists("disease_report.pdf"), "PDF was written to disk"
+
+
+def test_repeat_download_is_cached_and_conditional():
+    client = make_client()
+    payload = {
+        "disease": "Potato___Early_blight",
+        "language": "en",
+        "ai_report": {"crop_name": "Potato", "severity": "Medium", "symptoms": ["Concentric rings"]},
+    }
+
+    first = client.post("/api/download-report", json=payload)
+    second = client.post("/api/download-report", json=dict(payload, ai_report=dict(reversed(payload["ai_report"].items()))))
+    assert first.status_code == second.status_code == 200
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.get_data() == second.get_data()
+    assert first.headers["Content-Disposition"] == second.headers["Content-Disposition"]
+
+    # Another language is another report
+    hindi = client.post("/api/download-report", json=dict(payload, language="hi"))
+    assert hindi.headers["ETag"] != first.headers["ETag"]
+
+    not_modified = client.post("/api/download-report", json=payload, headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b""
+    assert first.headers["ETag"].startswith('W/"') and not_modified.headers["ETag"] == first.headers["ETag"]
+
+
+def test_client_scan_date_is_part_of_the_report():
+    client = make_client()
+    payload = {"disease": "Potato___Early_blight", "language": "en", "ai_report": {"severity": "Low"}}
+    dated = dict(payload, scan_date="2026-03-14T09:30")
+
+    first = client.post("/api/download-report", json=dated)
+    assert first.headers["ETag"] != client.post("/api/download-report", json=payload).headers["ETag"]
+    assert "14 Mar 2026, 09:30" in pdf_text(first.get_data())
+
+    later = client.post("/api/download-report", json=dict(dated, scan_date="2026-03-15T09:30"))
+    assert later.headers["ETag"] != first.headers["ETag"]
+
+
+def test_new_render_version_invalidates_cached_pdfs(monkeypatch):
+    client = make_client()
+    payload = {"disease": "Apple___Apple_scab", "language": "en", "ai_report": {"severity": "Medium"}}
+    first = client.post("/api/download-report", json=payload)
+
+    monkeypatch.setattr(download_report, "RENDER_VERSION", download_report.RENDER_VERSION + 1)
+    rerendered = client.post("/api/download-report", json=payload, headers={"If-None-Match": first.headers["ETag"]})
+    assert rerendered.status_code == 200
+    assert rerendered.headers["X-Cache"] == "MISS"
+    assert rerendered.headers["ETag"] != first.headers["ETag"]
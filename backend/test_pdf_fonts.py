@@ -0,0 +1,45 @@
+"""
+Devanagari font: registered once from fonts/, embedded in Hindi PDFs, and
+Helvetica when the font file is unavailable
+"""
+import logging
+
+from utils import pdf_generator
+from utils.pdf_generator import render_pdf_bytes
+
+REPORT = {
+    "disease": "Tomato___Late_blight",
+    "ai_report": {
+        "crop_name": "टमाटर",
+        "disease_name": "पछेती झुलसा",
+        "severity": "High",
+        "symptoms": ["पत्तियों पर काले धब्बे"],
+        "treatment": ["Copper fungicide"],
+    },
+}
+
+
+def render(report_data, language):
+    return render_pdf_bytes(report_data, language=language, report_id="FONT0001")[1]
+
+
+def test_shipped_font_is_registered_and_embedded():
+    assert pdf_generator.DEVANAGARI_AVAILABLE
+    assert pdf_generator.font_for("पत्ती") == pdf_generator.DEVANAGARI_FONT
+    assert pdf_generator.font_for("Late blight", "Helvetica-Bold") == "Helvetica-Bold"
+
+    assert pdf_generator.DEVANAGARI_FONT.encode() in render(REPORT, "hi")
+    english = dict(REPORT, ai_report={"crop_name": "Tomato", "severity": "High"})
+    assert pdf_generator.DEVANAGARI_FONT.encode() not in render(english, "en")
+
+
+def test_missing_font_falls_back_to_helvetica(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(pdf_generator, "DEVANAGARI_FONT_PATH", str(tmp_path / "missing.ttf"))
+    with caplog.at_level(logging.WARNING, logger=pdf_generator.__name__):
+        assert pdf_generator._register_fonts() is False
+    assert "Devanagari font not available" in caplog.text
+
+    monkeypatch.setattr(pdf_generator, "DEVANAGARI_AVAILABLE", False)
+    assert pdf_generator.font_for("पत्ती") == "Helvetica"
+    pdf = render(REPORT, "hi")
+    assert pdf.startswith(b"%PDF") and pdf_generator.DEVANAGARI_FONT.encode() not in pdf
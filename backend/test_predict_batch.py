@@ -0,0 +1,48 @@
+"""
+/predict/batch: one bad upload fails only its own entry
+"""
+import io
+
+import pytest
+
+import app as backend
+
+
+@pytest.fixture
+def client(stand_in_model):
+    stand_in_model.predicted_index = 3
+    return backend.app.test_client()
+
+
+def test_invalid_image_fails_only_its_entry(client, stand_in_model, make_png):
+    response = client.post("/predict/batch", data={"images": [
+        (io.BytesIO(make_png("green")), "leaf1.png"),
+        (io.BytesIO(b"not an image"), "notes.txt"),
+        (io.BytesIO(make_png("brown")), "leaf2.png"),
+    ]}, content_type="multipart/form-data")
+    assert response.status_code == 200
+
+    results = response.json["results"]
+    assert response.json["count"] == 3
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert [result["filename"] for result in results] == ["leaf1.png", "notes.txt", "leaf2.png"]
+    assert results[1]["error"].startswith("Invalid image:") and "disease" not in results[1]
+    for result in (results[0], results[2]):
+        assert result["disease"] == backend.class_names[3] and "error" not in result
+    assert stand_in_model.batches == [2]
+
+
+def test_all_invalid_images_skip_the_model(client, stand_in_model):
+    response = client.post("/predict/batch", data={"images": [
+        (io.BytesIO(b""), "empty.jpg"),
+        (io.BytesIO(b"GIF89a broken"), "broken.gif"),
+    ]}, content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert all(result["error"].startswith("Invalid image:") for result in response.json["results"])
+    assert stand_in_model.batches == []
+
+
+def test_request_without_images_is_rejected(client):
+    response = client.post("/predict/batch", data={}, content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert response.json["error"] == "No images provided"
@@ -0,0 +1,106 @@
+"""
+Prediction cache: keys carry the model version, and a new model drops the cache
+"""
+import io
+import os
+
+import pytest
+
+import app as backend
+from utils import model_version
+from utils.cache import MemoryCache
+
+
+@pytest.fixture
+def served(stand_in_model, monkeypatch):
+    """Stand-in model with the prediction cache on; the test controls its loaded version"""
+    stand_in_model.startup_timings["model_version"] = "keras-aaaa"
+    monkeypatch.setattr(backend, "prediction_cache", MemoryCache(max_entries=16))
+    return stand_in_model
+
+
+def test_key_is_model_version_and_content_hash(served):
+    key = backend.prediction_cache_key(b"leaf")
+    assert key.startswith("keras-aaaa:")
+    assert key == backend.prediction_cache_key(b"leaf")
+    assert key != backend.prediction_cache_key(b"other leaf")
+
+    served.startup_timings["model_version"] = "int8-bbbb"
+    assert backend.prediction_cache_key(b"leaf") == key.replace("keras-aaaa", "int8-bbbb")
+
+
+def test_new_model_version_clears_the_cache(served, make_png):
+    client = backend.app.test_client()
+    upload = make_png("green")
+
+    def predict():
+        response = client.post("/predict", data={"image": (io.BytesIO(upload), "leaf.png")},
+                               content_type="multipart/form-data")
+        assert response.status_code == 200
+        return response.json
+
+    first = predict()
+    assert predict() == first
+    assert len(served.batches) == 1
+
+    served.startup_timings["model_version"] = "keras-cccc"
+    predict()
+    assert len(served.batches) == 2
+    assert backend.prediction_cache.stats()["size"] == 1
+
+
+def test_model_version_follows_the_file(tmp_path, monkeypatch):
+    path = tmp_path / "model.h5"
+    path.write_bytes(b"weights v1")
+    monkeypatch.setattr(model_version, "MODEL_PATH", str(path))
+    monkeypatch.setattr(model_version, "_hash_cache", {})
+
+    first = model_version.model_version("keras")
+    assert first.startswith("keras-") and first == model_version.model_version("keras")
+
+    path.write_bytes(b"weights v2, retrained")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert model_version.model_version("keras") != first
+
+    path.unlink()
+    assert model_version.model_version("keras") == "keras-missing"
+
+
+def test_key_follows_the_loaded_model_not_the_file(tmp_path, monkeypatch):
+    import model_loader
+
+    path = tmp_path / "model.h5"
+    path.write_bytes(b"weights v1")
+    monkeypatch.setattr(model_version, "MODEL_PATH", str(path))
+    monkeypatch.setattr(model_version, "_hash_cache", {})
+    # A configured int8 variant whose file is missing falls back to Keras
+    monkeypatch.setattr(model_loader, "MODEL_VARIANT", "int8")
+    monkeypatch.setattr(model_loader, "TFLITE_VARIANTS", {"int8": str(tmp_path / "missing.tflite")})
+    monkeypatch.setattr(model_loader, "load_model_with_fallback", lambda: object())
+    monkeypatch.setattr(model_loader, "build_inference_fn", lambda model, mode: None)
+    monkeypatch.setattr(model_loader, "STARTUP_TIMINGS", {})
+
+    model_loader.load_inference()
+    loaded = model_loader.STARTUP_TIMINGS["model_version"]
+    assert loaded == model_version.model_version("keras") and loaded.startswith("keras-")
+
+    # Replacing the file does not change what this process serves
+    path.write_bytes(b"weights v2, retrained")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    monkeypatch.setattr(backend, "inference_client", None)
+    monkeypatch.setattr(backend, "startup_timings", model_loader.STARTUP_TIMINGS)
+    monkeypatch.setattr(backend, "_cache_model_version", None)
+    assert model_version.model_version("keras") != loaded
+    assert backend.prediction_cache_key(b"leaf").startswith(f"{loaded}:")
+
+
+def test_shared_server_version_comes_from_its_replies(monkeypatch):
+    class Client:
+        model_version = None
+
+    monkeypatch.setattr(backend, "inference_client", Client())
+    monkeypatch.setattr(backend, "_cache_model_version", None)
+    assert backend.prediction_cache_key(b"leaf") is None
+
+    Client.model_version = "float16-dddd"
+    assert backend.prediction_cache_key(b"leaf").startswith("float16-dddd:")
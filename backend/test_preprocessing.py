@@ -0,0 +1,71 @@
+"""
+Same-output check for the uint8 preprocessing pipeline
+
+The request path used to divide pixels by 255.0 in numpy (float64) before
+model.predict(); it now hands uint8 pixels to a serving graph that rescales
+with a Rescaling layer. This verifies both paths give the same predictions.
+
+Uses models/MobileNetV2_best.h5 when present, otherwise a seeded stand-in.
+"""
+import io
+import os
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+import pytest
+import tensorflow as tf
+from PIL import Image
+
+from utils.inference import build_inference_fn
+from utils.model_version import MODEL_PATH
+from utils.preprocessing import decode_image, preprocess_image
+
+NUM_IMAGES = 8
+
+
+@pytest.fixture(scope="module")
+def model():
+    if os.path.exists(MODEL_PATH):
+        from model_loader import load_model_with_fallback
+        return load_model_with_fallback(MODEL_PATH)
+    tf.keras.utils.set_random_seed(0)
+    return tf.keras.applications.MobileNetV2(input_shape=(224, 224, 3), weights=None, classes=38)
+
+
+def sample_images():
+    rng = np.random.default_rng(0)
+    samples = []
+    for _ in range(NUM_IMAGES):
+        pixels = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+        samples.append(buffer.getvalue())
+    return samples
+
+
+def legacy_preprocess(image_bytes):
+    """The previous request-path preprocessing: float64 division in numpy"""
+    return np.array(decode_image(image_bytes)) / 255.0
+
+
+def test_preprocess_keeps_uint8():
+    array = preprocess_image(sample_images()[0])
+    assert array.dtype == np.uint8
+    assert array.shape == (224, 224, 3)
+
+
+def test_pixels_match_legacy_preprocessing():
+    for image_bytes in sample_images():
+        np.testing.assert_allclose(preprocess_image(image_bytes) / 255.0, legacy_preprocess(image_bytes))
+
+
+def test_predictions_unchanged(model):
+    samples = sample_images()
+
+    legacy = model.predict(np.stack([legacy_preprocess(b) for b in samples]), verbose=0)
+    batch = np.stack([preprocess_image(b) for b in samples])
+
+    for mode in ("compiled", "predict"):
+        current = build_inference_fn(model, mode)(batch)
+        np.testing.assert_allclose(current, legacy, rtol=1e-4, atol=1e-6)
+        assert np.array_equal(np.argmax(current, axis=1), np.argmax(legacy, axis=1)), mode
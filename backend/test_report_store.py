@@ -0,0 +1,123 @@
+"""
+Precomputed report store: format and content versions, reloads and refreshes
+"""
+import json
+import os
+
+from utils import report_store
+from utils.report_store import ReportStore, build_reports, read_store, write_store
+
+
+def make_report(crop="Tomato", disease="Late blight", severity="High"):
+    return {
+        "crop_name": crop,
+        "disease_name": disease,
+        "severity": severity,
+        "affected_area": "Leaves",
+        "recovery_timeline": "2-4 weeks",
+        "spread_risk": "High",
+        "disease_description": f"{disease} of {crop}.",
+        "symptoms": ["Dark lesions"],
+        "treatment": ["Copper fungicide"],
+        "organic_treatment": ["Neem oil"],
+        "fertilizer_recommendation": ["Balanced NPK"],
+        "prevention": ["Crop rotation"],
+    }
+
+
+def bump_mtime(path):
+    mtime = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_version_is_a_content_hash(tmp_path):
+    reports = {"Tomato___Late_blight": make_report()}
+    first = write_store(str(tmp_path / "a.json"), reports)
+    assert first == write_store(str(tmp_path / "b.json"), dict(reports))
+    assert first != write_store(str(tmp_path / "c.json"), {"Tomato___Late_blight": make_report(severity="Low")})
+
+    document = read_store(str(tmp_path / "a.json"))
+    assert document["format_version"] == report_store.FORMAT_VERSION
+    assert document["version"] == first
+
+
+def test_other_format_version_is_ignored(tmp_path):
+    path = tmp_path / "store.json"
+    path.write_text(json.dumps({
+        "format_version": report_store.FORMAT_VERSION + 1,
+        "version": "future",
+        "reports": {"Tomato___Late_blight": make_report()},
+    }))
+    assert read_store(str(path)) is None
+    assert read_store(str(tmp_path / "missing.json")) is None
+
+    store = ReportStore(str(path))
+    assert store.get("Tomato___Late_blight") is None
+    assert store.stats()["version"] is None
+
+
+def test_store_reloads_a_new_version(tmp_path):
+    path = str(tmp_path / "store.json")
+    first = write_store(path, {"Tomato___Late_blight": make_report()})
+    store = ReportStore(path)
+    assert store.stats()["version"] == first
+    assert not store.reload()
+
+    second = write_store(path, {"Tomato___Late_blight": make_report(severity="Medium")})
+    bump_mtime(path)
+    assert store.reload()
+    assert store.stats()["version"] == second
+    assert store.get("Tomato___Late_blight")["severity"] == "Medium"
+
+    # A file in another format leaves the loaded version in place
+    with open(path, "w") as f:
+        json.dump({"format_version": 0, "reports": {}}, f)
+    bump_mtime(path)
+    assert not store.reload()
+    assert store.stats()["version"] == second
+
+
+def test_failed_classes_keep_their_stored_report():
+    existing = {"Apple___healthy": make_report("Apple", "Healthy", "Low")}
+
+    def generate(full_name):
+        if full_name == "Apple___healthy":
+            return {"crop_name": "Apple"}
+        return make_report()
+
+    reports, failures = build_reports(
+        ["Apple___healthy", "Tomato___Late_blight"], generate, existing=existing, progress=lambda line: None,
+    )
+    assert reports == {"Apple___healthy": existing["Apple___healthy"], "Tomato___Late_blight": make_report()}
+    assert list(failures) == ["Apple___healthy"]
+
+
+def test_fallback_reports_are_rejected():
+    reports, failures = build_reports(
+        ["Tomato___Late_blight"], lambda name: make_report(), fallback_fn=lambda name: make_report(),
+        progress=lambda line: None,
+    )
+    assert reports == {}
+    assert failures == {"Tomato___Late_blight": "generation failed (fallback report returned)"}
+
+
+def test_route_labels_store_hits_like_live_reports(tmp_path, monkeypatch):
+    from flask import Flask
+
+    import gemini_service
+    from routes import disease_report
+    from utils.llm_providers import get_provider
+
+    path = str(tmp_path / "store.json")
+    write_store(path, {"Tomato___Late_blight": make_report()})
+    monkeypatch.setattr(disease_report, "report_store", ReportStore(path))
+    monkeypatch.setattr(gemini_service, "report_provider", get_provider("local"))
+    app = Flask(__name__)
+    app.register_blueprint(disease_report.disease_report_bp)
+    client = app.test_client()
+
+    stored = client.post("/api/disease-report", json={"disease": "Tomato___Late_blight"}).json["ai_report"]
+    live = client.post("/api/disease-report", json={"disease": "Potato___Early_blight"}).json["ai_report"]
+    assert stored["source"] == "store" and stored["language"] == "en"
+    assert live["source"] == "local" and live["language"] == "en"
+    assert set(stored) == set(live)
@@ -0,0 +1,93 @@
+"""
+Single-flight: concurrent calls for one key share a single execution
+"""
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def slow_call(calls, result=None, error=None):
+    """A call that takes long enough for every caller to join it"""
+    def call():
+        calls.append(1)
+        time.sleep(0.2)
+        if error is not None:
+            raise error
+        return result
+    return call
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    shared = slow_call(calls, result={"severity": "High"})
+
+    results = run_concurrently(8, lambda: flight.do("tomato", shared))
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_leader_error_reaches_every_caller():
+    flight = SingleFlight()
+    calls = []
+    failing = slow_call(calls, error=RuntimeError("upstream down"))
+
+    results = run_concurrently(4, lambda: flight.do("tomato", failing))
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) and str(result) == "upstream down" for result in results)
+
+    # Nothing is remembered: the next call runs again
+    assert flight.do("tomato", lambda: "retried") == "retried"
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    calls = []
+    call = slow_call(calls, result="report")
+
+    run_concurrently(2, lambda: flight.do(threading.current_thread().name, call))
+    assert len(calls) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_follower_timeout():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def leader_call():
+        started.set()
+        release.wait(5)
+        return "late"
+
+    leader = threading.Thread(target=flight.do, args=("tomato", leader_call))
+    leader.start()
+    started.wait(5)
+    try:
+        with pytest.raises(TimeoutError):
+            flight.do("tomato", lambda: "unused", timeout=0.05)
+    finally:
+        release.set()
+        leader.join()
+    assert flight.stats()["in_flight"] == 0
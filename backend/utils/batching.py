@@ -0,0 +1,193 @@
+"""
+Dynamic Micro-Batching for Model Inference
+
+Concurrent /predict requests hand their preprocessed tensors to a single
+background worker, which groups them into one batch, runs one forward pass
+and fans the rows of the result back out to the waiting requests.
+
+Settings (environment variables):
+    BATCHING_ENABLED   - "true" / "false" (default: true)
+    BATCH_MAX_SIZE     - max images per forward pass (default: 16)
+    BATCH_MAX_WAIT_MS  - how long the first request in a batch may wait
+                         for company before the batch is run (default: 10)
+
+A larger BATCH_MAX_SIZE / BATCH_MAX_WAIT_MS gives better throughput under
+load at the cost of extra latency for a lone request.
+"""
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+BATCHING_ENABLED = os.getenv("BATCHING_ENABLED", "true").lower() == "true"
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+
+class _PendingRequest:
+    """A tensor waiting for its slice of a batched prediction"""
+    __slots__ = ("inputs", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Collect tensors from concurrent callers and run them as one batch
+
+    Args:
+        predict_fn: callable taking an (N, H, W, C) array and returning (N, classes)
+        max_batch_size: max rows per forward pass
+        max_wait_ms: max time to hold a batch open waiting for more requests
+    """
+
+    def __init__(self, predict_fn, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._carry = None
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._batches = 0
+        self._requests = 0
+        self._samples = 0
+        self._queue_wait_total = 0.0
+        self._inference_total = 0.0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def submit(self, inputs, timeout=30.0):
+        """
+        Queue a batch of one or more samples and block until predicted
+
+        Args:
+            inputs: array of shape (n, H, W, C)
+            timeout: seconds to wait for the result
+
+        Returns:
+            np.ndarray: predictions of shape (n, classes)
+        """
+        self._ensure_worker()
+
+        pending = _PendingRequest(inputs)
+        self._queue.put(pending)
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"Prediction not ready after {timeout:.1f}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        """Return achieved batch sizes and timings for tuning"""
+        with self._stats_lock:
+            batches = self._batches
+            return {
+                "enabled": True,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": batches,
+                "requests": self._requests,
+                "samples": self._samples,
+                "mean_batch_size": round(self._samples / batches, 2) if batches else 0.0,
+                "batch_size_histogram": {
+                    str(size): count for size, count in sorted(self._batch_sizes.items())
+                },
+                "mean_queue_wait_ms": round(
+                    self._queue_wait_total / self._requests * 1000.0, 3
+                ) if self._requests else 0.0,
+                "mean_inference_ms": round(
+                    self._inference_total / batches * 1000.0, 3
+                ) if batches else 0.0,
+                "queue_depth": self._queue.qsize(),
+            }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _ensure_worker(self):
+        """Start the worker lazily (and again after a gunicorn fork)"""
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+                return
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._worker.start()
+
+    def _next_request(self, timeout=None):
+        if self._carry is not None:
+            pending, self._carry = self._carry, None
+            return pending
+        return self._queue.get(timeout=timeout) if timeout is not None else self._queue.get()
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until full or timed out"""
+        batch = [self._next_request()]
+        rows = len(batch[0].inputs)
+        deadline = time.perf_counter() + self.max_wait
+
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._next_request(timeout=remaining)
+            except queue.Empty:
+                break
+            if rows + len(pending.inputs) > self.max_batch_size:
+                # Would overflow this batch - it starts the next one instead
+                self._carry = pending
+                break
+            batch.append(pending)
+            rows += len(pending.inputs)
+
+        return batch, rows
+
+    def _run(self):
+        while True:
+            batch, rows = self._collect_batch()
+            started = time.perf_counter()
+
+            try:
+                inputs = batch[0].inputs if len(batch) == 1 else np.concatenate(
+                    [pending.inputs for pending in batch], axis=0
+                )
+                predictions = np.asarray(self.predict_fn(inputs))
+
+                offset = 0
+                for pending in batch:
+                    count = len(pending.inputs)
+                    pending.result = predictions[offset:offset + count]
+                    offset += count
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._samples += rows
+                self._batch_sizes[rows] += 1
+                self._inference_total += finished - started
+                self._queue_wait_total += sum(started - pending.enqueued_at for pending in batch)
+
+            for pending in batch:
+                pending.done.set()
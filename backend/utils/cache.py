@@ -0,0 +1,260 @@
+"""
+Bounded Caches with TTL and Hit/Miss Counters
+
+Two interchangeable backends:
+    MemoryCache - in-process LRU dict (fastest, per worker)
+    SQLiteCache - a local SQLite file shared by every worker on the box
+
+Both expose get / set / delete / clear / stats, so callers can switch
+backend through configuration alone (see create_cache()). Caches given a
+`name` also report hits and misses to utils.metrics for /metrics.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheBackend:
+    """Interface shared by all cache backends"""
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class _Counters:
+    """Thread-safe hit/miss/eviction counters"""
+
+    RESULTS = {"hits": "hit", "misses": "miss"}
+
+    def __init__(self, name=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def add(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+        if self.name and name in self.RESULTS:
+            metrics.count("cache_requests_total", amount, cache=self.name, result=self.RESULTS[name])
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with per-entry TTL
+
+    Args:
+        max_entries: entries kept before the least recently used is evicted
+        ttl_seconds: entry lifetime (None or 0 for no expiry)
+        max_bytes: optional total size bound, measured with sizeof(value);
+                   values larger than this are not cached at all
+        sizeof: size of a value in bytes (default len, e.g. for bytes values)
+        name: label for hit/miss metrics (no metrics when omitted)
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, max_bytes=None, sizeof=len, name=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds or None
+        self.max_bytes = max_bytes or None
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = _Counters(name)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at, size = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters.add("hits")
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+                self._counters.add("expirations")
+        self._counters.add("misses")
+        return default
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        size = self.sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._counters.add("evictions")
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+            total_bytes = self._bytes
+        stats = dict(
+            self._counters.snapshot(),
+            backend="memory",
+            size=size,
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl_seconds,
+        )
+        if self.max_bytes:
+            stats.update(bytes=total_bytes, max_bytes=self.max_bytes)
+        return stats
+
+
+class SQLiteCache(CacheBackend):
+    """
+    LRU cache with TTL in a local SQLite file, shared across worker processes
+
+    Values are pickled, so only use it for data this service wrote itself.
+    Hit/miss counters are per process.
+    """
+
+    def __init__(self, path, max_entries=1024, ttl_seconds=3600, table="cache", name=None):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds or None
+        self.table = table
+        self._local = threading.local()
+        self._counters = _Counters(name)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)"
+            )
+
+    def _connection(self):
+        """One connection per thread (and per process after a fork)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is not None:
+            value, expires_at = row
+            if expires_at is None or expires_at > now:
+                conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+                self._counters.add("hits")
+                return pickle.loads(value)
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._counters.add("expirations")
+
+        self._counters.add("misses")
+        return default
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        conn = self._connection()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at, now),
+        )
+
+        (count,) = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self._counters.add("evictions", overflow)
+
+    def delete(self, key):
+        self._connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connection().execute(f"DELETE FROM {self.table}")
+
+    def stats(self):
+        (size,) = self._connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return dict(
+            self._counters.snapshot(),
+            backend="sqlite",
+            path=self.path,
+            size=size,
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl_seconds,
+        )
+
+
+def create_cache(backend="memory", max_entries=1024, ttl_seconds=3600, path=None, table="cache", name=None):
+    """Build a cache from configuration ("memory" or "sqlite")"""
+    if backend == "sqlite":
+        return SQLiteCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds, table=table, name=name)
+    if backend != "memory":
+        log.warning("Unknown cache backend '%s', using in-process memory", backend)
+    return MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds, name=name)
@@ -0,0 +1,131 @@
+"""
+Compiled Inference Path for the Keras Model
+
+model.predict() builds a data adapter and runs the full predict loop on every
+call, which is pure overhead for the small batches /predict sends. Instead the
+model is wrapped once at startup in a tf.function with a fixed input signature
+(optionally XLA-compiled) and called directly from the request path.
+
+The request path hands over compact uint8 pixel batches; the 1/255 rescaling
+runs inside the serving graph as a Rescaling layer rather than as a float64
+numpy division per request.
+
+Quantized TFLite variants produced by convert_quantized.py can be served
+instead of the Keras model through MODEL_VARIANT.
+
+Settings (environment variables):
+    INFERENCE_MODE - "compiled" (default), "xla" or "predict"
+    MODEL_VARIANT  - "keras" (default), "float16" or "int8"
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+from utils.model_version import MODEL_VARIANT, TFLITE_VARIANTS
+
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "compiled").lower()
+INFERENCE_MODES = ("compiled", "xla", "predict")
+
+log = logging.getLogger(__name__)
+
+
+def build_serving_model(model):
+    """Wrap the model so it takes uint8 pixels and rescales to [0, 1] itself"""
+    inputs = tf.keras.Input(shape=tuple(model.input_shape[1:]), dtype="uint8")
+    rescaled = tf.keras.layers.Rescaling(1.0 / 255)(inputs)
+    return tf.keras.Model(inputs, model(rescaled, training=False))
+
+
+def build_inference_fn(model, mode=INFERENCE_MODE):
+    """
+    Build the function the request path uses to run a batch through the model
+
+    Args:
+        model: loaded Keras model (expects float input in [0, 1])
+        mode: "compiled" for a traced tf.function, "xla" for the same with
+              jit_compile=True, or "predict" for plain model.predict()
+
+    Returns:
+        callable: takes an (N, H, W, C) uint8 array, returns an (N, classes) np.ndarray
+    """
+    if mode not in INFERENCE_MODES:
+        log.warning("Unknown INFERENCE_MODE '%s', using 'compiled'", mode)
+        mode = "compiled"
+
+    serving_model = build_serving_model(model)
+
+    if mode == "predict":
+        return lambda batch: serving_model.predict(np.asarray(batch, dtype=np.uint8), verbose=0)
+
+    input_shape = tuple(model.input_shape[1:])
+    serve = tf.function(
+        lambda images: serving_model(images, training=False),
+        input_signature=[tf.TensorSpec(shape=(None,) + input_shape, dtype=tf.uint8)],
+        jit_compile=(mode == "xla"),
+    )
+
+    # Trace (and compile) once at startup instead of on the first request
+    serve(tf.zeros((1,) + input_shape, dtype=tf.uint8))
+
+    def infer(batch):
+        return serve(tf.convert_to_tensor(batch, dtype=tf.uint8)).numpy()
+
+    return infer
+
+
+def build_tflite_inference_fn(model_path, num_threads=None):
+    """
+    Build an inference function backed by a (possibly quantized) TFLite model
+
+    Takes the same uint8 (N, H, W, C) pixels as the Keras path and returns
+    float probabilities; rescaling and integer (de)quantization happen here
+    so callers don't need to know the variant.
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"TFLite model not found at {model_path}")
+
+    interpreter = tf.lite.Interpreter(
+        model_path=model_path,
+        num_threads=num_threads or os.cpu_count() or 1,
+    )
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+    input_index = input_detail["index"]
+    output_index = output_detail["index"]
+
+    # The interpreter is not thread-safe and must be resized per batch size
+    lock = threading.Lock()
+    current_batch = [int(input_detail["shape"][0])]
+
+    def quantize(batch):
+        dtype = input_detail["dtype"]
+        batch = batch.astype(np.float32) / 255.0
+        if dtype == np.float32:
+            return batch
+        scale, zero_point = input_detail["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def dequantize(output):
+        if output_detail["dtype"] == np.float32:
+            return output
+        scale, zero_point = output_detail["quantization"]
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def infer(batch):
+        batch = quantize(np.asarray(batch))
+        with lock:
+            if len(batch) != current_batch[0]:
+                interpreter.resize_tensor_input(input_index, batch.shape)
+                interpreter.allocate_tensors()
+                current_batch[0] = len(batch)
+            interpreter.set_tensor(input_index, batch)
+            interpreter.invoke()
+            output = interpreter.get_tensor(output_index).copy()
+        return dequantize(output)
+
+    return infer
@@ -0,0 +1,149 @@
+"""
+Client for the Shared Inference Server
+
+When INFERENCE_SOCKET is set, web workers don't load the model themselves:
+they send preprocessed uint8 tensors to inference_server.py over a Unix socket and
+get the prediction rows back, so N gunicorn workers share one model in RAM.
+
+Wire format (both directions):
+    4-byte big-endian header length | JSON header | raw array bytes
+
+Request headers:  {"op": "predict", "shape": [...], "dtype": "uint8"}
+                  {"op": "stats"}
+Response headers: {"shape": [...], "dtype": "float32", "model_version": "..."},
+                  {"stats": {...}} or {"error": "..."}
+
+Settings (environment variables):
+    INFERENCE_SOCKET         - socket path; enables shared-server mode
+    INFERENCE_RETRY_SECONDS  - how long to keep reconnecting while the
+                               server (re)starts before failing (default: 15)
+    INFERENCE_TIMEOUT        - per-request socket timeout in seconds (default: 30)
+"""
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET")
+INFERENCE_RETRY_SECONDS = float(os.getenv("INFERENCE_RETRY_SECONDS", "15"))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+
+_HEADER_LENGTH = struct.Struct("!I")
+
+
+class InferenceUnavailableError(RuntimeError):
+    """Raised when the inference server can't be reached within the retry window"""
+
+
+# ================================
+# WIRE PROTOCOL
+# ================================
+def _recv_exact(sock, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock, header, array=None):
+    """Send a JSON header followed by an optional array payload"""
+    if array is not None:
+        array = np.ascontiguousarray(array)
+        header = dict(header, shape=list(array.shape), dtype=str(array.dtype))
+    header_bytes = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER_LENGTH.pack(len(header_bytes)) + header_bytes)
+    if array is not None:
+        sock.sendall(memoryview(array).cast("B"))
+
+
+def recv_message(sock):
+    """Receive a message, returning (header, array or None)"""
+    (length,) = _HEADER_LENGTH.unpack(_recv_exact(sock, _HEADER_LENGTH.size))
+    header = json.loads(_recv_exact(sock, length).decode("utf-8"))
+    if "shape" not in header:
+        return header, None
+    dtype = np.dtype(header["dtype"])
+    shape = tuple(header["shape"])
+    payload = _recv_exact(sock, int(np.prod(shape)) * dtype.itemsize)
+    return header, np.frombuffer(payload, dtype=dtype).reshape(shape)
+
+
+# ================================
+# CLIENT
+# ================================
+class InferenceClient:
+    """
+    Thread-safe client; keeps one persistent connection per thread and
+    reconnects transparently if the server restarts
+    """
+
+    def __init__(self, socket_path, retry_seconds=INFERENCE_RETRY_SECONDS, timeout=INFERENCE_TIMEOUT):
+        self.socket_path = socket_path
+        self.retry_seconds = retry_seconds
+        self.timeout = timeout
+        self.model_version = None  # of the server's model, from its latest prediction
+        self._local = threading.local()
+
+    def predict(self, batch):
+        """Send an (N, H, W, C) uint8 batch and return the (N, classes) predictions"""
+        header, result = self._request({"op": "predict"}, np.asarray(batch, dtype=np.uint8))
+        self.model_version = header.get("model_version")
+        return result
+
+    def stats(self):
+        """Return the server's micro-batching stats"""
+        header, _ = self._request({"op": "stats"})
+        return header.get("stats", {})
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _request(self, header, array=None):
+        deadline = time.monotonic() + self.retry_seconds
+        delay = 0.05
+        last_error = None
+
+        while True:
+            try:
+                if getattr(self._local, "sock", None) is None:
+                    self._local.sock = self._connect()
+                send_message(self._local.sock, header, array)
+                response, result = recv_message(self._local.sock)
+                break
+            except socket.timeout as e:
+                # The server is alive but slow - don't resend the same work
+                self._close()
+                raise InferenceUnavailableError(f"Inference server timed out after {self.timeout:.0f}s") from e
+            except (ConnectionError, FileNotFoundError, OSError) as e:
+                # Server restarting (stale connection / missing socket) - retry
+                self._close()
+                last_error = e
+                if time.monotonic() + delay > deadline:
+                    raise InferenceUnavailableError(f"Inference server unavailable: {last_error}") from e
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+        if "error" in response:
+            raise RuntimeError(f"Inference server error: {response['error']}")
+        return response, result
@@ -0,0 +1,398 @@
+"""
+Resilient LLM Client
+
+Wraps a text-generation transport with:
+    - a per-call deadline (the caller stops waiting even if the upstream hangs)
+    - a concurrency limit, so a slow upstream can't take every worker thread
+    - retries with jittered exponential backoff for transient errors
+    - a circuit breaker that fails fast while the upstream is unhealthy
+
+Transports need generate(prompt, timeout) -> str and, for streaming,
+stream(prompt, timeout) -> iterator of text chunks. GeminiTransport talks to
+Gemini; FakeTransport injects latency and errors for tests and benchmarks.
+
+Settings (environment variables):
+    LLM_TIMEOUT               - seconds per attempt (default 20)
+    LLM_MAX_CONCURRENCY       - concurrent upstream calls per worker (default 4)
+    LLM_MAX_RETRIES           - retries after a transient error (default 2)
+    LLM_RETRY_BASE_DELAY      - first backoff in seconds, doubled per retry (default 0.5)
+    LLM_BREAKER_FAILURES      - consecutive failures that open the breaker (default 5)
+    LLM_BREAKER_RESET_SECONDS - how long the breaker stays open (default 30)
+    LLM_STREAM_BUFFER         - chunks buffered between upstream and a slow
+                                client before reading pauses (default 64)
+"""
+import os
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 20))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+LLM_STREAM_BUFFER = int(os.getenv("LLM_STREAM_BUFFER", 64))
+
+# google.api_core exception names worth retrying (matched by name so this
+# module doesn't import the Gemini SDK)
+TRANSIENT_ERROR_NAMES = {
+    "DeadlineExceeded", "ServiceUnavailable", "InternalServerError",
+    "ResourceExhausted", "TooManyRequests", "GatewayTimeout", "Aborted",
+}
+
+
+class LLMError(Exception):
+    """Base class for client-side failures"""
+
+
+class LLMTimeoutError(LLMError):
+    """The upstream did not answer before the deadline"""
+
+
+class LLMOverloadedError(LLMError):
+    """Too many calls in flight; no slot freed up before the deadline"""
+
+
+class CircuitOpenError(LLMError):
+    """The circuit breaker is open; the upstream is not being called"""
+
+
+def is_transient(error):
+    """Errors that are worth retrying"""
+    return isinstance(error, (LLMTimeoutError, ConnectionError, TimeoutError)) or \
+        type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+# ================================
+# TRANSPORTS
+# ================================
+class GeminiTransport:
+    """
+    Calls Gemini through gemini_service's lazily-configured model
+
+    The pinned SDK (google-generativeai 0.3.0) has no per-request timeout
+    option, so `timeout` is not passed on; LLMClient's deadline bounds the call.
+    """
+
+    def __init__(self, get_model):
+        self.get_model = get_model
+
+    def generate(self, prompt, timeout=None):
+        response = self.get_model().generate_content(prompt)
+        return response.text.strip() if response.text else ""
+
+    def stream(self, prompt, timeout=None):
+        response = self.get_model().generate_content(prompt, stream=True)
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeTransport:
+    """
+    Local stand-in for an LLM upstream
+
+    Args:
+        response: text to return, or callable(prompt) -> text
+        latency: seconds before the first token, or (min, max) for a uniform
+                 random latency
+        token_latency: seconds per word after the first; generate() waits for
+                       all of them, stream() yields each word as it "arrives"
+        error_rate: fraction of calls that raise `error`
+        error: exception instance (or class) raised on injected failures
+        seed: RNG seed for reproducible latency/error sequences
+    """
+
+    def __init__(self, response="{}", latency=0.0, token_latency=0.0, error_rate=0.0,
+                 error=ConnectionError, seed=None):
+        self.response = response
+        self.latency = latency
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.error = error
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _start_call(self, prompt):
+        with self._lock:
+            self.calls += 1
+            latency = self.latency if not isinstance(self.latency, tuple) else self._rng.uniform(*self.latency)
+            fail = self._rng.random() < self.error_rate
+
+        time.sleep(latency)
+        if fail:
+            raise self.error("injected upstream failure") if isinstance(self.error, type) else self.error
+        text = self.response(prompt) if callable(self.response) else self.response
+        return re.findall(r"\s*\S+\s*", text) or [text]
+
+    def generate(self, prompt, timeout=None):
+        tokens = self._start_call(prompt)
+        time.sleep(self.token_latency * (len(tokens) - 1))
+        return "".join(tokens)
+
+    def stream(self, prompt, timeout=None):
+        for i, token in enumerate(self._start_call(prompt)):
+            if i:
+                time.sleep(self.token_latency)
+            yield token
+
+
+# ================================
+# CIRCUIT BREAKER
+# ================================
+class CircuitBreaker:
+    """
+    closed -> (N consecutive failures) -> open -> (reset_seconds) -> half_open
+    half_open lets one trial call through: success closes, failure re-opens.
+    """
+
+    def __init__(self, failure_threshold=LLM_BREAKER_FAILURES, reset_seconds=LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._state = "half_open"
+            self._trial_in_flight = False
+
+    def allow(self):
+        """True if a call may go upstream now"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == "closed":
+                return True
+            if self._state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back a half-open trial slot that was never used"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self.times_opened += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+# ================================
+# CLIENT
+# ================================
+class LLMClient:
+    """
+    Deadline + concurrency limit + retries + circuit breaker around a transport
+
+    Args:
+        transport: object with generate(prompt, timeout) -> str
+        timeout: seconds per attempt
+        max_concurrency: upstream calls allowed in flight at once
+        max_retries: extra attempts after a transient error
+        retry_base_delay: backoff before the first retry (doubles each time)
+        breaker: CircuitBreaker instance (one is created when omitted)
+    """
+
+    def __init__(self, transport, timeout=LLM_TIMEOUT, max_concurrency=LLM_MAX_CONCURRENCY,
+                 max_retries=LLM_MAX_RETRIES, retry_base_delay=LLM_RETRY_BASE_DELAY, breaker=None):
+        self.transport = transport
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self.breaker = breaker or CircuitBreaker()
+
+        # Calls that outlive their deadline keep their slot until they really
+        # finish, so the semaphore bounds actual upstream concurrency
+        self.max_concurrency = max(1, max_concurrency)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+
+        self._lock = threading.Lock()
+        self._counts = {
+            "calls": 0, "successes": 0, "failures": 0, "retries": 0,
+            "timeouts": 0, "rejected_overloaded": 0, "rejected_circuit_open": 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def generate(self, prompt):
+        """
+        Generate text for a prompt
+
+        Raises:
+            CircuitOpenError, LLMOverloadedError, LLMTimeoutError, or the
+            transport's own exception once retries are exhausted
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("rejected_circuit_open")
+                raise CircuitOpenError("LLM upstream unhealthy, circuit open")
+
+            try:
+                text = self._attempt(prompt)
+            except LLMOverloadedError:
+                # Local back-pressure, not an upstream failure
+                self.breaker.release_trial()
+                self._count("rejected_overloaded")
+                raise
+            except Exception as e:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries or not is_transient(e):
+                    self._count("failures")
+                    raise
+                attempt += 1
+                self._count("retries")
+                # Full jitter: spread retries out so callers don't stampede together
+                time.sleep(random.uniform(0, self.retry_base_delay * (2 ** (attempt - 1))))
+                continue
+
+            self.breaker.record_success()
+            self._count("successes")
+            return text
+
+    def stream(self, prompt):
+        """
+        Yield text chunks as the upstream produces them
+
+        The upstream is read on a pool thread into a bounded buffer: if the
+        client reads slowly the buffer fills and reading pauses, and if the
+        client goes away (generator closed) the upstream stream is abandoned.
+        Each chunk must arrive within the per-call deadline. Streams are not
+        retried, since part of the answer may already have been sent.
+
+        Raises (while iterating):
+            CircuitOpenError, LLMOverloadedError, LLMTimeoutError, or the
+            transport's own exception
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected_circuit_open")
+            raise CircuitOpenError("LLM upstream unhealthy, circuit open")
+        if not self._slots.acquire(timeout=self.timeout):
+            self.breaker.release_trial()
+            self._count("rejected_overloaded")
+            raise LLMOverloadedError(f"{self.max_concurrency} LLM calls already in flight")
+
+        buffer = queue.Queue(maxsize=max(1, LLM_STREAM_BUFFER))
+        cancelled = threading.Event()
+
+        def put(item):
+            while not cancelled.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            chunks = None
+            try:
+                chunks = iter(self.transport.stream(prompt, self.timeout))
+                for text in chunks:
+                    if text and not put(("chunk", text)):
+                        return
+                put(("done", None))
+            except Exception as e:
+                put(("error", e))
+            finally:
+                if chunks is not None and hasattr(chunks, "close"):
+                    chunks.close()
+                self._slots.release()
+
+        try:
+            self._executor.submit(produce)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        finished = False
+        try:
+            while True:
+                try:
+                    kind, value = buffer.get(timeout=self.timeout)
+                except queue.Empty:
+                    self._count("timeouts")
+                    self.breaker.record_failure()
+                    finished = True
+                    raise LLMTimeoutError(f"No LLM output for {self.timeout:.1f}s") from None
+
+                if kind == "chunk":
+                    yield value
+                    continue
+
+                finished = True
+                if kind == "done":
+                    self.breaker.record_success()
+                    self._count("successes")
+                    return
+                self.breaker.record_failure()
+                self._count("failures")
+                raise value
+        finally:
+            cancelled.set()
+            if not finished:
+                # Client went away mid-stream: says nothing about upstream health
+                self.breaker.release_trial()
+
+    def _attempt(self, prompt):
+        """One upstream call; waiting for a slot counts against the deadline"""
+        deadline = time.monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            raise LLMOverloadedError(f"{self.max_concurrency} LLM calls already in flight")
+
+        try:
+            future = self._executor.submit(self.transport.generate, prompt, self.timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            self._count("timeouts")
+            raise LLMTimeoutError(f"LLM call exceeded {self.timeout:.1f}s deadline") from None
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return dict(
+            counts,
+            circuit_state=self.breaker.state,
+            circuit_opened=self.breaker.times_opened,
+            timeout_seconds=self.timeout,
+            max_concurrency=self.max_concurrency,
+        )
@@ -0,0 +1,380 @@
+"""
+Pluggable LLM Providers
+
+A provider answers free-text prompts (chat) and writes structured disease
+reports, and tracks its own latency. gemini_service picks one per route
+(LLM_PROVIDER_CHAT, LLM_PROVIDER_REPORT), so chat can go to a low-latency
+model while reports use a higher-quality one.
+
+Provider specs:
+    gemini            Gemini through LLMClient (GEMINI_MODEL, default gemini-2.5-flash)
+    gemini:<model>    a specific Gemini model, e.g. gemini:gemini-2.5-flash-lite
+    local             deterministic local stand-in for tests and benchmarks: same
+                      prompt, same text; runs through LLMClient with configurable
+                      latency, so timeouts and concurrency limits behave as with Gemini
+    offline           template answers that need no network (reports are
+                      completed by normalize_report())
+
+report() returns the raw report dict; callers normalize it. The local and
+offline providers write English only; report_language() says which
+language a report for a requested language will actually be in.
+
+Settings (environment variables):
+    GEMINI_MODEL         - model for the "gemini" spec (default gemini-2.5-flash)
+    LLM_LOCAL_LATENCY_MS - "local" provider latency before the first token (default 0)
+    LLM_LOCAL_TOKEN_MS   - "local" provider latency per following word (default 0)
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from utils import metrics
+from utils.llm_client import LLMClient, GeminiTransport, FakeTransport
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+LLM_LOCAL_LATENCY_MS = float(os.getenv("LLM_LOCAL_LATENCY_MS", 0))
+LLM_LOCAL_TOKEN_MS = float(os.getenv("LLM_LOCAL_TOKEN_MS", 0))
+
+LANGUAGE_NAMES = {"en": "English", "hi": "Hindi"}
+
+
+# ================================
+# REPORT PROMPT
+# ================================
+def build_report_prompt(crop_name, disease_name, language="en"):
+    """Prompt asking for a strict-JSON disease report"""
+    language_rule = ""
+    if language != "en":
+        language_rule = f"6. Write every text value in {LANGUAGE_NAMES.get(language, language)}\n"
+
+    return f"""
+You are an expert agricultural scientist and senior government crop advisor.
+
+Generate an ACCURATE and COMPLETE plant disease report for a farmer.
+
+MANDATORY RULES:
+1. Respond ONLY in valid JSON format
+2. NO markdown, NO explanations, NO extra text
+3. EVERY field MUST be filled
+4. Severity must be Low, Medium, or High
+5. All arrays must have at least 3 items
+{language_rule}
+Crop Name: {crop_name}
+Disease Name: {disease_name}
+
+Return this JSON structure exactly.
+"""
+
+
+def parse_report_json(raw_text):
+    """First JSON object in a model response (raises ValueError if there is none)"""
+    if not raw_text:
+        raise ValueError("Empty model response")
+
+    match = re.search(r"\{[\s\S]*\}", raw_text)
+    if not match:
+        raise ValueError("No valid JSON found")
+    return json.loads(match.group())
+
+
+# ================================
+# LATENCY
+# ================================
+class LatencyTracker:
+    """Call count, errors and latency percentiles over the most recent calls"""
+
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += error
+            self.total_seconds += seconds
+            self._recent.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self._recent)
+            calls, errors, total = self.calls, self.errors, self.total_seconds
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 1) if recent else None
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "mean_ms": round(total / calls * 1000, 1) if calls else None,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+
+# ================================
+# PROVIDERS
+# ================================
+class LLMProvider:
+    """
+    Provider backed by an LLMClient (any transport)
+
+    Every call is timed into the provider's own latency stats and into the
+    utils.metrics stage named after the provider (e.g. "gemini").
+    """
+
+    deterministic = False
+    report_languages = None  # languages report() can write; None = whatever the prompt asks for
+
+    def __init__(self, name, client=None):
+        self.name = name
+        self.client = client
+        self.latency = LatencyTracker()
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception:
+            self._record(start, error=True)
+            raise
+        self._record(start)
+        return result
+
+    def _record(self, start, error=False):
+        elapsed = time.perf_counter() - start
+        self.latency.record(elapsed, error)
+        metrics.observe(self.name, elapsed)
+
+    def generate(self, prompt):
+        """Text answer to a prompt (raises on failure)"""
+        return self._timed(self._generate, prompt)
+
+    def stream(self, prompt):
+        """Yield the answer chunk by chunk (raises on failure)"""
+        start = time.perf_counter()
+        try:
+            yield from self._stream(prompt)
+        except Exception:
+            self._record(start, error=True)
+            raise
+        self._record(start)
+
+    def report(self, crop_name, disease_name, language="en"):
+        """Raw disease report dict (raises on failure)"""
+        return self._timed(self._report, crop_name, disease_name, language)
+
+    def report_language(self, language):
+        """Language a report requested in `language` is written in"""
+        if self.report_languages is None or language in self.report_languages:
+            return language
+        return self.report_languages[0]
+
+    def _generate(self, prompt):
+        return self.client.generate(prompt)
+
+    def _stream(self, prompt):
+        return self.client.stream(prompt)
+
+    def _report(self, crop_name, disease_name, language):
+        return parse_report_json(self.client.generate(build_report_prompt(crop_name, disease_name, language)))
+
+    def stats(self):
+        stats = {"provider": self.name, "latency": self.latency.snapshot()}
+        if self.client is not None:
+            stats["upstream"] = self.client.stats()
+        return stats
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini model through the resilient LLMClient; the SDK is configured on first use"""
+
+    def __init__(self, api_key, model_name=GEMINI_MODEL, name="gemini"):
+        super().__init__(name, LLMClient(GeminiTransport(self.get_model)))
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def get_model(self):
+        """Return the Gemini model, configuring the client on first call"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    if not self.api_key:
+                        raise RuntimeError(
+                            "❌ GEMINI_API_KEY not found.\n"
+                            "👉 Add GEMINI_API_KEY in backend/.env file"
+                        )
+                    # google.generativeai is slow to import, so only on first use
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def stats(self):
+        return dict(super().stats(), model=self.model_name)
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic local stand-in: the same prompt always gets the same answer
+
+    Runs through LLMClient over a FakeTransport, so benchmarks see the same
+    deadline, concurrency and streaming behaviour as with Gemini.
+
+    Args:
+        latency: seconds before the first token, or (min, max) for uniform random
+        token_latency: seconds per following word
+    """
+
+    deterministic = True
+    report_languages = ("en",)
+
+    def __init__(self, latency=LLM_LOCAL_LATENCY_MS / 1000, token_latency=LLM_LOCAL_TOKEN_MS / 1000, name="local"):
+        transport = FakeTransport(response=self.respond, latency=latency, token_latency=token_latency)
+        super().__init__(name, LLMClient(transport))
+
+    @staticmethod
+    def respond(prompt):
+        crop = re.search(r"^Crop Name: (.*)$", prompt, re.MULTILINE)
+        disease = re.search(r"^Disease Name: (.*)$", prompt, re.MULTILINE)
+        if crop and disease:
+            return json.dumps(LocalProvider.local_report(crop.group(1), disease.group(1)))
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return f"Local response {digest}: {' '.join(prompt.split()[:40])}"
+
+    @staticmethod
+    def local_report(crop_name, disease_name):
+        digest = int(hashlib.sha256(f"{crop_name}/{disease_name}".encode()).hexdigest(), 16)
+        return {
+            "crop_name": crop_name,
+            "disease_name": disease_name,
+            "severity": ("Low", "Medium", "High")[digest % 3],
+            "affected_area": "Leaves",
+            "recovery_timeline": f"{2 + digest % 3}-{4 + digest % 3} weeks",
+            "spread_risk": ("Low", "Medium", "High")[digest // 3 % 3],
+            "disease_description": f"Local test report for {disease_name} on {crop_name}.",
+            "symptoms": [f"{disease_name} symptom {i}" for i in range(1, 4)],
+            "treatment": [f"{disease_name} treatment {i}" for i in range(1, 4)],
+            "organic_treatment": [f"Organic option {i}" for i in range(1, 4)],
+            "prevention": [f"Prevention step {i}" for i in range(1, 4)],
+        }
+
+
+# Offline report templates, matched on words in the disease name (first match wins)
+OFFLINE_TEMPLATES = (
+    (("healthy",), {
+        "severity": "Low",
+        "spread_risk": "Low",
+        "recovery_timeline": "Not applicable",
+        "disease_description": "No disease was detected. The plant looks healthy.",
+        "symptoms": ["No visible symptoms", "Normal leaf colour", "Normal growth"],
+        "treatment": ["No treatment needed", "Continue regular care", "Keep monitoring leaves weekly"],
+        "organic_treatment": ["Compost application", "Mulching to retain moisture"],
+    }),
+    (("virus", "mosaic", "curl"), {
+        "severity": "High",
+        "spread_risk": "High",
+        "disease_description": "A viral disease, usually spread by insects such as whiteflies or aphids. "
+                               "Infected plants cannot be cured.",
+        "symptoms": ["Mottled or mosaic leaf pattern", "Curled or distorted leaves", "Stunted growth"],
+        "treatment": ["Remove and destroy infected plants", "Control insect vectors",
+                      "Disinfect tools after handling infected plants"],
+        "organic_treatment": ["Neem oil spray against vectors", "Yellow sticky traps"],
+        "prevention": ["Use virus-free seed and seedlings", "Control whiteflies and aphids early",
+                       "Remove weeds that host the virus"],
+    }),
+    (("bacterial",), {
+        "severity": "Medium",
+        "disease_description": "A bacterial disease that spreads through water splash, tools and infected seed.",
+        "symptoms": ["Water-soaked spots on leaves", "Spots with yellow halos", "Leaf drop"],
+        "treatment": ["Remove infected leaves", "Apply copper-based bactericide",
+                      "Avoid working with wet plants"],
+        "organic_treatment": ["Copper soap spray", "Remove crop debris"],
+    }),
+    (("mite",), {
+        "severity": "Medium",
+        "disease_description": "Damage caused by spider mites feeding on the underside of leaves.",
+        "symptoms": ["Fine yellow speckling on leaves", "Webbing under leaves", "Leaf bronzing"],
+        "treatment": ["Spray leaves with water to dislodge mites", "Apply a miticide if severe",
+                      "Remove heavily infested leaves"],
+        "organic_treatment": ["Neem oil spray", "Insecticidal soap"],
+    }),
+    (("blight", "rot", "mildew", "rust", "spot", "scab", "mold", "scorch", "measles"), {
+        "severity": "Medium",
+        "disease_description": "A fungal disease favoured by humid weather and wet leaves.",
+        "symptoms": ["Brown or dark spots on leaves", "Yellowing around lesions", "Premature leaf drop"],
+        "treatment": ["Remove infected plant parts", "Apply a recommended fungicide",
+                      "Avoid overhead irrigation"],
+        "organic_treatment": ["Neem oil spray", "Trichoderma application"],
+    }),
+)
+
+OFFLINE_CHAT_REPLY = (
+    "The AI assistant is offline right now, so here is general advice. "
+    "Remove badly infected leaves, avoid overhead watering, keep good spacing between plants "
+    "and contact your local agriculture extension officer for a diagnosis. "
+    "Please try again later for a detailed answer."
+)
+
+
+class OfflineProvider(LLMProvider):
+    """Template answers with no network access; reports are completed by normalize_report()"""
+
+    deterministic = True
+    report_languages = ("en",)
+
+    def __init__(self, name="offline"):
+        super().__init__(name)
+
+    def _generate(self, prompt):
+        return OFFLINE_CHAT_REPLY
+
+    def _stream(self, prompt):
+        yield from re.findall(r"\s*\S+\s*", OFFLINE_CHAT_REPLY)
+
+    def _report(self, crop_name, disease_name, language):
+        words = disease_name.lower()
+        for keywords, template in OFFLINE_TEMPLATES:
+            if any(keyword in words for keyword in keywords):
+                return dict(template, crop_name=crop_name, disease_name=disease_name)
+        return {"crop_name": crop_name, "disease_name": disease_name}
+
+
+# ================================
+# SELECTION
+# ================================
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(spec, api_key=None):
+    """
+    Provider for a spec string ("gemini", "gemini:<model>", "local", "offline")
+
+    Routes that name the same spec share one provider, and so one
+    concurrency limit and circuit breaker.
+    """
+    spec = (spec or "gemini").strip().lower()
+    with _providers_lock:
+        provider = _providers.get(spec)
+        if provider is None:
+            kind, _, option = spec.partition(":")
+            if kind == "gemini":
+                provider = GeminiProvider(api_key, model_name=option or GEMINI_MODEL, name=spec)
+            elif kind == "local":
+                provider = LocalProvider(name=spec)
+            elif kind == "offline":
+                provider = OfflineProvider(name=spec)
+            else:
+                raise ValueError(f"Unknown LLM provider '{spec}' (use gemini, gemini:<model>, local or offline)")
+            _providers[spec] = provider
+    return provider
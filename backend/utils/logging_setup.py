@@ -0,0 +1,254 @@
+"""
+Asynchronous Buffered Logging
+
+Request threads never write to stdout themselves: log records go through a
+bounded queue to one background writer thread (QueueHandler +
+QueueListener). When the queue is full, because stdout or the log
+collector is slower than the app, new records are dropped and counted
+instead of blocking requests.
+
+Each record carries the request ID. It is taken from an incoming
+X-Request-ID header or generated, and echoed in the response. Repetitive
+INFO/DEBUG messages are sampled: at most LOG_SAMPLE_BURST records per
+message template per LOG_SAMPLE_WINDOW seconds. The next record that gets
+through reports how many were suppressed. Warnings and errors are never
+sampled. Use %-style arguments (log.info("Report for %s", name)) so
+records with the same template group together.
+
+Drops and suppressions are also counted in /metrics
+(log_records_dropped_total, log_records_suppressed_total).
+
+Settings (environment variables):
+    LOG_LEVEL         - DEBUG, INFO (default), WARNING, ERROR
+    LOG_FORMAT        - "text" (default) or "json" (one object per line)
+    LOG_QUEUE_SIZE    - records buffered before new ones are dropped (default 10000)
+    LOG_SAMPLE_WINDOW - seconds per sampling window (default 10)
+    LOG_SAMPLE_BURST  - records per message template per window (default 20, 0 = no sampling)
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+
+from utils import metrics
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", 10))
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", 20))
+
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+_handler = None
+_listener = None
+_configure_lock = threading.Lock()
+
+
+# ================================
+# FILTERS (run on the calling thread)
+# ================================
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request ID unless one was passed via extra="""
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """At most `burst` records per message template per `window` seconds below WARNING"""
+
+    def __init__(self, burst=LOG_SAMPLE_BURST, window=LOG_SAMPLE_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._lock = threading.Lock()
+        self._windows = {}  # (logger, template) -> [window start, passed, suppressed]
+
+    def filter(self, record):
+        if self.burst <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                if len(self._windows) > 10000:
+                    self._windows.clear()  # bound memory if templates are not constant
+                suppressed = state[2] if state else 0
+                self._windows[key] = [now, 1, 0]
+            elif state[1] < self.burst:
+                state[1] += 1
+                suppressed, state[2] = state[2], 0
+            else:
+                state[2] += 1
+                suppressed = None
+        if suppressed is None:
+            metrics.count("log_records_suppressed_total")
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+# ================================
+# NON-BLOCKING QUEUE HANDLER
+# ================================
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self._dropped_lock = threading.Lock()
+        self.dropped = 0
+        self._unreported_drops = 0
+
+    def prepare(self, record):
+        # Only merge the arguments here; formatting happens on the writer thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        with self._dropped_lock:
+            if self._unreported_drops:
+                record.dropped = self._unreported_drops
+                self._unreported_drops = 0
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+                self._unreported_drops += getattr(record, "dropped", 0) + 1
+            metrics.count("log_records_dropped_total")
+
+
+# ================================
+# FORMATTERS (run on the writer thread)
+# ================================
+def _notes(record):
+    notes = []
+    if getattr(record, "suppressed", 0):
+        notes.append(f"{record.suppressed} similar suppressed")
+    if getattr(record, "dropped", 0):
+        notes.append(f"{record.dropped} records dropped: log queue full")
+    return notes
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(process)d] [req=%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record):
+        record.request_id = getattr(record, "request_id", "-")
+        text = super().format(record)
+        notes = _notes(record)
+        return f"{text} ({'; '.join(notes)})" if notes else text
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        notes = _notes(record)
+        if notes:
+            entry["notes"] = notes
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+# ================================
+# SETUP
+# ================================
+def _start_listener():
+    global _listener
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    _listener = logging.handlers.QueueListener(_handler.queue, writer, respect_handler_level=False)
+    _listener.start()
+
+
+def _restart_after_fork():
+    """The writer thread doesn't survive fork(); give the child its own queue and writer"""
+    if _handler is not None:
+        # Another thread may have held these locks at the moment of fork
+        _handler._dropped_lock = threading.Lock()
+        for log_filter in _handler.filters:
+            if isinstance(log_filter, SamplingFilter):
+                log_filter._lock = threading.Lock()
+        _handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _start_listener()
+
+
+def configure_logging():
+    """Route all logging through the queue and background writer (idempotent)"""
+    global _handler
+    with _configure_lock:
+        if _handler is not None:
+            return
+        _handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        _handler.addFilter(SamplingFilter())
+        _handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+
+        _start_listener()
+        atexit.register(shutdown_logging)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def shutdown_logging():
+    """Write out everything still queued"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def logging_stats():
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "queue_size": LOG_QUEUE_SIZE,
+    }
+
+
+def init_app(app):
+    """Give every request an ID (X-Request-ID in, or generated) and echo it in the response"""
+
+    @app.before_request
+    def _assign_request_id():
+        from flask import g, request
+        incoming = request.headers.get("X-Request-ID", "")
+        request_id = incoming[:64] if incoming.isprintable() and incoming else uuid.uuid4().hex[:12]
+        g.request_id_token = request_id_var.set(request_id)
+
+    @app.after_request
+    def _echo_request_id(response):
+        response.headers["X-Request-ID"] = request_id_var.get()
+        return response
+
+    @app.teardown_request
+    def _clear_request_id(exc):
+        from flask import g
+        token = g.pop("request_id_token", None)
+        if token is not None:
+            request_id_var.reset(token)
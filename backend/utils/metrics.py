@@ -0,0 +1,263 @@
+"""
+Lightweight Latency Metrics (Prometheus text format)
+
+Stage timers and counters are kept in-process (one lock + a bisect per
+observation). Each process periodically writes a snapshot to a per-run
+directory under METRICS_DIR; /metrics merges every snapshot there, so a
+scrape hitting any gunicorn worker sees the totals for all workers (and for
+bulk-export render processes).
+
+A run is the server process and everything it starts: the first process
+to import this module (the gunicorn master, or `python app.py`) sets
+METRICS_RUN_ID, and its workers and subprocesses inherit it. Snapshots
+from earlier runs are never merged, and clear_snapshots() deletes those
+whose server has exited.
+
+Usage:
+    with metrics.timer("decode"):
+        ...
+    metrics.observe("inference", seconds)
+    metrics.count("cache_requests_total", cache="prediction", result="hit")
+
+Stages and cache results can also be collected for the current request
+only (begin_request / end_request), which utils/request_timing.py turns
+into a Server-Timing header.
+
+Settings (environment variables):
+    METRICS_ENABLED       - "true" (default)
+    METRICS_DIR           - snapshot directory (default <tmp>/fasalrakshak-metrics)
+    METRICS_FLUSH_SECONDS - how often each process writes its snapshot (default 5)
+"""
+import bisect
+import contextvars
+import glob
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "fasalrakshak-metrics"))
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+
+# "<pid of the server process>-<start time>", inherited by workers and subprocesses
+METRICS_RUN_ID = os.environ.setdefault("METRICS_RUN_ID", f"{os.getpid()}-{int(time.time())}")
+
+PREFIX = "fasalrakshak_"
+STAGE_METRIC = "stage_seconds"
+
+# Latency buckets in seconds: sub-millisecond cache hits up to slow Gemini calls
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    STAGE_METRIC: "Latency of request stages (upload_read, decode, resize, inference, pdf_render, and one per LLM provider such as gemini)",
+    "cache_requests_total": "Cache lookups by cache and result (hit or miss)",
+}
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_counters = {}  # (name, labels) -> value
+_flush_thread = None
+_flush_pid = None
+
+# (name, seconds or None, description) entries for the current request
+_request_entries = contextvars.ContextVar("request_entries", default=None)
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+# ================================
+# RECORDING
+# ================================
+def observe(stage, seconds, name=STAGE_METRIC):
+    """Record one stage duration"""
+    entries = _request_entries.get()
+    if entries is not None:
+        entries.append((stage, seconds, None))
+    if not METRICS_ENABLED:
+        return
+    _ensure_flush_thread()
+    index = bisect.bisect_left(BUCKETS, seconds)
+    key = (name, (("stage", stage),))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        histogram[index] += 1
+        histogram[-1] += seconds
+
+
+@contextmanager
+def timer(stage):
+    """Time a block as one observation of `stage`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def count(name, amount=1, **labels):
+    """Increment a counter"""
+    entries = _request_entries.get()
+    if entries is not None and "cache" in labels:
+        entries.append((f"cache-{labels['cache']}", None, labels.get("result")))
+    if not METRICS_ENABLED:
+        return
+    _ensure_flush_thread()
+    key = (name, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def begin_request():
+    """Start collecting stages for the current request; returns a token for end_request()"""
+    return _request_entries.set([])
+
+
+def end_request(token):
+    """Stop collecting and return the request's (name, seconds, description) entries"""
+    entries = _request_entries.get() or []
+    _request_entries.reset(token)
+    return entries
+
+
+# ================================
+# CROSS-PROCESS SNAPSHOTS
+# ================================
+def snapshot():
+    """This process's metrics in a JSON-serializable form"""
+    with _lock:
+        histograms = [[name, list(labels), list(values)] for (name, labels), values in _histograms.items()]
+        counters = [[name, list(labels), value] for (name, labels), value in _counters.items()]
+    return {"histograms": histograms, "counters": counters}
+
+
+def _run_dir():
+    return os.path.join(METRICS_DIR, f"run-{METRICS_RUN_ID}")
+
+
+def flush():
+    """Write this process's snapshot to this run's directory"""
+    os.makedirs(_run_dir(), exist_ok=True)
+    path = os.path.join(_run_dir(), f"process-{os.getpid()}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def _ensure_flush_thread():
+    """Start the periodic flush lazily (and again in a forked process)"""
+    global _flush_thread, _flush_pid
+    if _flush_pid == os.getpid():
+        return
+    with _lock:
+        if _flush_pid != os.getpid():
+            _flush_pid = os.getpid()
+            _flush_thread = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+            _flush_thread.start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            flush()
+        except Exception as e:
+            log.warning("Could not write metrics snapshot: %s", e)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass  # exists but belongs to someone else
+    return True
+
+
+def clear_snapshots():
+    """Delete snapshot directories of earlier runs whose server has exited"""
+    for path in glob.glob(os.path.join(METRICS_DIR, "run-*")):
+        run_id = os.path.basename(path)[len("run-"):]
+        if run_id == METRICS_RUN_ID:
+            continue
+        try:
+            if _pid_alive(int(run_id.split("-")[0])):
+                continue  # another server sharing METRICS_DIR
+        except ValueError:
+            pass
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def merged():
+    """Sum the snapshots of every process, with this one's taken fresh"""
+    flush()
+    histograms = {}
+    counters = {}
+    for path in glob.glob(os.path.join(_run_dir(), "process-*.json")):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue  # being replaced right now; picked up on the next scrape
+        for name, labels, values in data["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                total[i] += value
+        for name, labels, value in data["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+# ================================
+# PROMETHEUS TEXT FORMAT
+# ================================
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus():
+    """All workers' metrics in Prometheus text exposition format"""
+    histograms, counters = merged()
+    lines = []
+
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, values):
+                cumulative += bucket_count
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', repr(bound))])} {cumulative}")
+            cumulative += values[len(BUCKETS)]
+            lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {values[-1]:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {cumulative}")
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {PREFIX}{name} counter")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
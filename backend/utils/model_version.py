@@ -0,0 +1,65 @@
+"""
+Model Artifact Identification
+
+Which model file is being served, and a version string for it, without
+importing TensorFlow (so lazily-loading web workers can use it too).
+
+Settings (environment variables):
+    MODEL_VARIANT - "keras" (default), "float16" or "int8"
+"""
+import hashlib
+import os
+import threading
+
+MODEL_PATH = "models/MobileNetV2_best.h5"
+
+MODEL_VARIANT = os.getenv("MODEL_VARIANT", "keras").lower()
+TFLITE_VARIANTS = {
+    "float16": "models/MobileNetV2_float16.tflite",
+    "int8": "models/MobileNetV2_int8.tflite",
+}
+
+_hash_lock = threading.Lock()
+_hash_cache = {}  # path -> ((size, mtime_ns), sha256)
+
+
+def served_model_path(variant=MODEL_VARIANT):
+    """Path of the artifact the configured variant serves"""
+    return TFLITE_VARIANTS.get(variant, MODEL_PATH)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hash a file in chunks so large models don't need to fit in memory twice"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_sha256(path):
+    """
+    file_sha256() of a model file, only recomputed when its size or mtime
+    changes (so calling this per request costs one stat())
+    """
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        cached = _hash_cache.get(path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, file_sha256(path))
+            _hash_cache[path] = cached
+        return cached[1]
+
+
+def model_version(variant=MODEL_VARIANT):
+    """
+    Version string for a variant's model file: "<variant>-<sha256[:16]>"
+
+    This is the file on disk now; the version a process actually serves is
+    recorded when it loads the model (model_loader.load_inference()).
+    """
+    try:
+        return f"{variant}-{artifact_sha256(served_model_path(variant))[:16]}"
+    except OSError:
+        return f"{variant}-missing"
@@ -1,129 +1,206 @@
 """
 Professional PDF Report Generator with Branding, QR Code, and Multi-language Support
+
+Everything that doesn't depend on the report (translations, the QR code
+image) is built once at import. The page chrome (watermark, logo, title,
+separator and QR code) is drawn once per document as a form XObject and
+placed on each page with doForm(), so pages only add their dynamic text.
+reportlab forms belong to one document, so they can't be shared across
+reports.
+
+Devanagari text is drawn with Noto Serif Devanagari (fonts/), registered
+once per process; reportlab keeps the parsed font and embeds only the
+glyphs each report uses. reportlab does not apply complex-script shaping
+without uharfbuzz, so conjuncts and some vowel signs (e.g. ि) may be placed
+less precisely than in a browser.
 """
 import io
+import logging
+import os
+import re
 import uuid
 from datetime import datetime
 import qrcode
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+QR_URL = "https://fasal-rakshak-l9n4.vercel.app/"
+
+# Part of the download route's content hash (routes/download_report.py): bump
+# it with any change to the layout, text or fonts so cached PDFs and ETags
+# from the old renderer stop matching
+RENDER_VERSION = 1
+
+DEVANAGARI_FONT = "NotoSerifDevanagari"
+DEVANAGARI_FONT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts", "NotoSerifDevanagari-Regular.ttf"
+)
+_DEVANAGARI_RE = re.compile("[\u0900-\u097F]")
+
+
+def _register_fonts():
+    """Parse and register the Devanagari font once; False if it is unavailable"""
+    try:
+        pdfmetrics.registerFont(TTFont(DEVANAGARI_FONT, DEVANAGARI_FONT_PATH))
+        return True
+    except Exception as e:
+        log.warning("Devanagari font not available (%s) - Hindi text will not render", e)
+        return False
+
+
+DEVANAGARI_AVAILABLE = _register_fonts()
+
+
+def font_for(text, font="Helvetica"):
+    """Font to draw text with: the Devanagari font if it needs one, else `font`"""
+    if DEVANAGARI_AVAILABLE and _DEVANAGARI_RE.search(str(text)):
+        return DEVANAGARI_FONT
+    return font
+
+# Multi-language translations
+TRANSLATIONS = {
+    "en": {
+        "title": "FasalRakshak - Plant Disease Report",
+        "report_id": "Report ID",
+        "scan_date": "Scan Date",
+        "disease": "Disease Detected",
+        "crop": "Crop Name",
+        "severity": "Severity",
+        "affected_area": "Affected Area",
+        "recovery": "Recovery Timeline",
+        "symptoms": "Observed Symptoms",
+        "treatment": "Immediate Treatment",
+        "prevention": "Prevention Measures",
+        "generated_by": "Generated by FasalRakshak",
+        "organic": "Organic Treatment",
+        "chemical": "Chemical Treatment",
+        "fertilizer": "Fertilizer Advice",
+        "description": "Disease Description"
+    },
+    "hi": {
+        "title": "फसलरक्षक - पौधे रोग रिपोर्ट",
+        "report_id": "रिपोर्ट आईडी",
+        "scan_date": "स्कैन तारीख",
+        "disease": "रोग का पता चला",
+        "crop": "फसल का नाम",
+        "severity": "गंभीरता",
+        "affected_area": "प्रभावित क्षेत्र",
+        "recovery": "ठीक होने का समय",
+        "symptoms": "लक्षण",
+        "treatment": "तत्काल उपचार",
+        "prevention": "रोकथाम",
+        "generated_by": "फसलरक्षक द्वारा निर्मित",
+        "organic": "जैविक उपचार",
+        "chemical": "रासायनिक उपचार",
+        "fertilizer": "उर्वरक सलाह",
+        "description": "रोग विवरण"
+    }
+}
+
+
+def _build_qr_png(url):
+    """Render the QR code once; it is the same on every report"""
+    # Drawn at 70pt, so 4px modules are plenty; larger images only make
+    # every PDF bigger and slower to encode
+    qr = qrcode.QRCode(version=1, box_size=4, border=2)
+    qr.add_data(url)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+    qr_buffer = io.BytesIO()
+    qr_img.save(qr_buffer, format='PNG')
+    return qr_buffer.getvalue()
+
+
+QR_PNG = _build_qr_png(QR_URL)
+
+
+def draw_page_chrome(c, t, width, height):
+    """Static parts of every page: watermark, logo, title, separator, QR code"""
+    # Diagonal transparent watermark across page
+    c.saveState()
+    c.setFont("Helvetica-Bold", 60)
+    c.setFillColorRGB(0.9, 0.9, 0.9, alpha=0.15)
+    c.translate(width / 2, height / 2)
+    c.rotate(45)
+    c.drawCentredString(0, 0, "FasalRakshak")
+    c.restoreState()
+    
+    # Logo (text-based emoji logo)
+    c.setFont("Helvetica-Bold", 20)
+    c.setFillColorRGB(0.2, 0.6, 0.2)
+    c.drawString(40, height - 50, "🌾 FasalRakshak")
+    
+    # Title
+    c.setFont(font_for(t["title"], "Helvetica-Bold"), 16)
+    c.setFillColorRGB(0.2, 0.6, 0.2)
+    c.drawCentredString(width / 2, height - 90, t["title"])
+    
+    # Green separator line
+    c.setStrokeColorRGB(0.2, 0.6, 0.2)
+    c.setLineWidth(2)
+    c.line(40, height - 100, width - 40, height - 100)
+    
+    # QR Code in bottom right corner (ImageReader is not thread-safe, so
+    # each document decodes the small cached PNG itself)
+    c.drawImage(ImageReader(io.BytesIO(QR_PNG)), width - 100, 20, width=70, height=70)
 
 
-def generate_pdf_report(report_data, filename, language="en"):
+def generate_pdf_report(report_data, output, language="en", report_id=None, scan_date=None):
     """
     Generate professional PDF report with all branding elements
     
     Args:
         report_data: dict containing disease and ai_report data
-        filename: output PDF file path
+        output: output PDF file path, or a binary file-like object
+                (e.g. io.BytesIO) to render in memory
         language: "en" for English or "hi" for Hindi
+        report_id: ID printed on the report (random when omitted)
+        scan_date: datetime printed as the scan date (report_data["scan_date"],
+                   else now, when omitted)
     
     Returns:
-        str: Unique report ID
+        str: Report ID
     """
     
-    c = canvas.Canvas(filename, pagesize=A4)
+    c = canvas.Canvas(output, pagesize=A4)
     width, height = A4
     
     # Generate unique Report ID
-    report_id = str(uuid.uuid4())[:8].upper()
-    scan_date = datetime.now().strftime("%d %b %Y, %H:%M")
-    
-    # Multi-language translations
-    translations = {
-        "en": {
-            "title": "FasalRakshak - Plant Disease Report",
-            "report_id": "Report ID",
-            "scan_date": "Scan Date",
-            "disease": "Disease Detected",
-            "crop": "Crop Name",
-            "severity": "Severity",
-            "affected_area": "Affected Area",
-            "recovery": "Recovery Timeline",
-            "symptoms": "Observed Symptoms",
-            "treatment": "Immediate Treatment",
-            "prevention": "Prevention Measures",
-            "generated_by": "Generated by FasalRakshak",
-            "organic": "Organic Treatment",
-            "chemical": "Chemical Treatment",
-            "fertilizer": "Fertilizer Advice",
-            "description": "Disease Description"
-        },
-        "hi": {
-            "title": "फसलरक्षक - पौधे रोग रिपोर्ट",
-            "report_id": "रिपोर्ट आईडी",
-            "scan_date": "स्कैन तारीख",
-            "disease": "रोग का पता चला",
-            "crop": "फसल का नाम",
-            "severity": "गंभीरता",
-            "affected_area": "प्रभावित क्षेत्र",
-            "recovery": "ठीक होने का समय",
-            "symptoms": "लक्षण",
-            "treatment": "तत्काल उपचार",
-            "prevention": "रोकथाम",
-            "generated_by": "फसलरक्षक द्वारा निर्मित",
-            "organic": "जैविक उपचार",
-            "chemical": "रासायनिक उपचार",
-            "fertilizer": "उर्वरक सलाह",
-            "description": "रोग विवरण"
-        }
-    }
-    
-    t = translations.get(language, translations["en"])
+    report_id = report_id or str(uuid.uuid4())[:8].upper()
+    scan_date = (scan_date or report_data.get("scan_date") or datetime.now()).strftime("%d %b %Y, %H:%M")
     
-    # Generate QR Code
-    qr = qrcode.QRCode(version=1, box_size=10, border=2)
-    qr_url = f"https://fasal-rakshak-l9n4.vercel.app/"
-    qr.add_data(qr_url)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white")
-    qr_buffer = io.BytesIO()
-    qr_img.save(qr_buffer, format='PNG')
-    qr_buffer.seek(0)
+    t = TRANSLATIONS.get(language, TRANSLATIONS["en"])
     
-    def draw_watermark():
-        """Draw diagonal transparent watermark across page"""
-        c.saveState()
-        c.setFont("Helvetica-Bold", 60)
-        c.setFillColorRGB(0.9, 0.9, 0.9, alpha=0.15)
-        c.translate(width / 2, height / 2)
-        c.rotate(45)
-        c.drawCentredString(0, 0, "FasalRakshak")
-        c.restoreState()
+    # Page chrome is drawn once into a form and reused on every page
+    chrome_form = f"page_chrome_{language}"
+    c.beginForm(chrome_form)
+    draw_page_chrome(c, t, width, height)
+    c.endForm()
     
     def draw_header():
-        """Draw professional header with logo and metadata"""
-        # Logo (text-based emoji logo)
-        c.setFont("Helvetica-Bold", 20)
-        c.setFillColorRGB(0.2, 0.6, 0.2)
-        c.drawString(40, height - 50, "🌾 FasalRakshak")
+        """Place the page chrome and draw the report metadata"""
+        c.doForm(chrome_form)
         
         # Report metadata on right side
-        c.setFont("Helvetica", 10)
+        c.setFont(font_for(t["report_id"]), 10)
         c.setFillColorRGB(0, 0, 0)
         c.drawRightString(width - 40, height - 40, f"{t['report_id']}: {report_id}")
+        c.setFont(font_for(t["scan_date"]), 10)
         c.drawRightString(width - 40, height - 55, f"{t['scan_date']}: {scan_date}")
-        
-        # Title
-        c.setFont("Helvetica-Bold", 16)
-        c.setFillColorRGB(0.2, 0.6, 0.2)
-        c.drawCentredString(width / 2, height - 90, t["title"])
-        
-        # Green separator line
-        c.setStrokeColorRGB(0.2, 0.6, 0.2)
-        c.setLineWidth(2)
-        c.line(40, height - 100, width - 40, height - 100)
     
     def draw_footer(page_num):
-        """Draw footer with generated by text and QR code"""
-        c.setFont("Helvetica", 9)
+        """Draw footer with generated by text (the QR code is part of the chrome)"""
+        footer = f"{t['generated_by']} | {t['report_id']}: {report_id}"
+        c.setFont(font_for(footer), 9)
         c.setFillColorRGB(0.5, 0.5, 0.5)
-        c.drawCentredString(width / 2, 40, f"{t['generated_by']} | {t['report_id']}: {report_id}")
-        
-        # QR Code in bottom right corner
-        c.drawImage(ImageReader(qr_buffer), width - 100, 20, width=70, height=70)
-        qr_buffer.seek(0)  # Reset buffer position for next page
+        c.drawCentredString(width / 2, 40, footer)
     
     def wrap_text(text, max_width, font_name="Helvetica", font_size=11):
         """Wrap text to fit within max_width"""
@@ -146,7 +223,6 @@ def generate_pdf_report(report_data, filename, language="en"):
         return lines
     
     # Start first page
-    draw_watermark()
     draw_header()
     
     y = height - 130
@@ -160,18 +236,16 @@ def generate_pdf_report(report_data, filename, language="en"):
         if y < 150:
             draw_footer(1)
             c.showPage()
-            draw_watermark()
             draw_header()
             y = height - 130
         
         # Section title
-        c.setFont("Helvetica-Bold", 14)
+        c.setFont(font_for(title, "Helvetica-Bold"), 14)
         c.setFillColorRGB(0.2, 0.6, 0.2)
         c.drawString(40, y, title)
         y -= 20
         
         # Section content
-        c.setFont("Helvetica", 11)
         c.setFillColorRGB(0, 0, 0)
         
         if is_list and isinstance(content, list):
@@ -180,26 +254,29 @@ def generate_pdf_report(report_data, filename, language="en"):
                 if y < 150:
                     draw_footer(1)
                     c.showPage()
-                    draw_watermark()
                     draw_header()
+                    c.setFillColorRGB(0, 0, 0)
                     y = height - 130
                 
+                c.setFont(font_for(item), 11)
                 c.drawString(60, y, f"• {item}")
                 y -= 18
         else:
             # Regular text with wrapping
             text = str(content)
             max_width = width - 100
-            lines = wrap_text(text, max_width)
+            font_name = font_for(text)
+            lines = wrap_text(text, max_width, font_name)
             
             for line in lines:
                 if y < 150:
                     draw_footer(1)
                     c.showPage()
-                    draw_watermark()
                     draw_header()
+                    c.setFillColorRGB(0, 0, 0)
                     y = height - 130
                 
+                c.setFont(font_name, 11)
                 c.drawString(60, y, line)
                 y -= 18
         
@@ -262,8 +339,22 @@ def generate_pdf_report(report_data, filename, language="en"):
     # Save PDF
     c.save()
     
-    print(f"✅ PDF generated: {filename}")
-    print(f"   Report ID: {report_id}")
-    print(f"   Language: {language}")
+    log.debug("PDF generated: %s (Report ID: %s, language: %s)",
+              output if isinstance(output, str) else "in memory", report_id, language)
     
     return report_id
+
+
+def render_pdf_bytes(report_data, language="en", report_id=None):
+    """
+    Render a report in memory
+    
+    Module-level so process pools can call it (see routes/bulk_export.py).
+    
+    Returns:
+        (report_id, pdf_bytes)
+    """
+    buffer = io.BytesIO()
+    with metrics.timer("pdf_render"):
+        report_id = generate_pdf_report(report_data, buffer, language=language, report_id=report_id)
+    return report_id, buffer.getvalue()
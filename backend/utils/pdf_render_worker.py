@@ -0,0 +1,8 @@
+"""
+Main module for bulk-export render processes
+
+Spawned processes re-import the parent's main module. `python app.py`
+points that at this module (see app.py), so render processes load only the
+PDF generator instead of rebuilding the Flask app and the model.
+"""
+from utils.pdf_generator import render_pdf_bytes  # noqa: F401  (warm the import)
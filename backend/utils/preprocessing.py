@@ -0,0 +1,69 @@
+"""
+Image Preprocessing for Model Inference
+
+Phone photos are typically 12 MP, but the model only needs 224x224. Instead
+of decoding every pixel and then resizing, JPEGs are decoded with libjpeg's
+DCT scaling (Image.draft) straight to the smallest 1/2, 1/4 or 1/8 scale that
+is still at least the target size, and the rest of the way is done with a
+staged reduce + resize. This cuts both decode time and the size of the
+intermediate buffer.
+
+Settings (environment variables):
+    FAST_DECODE - "true" / "false" (default: true); false restores the
+                  full-size decode path
+"""
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+from utils import metrics
+
+FAST_DECODE = os.getenv("FAST_DECODE", "true").lower() == "true"
+
+IMAGE_SIZE = (224, 224)
+
+# Integer-factor reduce() is used while the image is more than this many
+# times the target size; the final resize then only covers a small ratio.
+REDUCING_GAP = 3.0
+
+
+def decode_image(image_bytes, size=IMAGE_SIZE, fast=FAST_DECODE):
+    """
+    Decode uploaded bytes into an RGB PIL image resized to `size`
+
+    Args:
+        image_bytes: raw uploaded file contents
+        size: (width, height) target size
+        fast: use reduced-resolution decoding and staged reduction
+
+    Returns:
+        PIL.Image.Image: RGB image of exactly `size`
+
+    Decode and resize times are recorded as the "decode" and "resize"
+    stages in utils.metrics.
+    """
+    with metrics.timer("decode"):
+        image = Image.open(io.BytesIO(image_bytes))
+        if fast and image.format == "JPEG":
+            # Decoder picks the largest DCT scale-down that keeps both sides >= size
+            image.draft("RGB", size)
+        image = image.convert("RGB")
+
+    with metrics.timer("resize"):
+        if not fast:
+            return image.resize(size)
+        if image.size == tuple(size):
+            return image
+        return image.resize(size, Image.BICUBIC, reducing_gap=REDUCING_GAP)
+
+
+def preprocess_image(image_bytes, size=IMAGE_SIZE):
+    """
+    Decode uploaded bytes into a (224, 224, 3) uint8 array
+
+    Pixels stay uint8 (150 KB instead of 1.2 MB as float64); scaling to
+    [0, 1] happens inside the serving graph (see utils/inference.py).
+    """
+    return np.asarray(decode_image(image_bytes, size), dtype=np.uint8)
@@ -0,0 +1,312 @@
+"""
+Precomputed Disease-Report Store
+
+The model can only emit the labels in utils/class_names.py, so the report
+for each of them is generated offline (precompute_reports.py) and written to
+one versioned JSON file. Requests read from an in-memory dict; anything not
+in the store (e.g. a free-text disease name) falls through to live generation.
+
+File layout:
+    {
+        "format_version": 1,
+        "version": "<sha256[:12] of the reports>",
+        "generated_at": "2026-01-01T00:00:00",
+        "reports": {"Apple___Apple_scab": {...}, ...}
+    }
+
+Settings (environment variables):
+    REPORT_STORE_ENABLED       - "true" (default) to serve precomputed reports
+    REPORT_STORE_PATH          - store file (default data/disease_reports.json)
+    REPORT_STORE_REFRESH_HOURS - regenerate in the background once the file is
+                                 older than this (default 168, 0 disables)
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from utils import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are not coordinated across workers
+    fcntl = None
+
+REPORT_STORE_ENABLED = os.getenv("REPORT_STORE_ENABLED", "true").lower() == "true"
+REPORT_STORE_PATH = os.getenv("REPORT_STORE_PATH", "data/disease_reports.json")
+REPORT_STORE_REFRESH_HOURS = float(os.getenv("REPORT_STORE_REFRESH_HOURS", 168))
+
+log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+SEVERITY_LEVELS = ("Low", "Medium", "High")
+TEXT_FIELDS = (
+    "crop_name", "disease_name", "severity", "affected_area",
+    "recovery_timeline", "spread_risk", "disease_description",
+)
+LIST_FIELDS = (
+    "symptoms", "treatment", "organic_treatment",
+    "fertilizer_recommendation", "prevention",
+)
+
+
+def validate_report(report):
+    """Return a list of problems with a report (empty when it can be stored)"""
+    if not isinstance(report, dict):
+        return ["report is not an object"]
+
+    problems = []
+    for field in TEXT_FIELDS:
+        value = report.get(field)
+        if not isinstance(value, str) or not value.strip():
+            problems.append(f"{field} missing or empty")
+    for field in LIST_FIELDS:
+        value = report.get(field)
+        if not isinstance(value, list) or not value or not all(isinstance(v, str) and v.strip() for v in value):
+            problems.append(f"{field} must be a non-empty list of strings")
+    if report.get("severity") not in SEVERITY_LEVELS:
+        problems.append(f"severity must be one of {', '.join(SEVERITY_LEVELS)}")
+    return problems
+
+
+def reports_version(reports):
+    """Content hash of the reports, so two identical stores share a version"""
+    canonical = json.dumps(reports, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest()[:12]
+
+
+def write_store(path, reports):
+    """Atomically write reports to the store file and return its version"""
+    version = reports_version(reports)
+    document = {
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "reports": reports,
+    }
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+    return version
+
+
+def read_store(path):
+    """Load a store file, returning None if it is missing or has another format"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            document = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if document.get("format_version") != FORMAT_VERSION:
+        log.warning("Ignoring %s: format_version %s != %s", path, document.get("format_version"), FORMAT_VERSION)
+        return None
+    return document
+
+
+def build_reports(class_names, generate_fn, fallback_fn=None, existing=None, progress=print):
+    """
+    Generate and validate a report for every class name
+
+    Args:
+        class_names: "Crop___Disease" labels to generate
+        generate_fn: callable(full_name) -> report dict
+        fallback_fn: callable(full_name) -> the report generate_fn returns when
+                     generation fails; such reports are rejected, not stored
+        existing: previously stored reports, kept for classes that fail now
+        progress: callable(line) told about each class as it finishes
+
+    Returns:
+        (reports, failures) where failures maps class name -> reason
+    """
+    existing = existing or {}
+    reports = {}
+    failures = {}
+
+    for i, full_name in enumerate(class_names, 1):
+        try:
+            report = generate_fn(full_name)
+            problems = validate_report(report)
+            if not problems and fallback_fn is not None and report == fallback_fn(full_name):
+                problems = ["generation failed (fallback report returned)"]
+        except Exception as e:
+            report, problems = None, [str(e)]
+
+        if problems:
+            failures[full_name] = "; ".join(problems)
+            if full_name in existing:
+                reports[full_name] = existing[full_name]
+            progress(f"[!] {i}/{len(class_names)} {full_name}: {failures[full_name]}")
+        else:
+            reports[full_name] = report
+            progress(f"[+] {i}/{len(class_names)} {full_name}")
+
+    return reports, failures
+
+
+class ReportStore:
+    """
+    In-memory view of the store file with an optional background refresh
+
+    Args:
+        path: store file
+        class_names: labels to regenerate on refresh
+        generate_fn / fallback_fn: see build_reports()
+        refresh_hours: file age that triggers a background regeneration
+                       (0 or no generate_fn disables refreshing)
+    """
+
+    def __init__(self, path, class_names=(), generate_fn=None, fallback_fn=None,
+                 refresh_hours=REPORT_STORE_REFRESH_HOURS):
+        self.path = path
+        self.class_names = list(class_names)
+        self.generate_fn = generate_fn
+        self.fallback_fn = fallback_fn
+        self.refresh_seconds = refresh_hours * 3600 if generate_fn else 0
+
+        self._reports = {}
+        self._version = None
+        self._generated_at = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._last_refresh_failures = {}
+        self._thread = None
+        self._thread_pid = None
+
+        self.reload()
+
+    # ================================
+    # READ PATH
+    # ================================
+    def get(self, full_name):
+        """Precomputed report for a class name, or None on a miss"""
+        self._ensure_refresh_thread()
+        report = self._reports.get(full_name)
+        with self._lock:
+            if report is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        metrics.count("cache_requests_total", cache="report_store", result="miss" if report is None else "hit")
+        return report
+
+    def reload(self):
+        """(Re)load the file if it changed on disk; returns True when reloaded"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        try:
+            document = read_store(self.path)
+        except (OSError, ValueError) as e:
+            log.warning("Could not read report store %s: %s", self.path, e)
+            return False
+        if document is None:
+            return False
+
+        # Swap the whole dict so readers never see a half-loaded store
+        self._reports = document.get("reports", {})
+        self._version = document.get("version")
+        self._generated_at = document.get("generated_at")
+        self._mtime = mtime
+        log.info("Loaded %d precomputed reports from %s (version %s)", len(self._reports), self.path, self._version)
+        return True
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": True,
+                "path": self.path,
+                "version": self._version,
+                "generated_at": self._generated_at,
+                "size": len(self._reports),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "refresh_hours": self.refresh_seconds / 3600,
+                "refreshes": self._refreshes,
+                "last_refresh_failures": len(self._last_refresh_failures),
+            }
+
+    # ================================
+    # BACKGROUND REFRESH
+    # ================================
+    def _ensure_refresh_thread(self):
+        """Start the refresh thread lazily (and again in a forked worker)"""
+        if not self.refresh_seconds:
+            return
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._refresh_loop, name="report-store-refresh", daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _is_stale(self):
+        """True once the store file is older than the refresh interval
+
+        A missing file is never stale: the store is built offline first
+        (precompute_reports.py), the background thread only keeps it fresh.
+        """
+        try:
+            return time.time() - os.stat(self.path).st_mtime >= self.refresh_seconds
+        except OSError:
+            return False
+
+    def _refresh_loop(self):
+        # Check every few minutes: picks up files written by the CLI or by
+        # another worker, and regenerates once the file gets too old
+        check_interval = min(300.0, self.refresh_seconds)
+        while True:
+            try:
+                self.reload()
+                if self._is_stale():
+                    self.refresh()
+            except Exception as e:
+                log.warning("Report store refresh failed: %s", e)
+            time.sleep(check_interval)
+
+    def refresh(self):
+        """Regenerate every report and rewrite the store (one worker at a time)"""
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return False  # another worker is already refreshing
+
+            # Someone may have finished a refresh while we waited
+            self.reload()
+            if not self._is_stale():
+                return False
+
+            log.info("Refreshing %d precomputed disease reports...", len(self.class_names))
+            reports, failures = build_reports(
+                self.class_names, self.generate_fn, self.fallback_fn, existing=self._reports,
+                progress=log.debug,
+            )
+            write_store(self.path, reports)
+            self.reload()
+            with self._lock:
+                self._refreshes += 1
+                self._last_refresh_failures = failures
+            log.info("Report store refreshed (%d reports, %d failed)", len(reports), len(failures))
+            return True
+        finally:
+            lock_file.close()
@@ -0,0 +1,151 @@
+"""
+Per-Request Server-Timing Header and Sampled Profiling
+
+Both are opt-in and only apply to TIMED_PATHS.
+
+Server-Timing lists the stages utils.metrics recorded while handling the
+request (upload_read, decode, resize, inference, pdf_render, and the LLM
+provider such as gemini), the cache results, and the total handler time,
+e.g.
+
+    Server-Timing: upload_read;dur=0.4, cache-prediction;desc="miss",
+                   decode;dur=3.1, resize;dur=1.2, inference;dur=18.0, total;dur=24.9
+
+Browser dev tools show it in the request's Timing tab.
+
+Profiling runs cProfile on a random PROFILE_SAMPLE_RATE fraction of
+requests, one at a time per process, and writes a .prof per request to
+PROFILE_DIR, named <time>-<path>-<ms>ms-<pid>.prof. Only the newest
+PROFILE_MAX_FILES are kept. Inspect with `python -m pstats <file>` or
+snakeviz. Only the request thread is profiled, so with micro-batching the
+model call shows up as a wait on the batcher.
+
+Settings (environment variables):
+    SERVER_TIMING_ENABLED - "true" to add the Server-Timing header (default false)
+    PROFILE_SAMPLE_RATE   - fraction of requests to profile, 0-1 (default 0 = off)
+    PROFILE_DIR           - profile directory (default <tmp>/fasalrakshak-profiles)
+    PROFILE_MAX_FILES     - profiles kept before the oldest are deleted (default 200)
+"""
+import cProfile
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+from flask import g, request
+
+from utils import metrics
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "fasalrakshak-profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 200))
+
+TIMED_PATHS = ("/predict", "/api/disease-report", "/api/download-report")
+
+log = logging.getLogger(__name__)
+
+# cProfile can't run two profiles at once on Python 3.12+, and one at a
+# time keeps the cost bounded anyway
+_profile_lock = threading.Lock()
+
+
+def init_app(app):
+    """Register the request hooks when either feature is enabled"""
+    if not (SERVER_TIMING_ENABLED or PROFILE_SAMPLE_RATE > 0):
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    log.info("Request timing enabled (Server-Timing: %s, profile sample rate: %s)", SERVER_TIMING_ENABLED, PROFILE_SAMPLE_RATE)
+
+
+def format_server_timing(entries, total_seconds):
+    """Server-Timing header value; repeated stages are summed"""
+    durations = {}
+    parts = []
+    for name, seconds, description in entries:
+        if seconds is None:
+            parts.append(f'{name};desc="{description}"')
+        elif name in durations:
+            durations[name] += seconds
+        else:
+            durations[name] = seconds
+            parts.append(name)
+    parts = [part if ";" in part else f"{part};dur={durations[part] * 1000:.1f}" for part in parts]
+    parts.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# ================================
+# REQUEST HOOKS
+# ================================
+def _before_request():
+    if request.path not in TIMED_PATHS:
+        return
+    g.timing_start = time.perf_counter()
+    if SERVER_TIMING_ENABLED:
+        g.timing_token = metrics.begin_request()
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE and _profile_lock.acquire(blocking=False):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _after_request(response):
+    token = g.pop("timing_token", None)
+    if token is not None:
+        entries = metrics.end_request(token)
+        response.headers["Server-Timing"] = format_server_timing(entries, time.perf_counter() - g.timing_start)
+    return response
+
+
+def _teardown_request(exc):
+    # Also runs when a view raised, so the profiler and collector are always released
+    token = g.pop("timing_token", None)
+    if token is not None:
+        metrics.end_request(token)
+
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return
+    try:
+        profiler.disable()
+        _save_profile(profiler, time.perf_counter() - g.timing_start)
+    except Exception as e:
+        log.warning("Could not save request profile: %s", e)
+    finally:
+        _profile_lock.release()
+
+
+# ================================
+# PROFILE FILES
+# ================================
+def _save_profile(profiler, elapsed):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = "{}-{}-{}ms-{}.prof".format(
+        time.strftime("%Y%m%d-%H%M%S"),
+        request.path.strip("/").replace("/", "_"),
+        int(elapsed * 1000),
+        os.getpid(),
+    )
+    profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+    _rotate_profiles()
+
+
+def _rotate_profiles():
+    """Delete the oldest profiles beyond PROFILE_MAX_FILES"""
+    paths = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.name.endswith(".prof"):
+            try:
+                paths.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass
+    paths.sort()
+    for _, path in paths[:max(0, len(paths) - PROFILE_MAX_FILES)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # another worker rotated it first
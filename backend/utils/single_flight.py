@@ -0,0 +1,76 @@
+"""
+Single-Flight Call Coalescing
+
+Concurrent callers asking for the same key share one in-flight call: the
+first caller (the leader) runs the function, the rest wait for its result
+(or its exception). Nothing is kept once the call finishes - pair it with a
+cache for that.
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key, fn, timeout=None):
+        """
+        Run fn() once for all concurrent callers with the same key
+
+        Args:
+            key: hashable call identity
+            fn: zero-argument callable
+            timeout: seconds a follower waits for the leader (None = forever)
+
+        Returns:
+            fn()'s result; fn()'s exception is raised in every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight call {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self._leaders,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls),
+            }